@@ -0,0 +1,237 @@
+"""
+Asyncio publishing pipeline for API backends.
+Keeps many post requests in flight over one keep-alive connection pool.
+"""
+import os
+import asyncio
+import functools
+import logging
+import contextvars
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, List, Optional, Tuple
+
+from config import WordPressConfig
+from parse_cache import open_parse_cache
+from pipeline import cache_args, get_parse_pool, parse_post
+from ledger import open_ledger
+from journal import RunJournal, CLAIMED, PARSED, SUBMITTED, VERIFIED, MOVED, safe_to_resend
+from config import PostConfig
+from publishers import Publisher, PublishResult, create_publisher
+from metrics import count_post, stage
+from concurrency import create_limiter
+from logging_setup import log_context
+from utils import move_file
+
+# Seconds a partial batch waits for more parsed posts before it is sent anyway
+BATCH_LINGER = 0.05
+
+# One semaphore per site and event loop, so every pipeline publishing to it shares the cap
+_site_semaphores = weakref.WeakKeyDictionary()
+
+
+def site_semaphore(url: str, limit: int) -> asyncio.Semaphore:
+    """Get the in-flight request cap for a site."""
+    semaphores = _site_semaphores.setdefault(asyncio.get_running_loop(), {})
+    if url not in semaphores:
+        semaphores[url] = asyncio.Semaphore(limit)
+    return semaphores[url]
+
+
+async def scan_files(input_dir: str) -> AsyncIterator[str]:
+    """Yield the .txt files in the input directory without blocking the loop."""
+    def list_files():
+        with os.scandir(input_dir) as entries:
+            return [e.path for e in entries if e.is_file() and e.name.endswith('.txt')]
+
+    for file_path in await asyncio.to_thread(list_files):
+        yield file_path
+
+
+async def process_files_async(publisher: Publisher, input_dir: str,
+                              processed_dir: str = 'processed',
+                              failed_dir: str = 'failed',
+                              concurrency: int = 10,
+                              journal: Optional[RunJournal] = None) -> tuple[int, int]:
+    """
+    Process all .txt files in the input directory concurrently.
+
+    Args:
+        publisher: Thread-safe API publisher (see Publisher.thread_safe)
+        input_dir: Directory with the post files
+        processed_dir: Destination for published files
+        failed_dir: Destination for failed files
+        concurrency: Maximum number of post requests in flight for the site
+        journal: Run journal to record each file's progress in, and to resume from
+    """
+    loop = asyncio.get_running_loop()
+    requests_in_flight = site_semaphore(publisher.config.url, concurrency)
+    # Bounds parsed-but-unpublished posts so a large backlog isn't held in memory at once,
+    # while leaving enough to fill a batch for every request in flight
+    files_in_flight = asyncio.Semaphore(concurrency * publisher.batch_size * 2)
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="publish")
+    parse_cache = open_parse_cache(publisher.config)
+    # Workers only read the cache; new entries are written here
+    worker_cache = cache_args(parse_cache)
+    # Parse in worker processes so rendering doesn't compete with the loop for the GIL
+    workers = publisher.config.parse_workers
+    parse_pool = get_parse_pool(workers) if workers >= 2 else None
+    ledger = open_ledger(publisher.config)
+    # The adaptive limit keeps requests below the cap while the site is struggling
+    send = publisher.publish if publisher.batch_size == 1 else publisher.publish_batch
+    if publisher.limiter:
+        send = functools.partial(publisher.limiter.run, send)
+
+    # Posts waiting to be sent together by a batch backend, with the futures of their results
+    waiting: List[Tuple[PostConfig, asyncio.Future]] = []
+    flush_timer: Optional[asyncio.TimerHandle] = None
+    batches = set()
+
+    async def send_batch(group: List[Tuple[PostConfig, asyncio.Future]]):
+        post_configs = [post_config for post_config, _ in group]
+        try:
+            async with requests_in_flight:
+                results = await loop.run_in_executor(
+                    executor, contextvars.copy_context().run, send, post_configs
+                )
+        except Exception as e:
+            logging.error("Error publishing batch: %s", e)
+            results = [PublishResult(False, error=str(e))] * len(group)
+        for (_, future), result in zip(group, results):
+            future.set_result(result)
+
+    def flush():
+        nonlocal waiting, flush_timer
+        if flush_timer:
+            flush_timer.cancel()
+            flush_timer = None
+        group, waiting = waiting, []
+        if group:
+            task = asyncio.create_task(send_batch(group))
+            batches.add(task)
+            task.add_done_callback(batches.discard)
+
+    async def submit(post_config: PostConfig) -> PublishResult:
+        """Send one post, or add it to the next batch for batch backends."""
+        nonlocal flush_timer
+        if publisher.batch_size == 1:
+            async with requests_in_flight:
+                # Carry the post's log context into the executor thread
+                return await loop.run_in_executor(
+                    executor, contextvars.copy_context().run, send, post_config
+                )
+        future = loop.create_future()
+        waiting.append((post_config, future))
+        if len(waiting) >= publisher.batch_size:
+            flush()
+        elif flush_timer is None:
+            flush_timer = loop.call_later(BATCH_LINGER, flush)
+        return await future
+
+    def record(file_path: str, state: str, **details):
+        if journal:
+            journal.record(file_path, state, **details)
+
+    async def publish(file_path: str):
+        """Parse and publish one file, skipping posts the ledger shows as published."""
+        record(file_path, CLAIMED)
+        post_config, cache_key = await loop.run_in_executor(
+            parse_pool, parse_post, os.path.abspath(file_path), *worker_cache
+        )
+        if cache_key is not None:
+            await asyncio.to_thread(parse_cache.put, cache_key, post_config)
+        record(file_path, PARSED)
+        if ledger and await asyncio.to_thread(ledger.prepare, post_config):
+            record(file_path, VERIFIED, ok=True, skipped=True)
+            count_post("skipped")
+            return True
+        if journal and journal.unconfirmed(file_path) and not await asyncio.to_thread(
+            safe_to_resend, publisher, post_config
+        ):
+            count_post("failed")
+            return False
+
+        record(file_path, SUBMITTED)
+        if journal:
+            # Durable before the request goes out, so a resume knows it may have been sent
+            await asyncio.to_thread(journal.sync)
+        result = await submit(post_config)
+        record(file_path, VERIFIED, ok=bool(result), post_id=result.post_id)
+        count_post("published" if result else "failed")
+        if ledger:
+            try:
+                await asyncio.to_thread(ledger.record_result, post_config, result)
+            except Exception as e:
+                logging.error("Error recording %s in the ledger: %s", post_config.title, e)
+        return result
+
+    async def process(file_path: str) -> bool:
+        filename = os.path.basename(file_path)
+        async with files_in_flight:
+            with log_context(file_path):
+                result = journal.verified_result(file_path) if journal else None
+                if result is not None:
+                    logging.info("Resuming %s: already %s", filename, 'published' if result else 'failed')
+                else:
+                    try:
+                        result = await publish(file_path)
+                    except Exception as e:
+                        logging.error("Error processing %s: %s", filename, e)
+                        count_post("failed")
+                        result = False
+
+                target_dir = processed_dir if result else failed_dir
+                try:
+                    with stage("move"):
+                        await asyncio.to_thread(
+                            move_file, file_path, os.path.join(target_dir, filename)
+                        )
+                    record(file_path, MOVED, ok=bool(result))
+                except Exception:
+                    pass  # Already logged by move_file
+
+                if result:
+                    logging.info("Successfully processed %s", filename)
+                else:
+                    logging.error("Failed to create post from %s", filename)
+                return bool(result)
+
+    try:
+        paths = [path async for path in scan_files(input_dir)]
+        if not paths:
+            logging.info("No .txt files found to process")
+            return 0, 0
+
+        logging.info("Found %s files to process with %s requests in flight", len(paths), concurrency)
+        await asyncio.to_thread(publisher.prepare_terms, paths)
+        results = await asyncio.gather(*(process(path) for path in paths))
+    finally:
+        executor.shutdown(wait=False)
+
+    success_count = sum(1 for r in results if r)
+    return success_count, len(results) - success_count
+
+
+def run_async(config: WordPressConfig, concurrency: int,
+              journal: Optional[RunJournal] = None) -> Optional[tuple[int, int]]:
+    """Run the asyncio pipeline with a fresh publisher. Returns None if login fails."""
+    # The connection pool must be able to hold every in-flight request
+    config.http_pool_size = max(config.http_pool_size, concurrency)
+    publisher = create_publisher(config)
+    if not publisher.thread_safe:
+        raise ValueError(f"The {publisher.name} backend cannot be used with the asyncio pipeline")
+    publisher.limiter = create_limiter(config, concurrency)
+
+    try:
+        if not publisher.setup():
+            logging.error("Failed to login to WordPress")
+            return None
+        counts = asyncio.run(process_files_async(
+            publisher, config.input_dir, config.processed_dir, config.failed_dir,
+            concurrency, journal
+        ))
+        if publisher.limiter:
+            publisher.limiter.log_summary()
+        return counts
+    finally:
+        publisher.cleanup()
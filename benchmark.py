@@ -0,0 +1,286 @@
+"""
+End-to-end throughput benchmark for WordPress automation.
+Publishes a synthetic corpus to a local fake WordPress site with each backend and
+concurrency level, and reports throughput, per-post latency and time per stage.
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+
+from config import WordPressConfig
+from journal import RunJournal, CLAIMED, PARSED, SUBMITTED, VERIFIED, MOVED
+from pipeline import get_parse_pool, parse_post
+from publishers import PUBLISHERS, create_publisher
+from async_pipeline import run_async
+from fake_wordpress import FakeWordPress
+from logging_setup import configure_logging
+import main
+
+# Consecutive journal states that bound each stage of a file
+STAGES = [
+    ("parse", CLAIMED, PARSED),
+    ("queue", PARSED, SUBMITTED),
+    ("publish", SUBMITTED, VERIFIED),
+    ("move", VERIFIED, MOVED),
+]
+
+CATEGORIES = ["Technology", "Careers", "Remote Work", "Security", "Programming"]
+TAGS = ["Python", "WordPress", "Automation", "Internship", "Cloud", "Linux", "APIs", "Testing"]
+WORDS = (
+    "remote security analyst cloud network python automation career skills "
+    "incident response threat intelligence internship application developer"
+).split()
+
+
+@dataclass
+class BenchmarkResult:
+    """Measurements of one backend at one concurrency level."""
+    backend: str
+    concurrency: int
+    posts: int
+    succeeded: int
+    failed: int
+    seconds: float
+    posts_per_second: float
+    # Per-post publish latency, from submitted to verified
+    p50_ms: Optional[float]
+    p95_ms: Optional[float]
+    # Mean milliseconds each post spent in each stage
+    stages_ms: Dict[str, float] = field(default_factory=dict)
+    requests: int = 0
+
+
+def make_post(index: int, rng: random.Random, paragraphs: int = 4) -> str:
+    """Synthetic post file in the topost/ format."""
+    def sentence(words: int) -> str:
+        return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+    blocks = []
+    for i in range(paragraphs):
+        if i % 2:
+            blocks.append(f"[heading level=2]\n{sentence(5)}\n[/heading]")
+        blocks.append(
+            "[paragraph]\n" + " ".join(sentence(rng.randint(8, 16)) for _ in range(4)) + "\n[/paragraph]"
+        )
+    blocks.append("[list type=unordered]\n" + "\n".join(f"- {sentence(4)}" for _ in range(4)) + "\n[/list]")
+
+    return "\n".join([
+        "# --- Metadata ---",
+        f'title: "Benchmark post {index}: {sentence(4)[:-1]}"',
+        f'slug: "benchmark-post-{index}"',
+        f'featured_image: "{rng.randint(1, 3)}"',
+        f'category: "{rng.choice(CATEGORIES)}"',
+        f'tags: "{", ".join(rng.sample(TAGS, 3))}"',
+        'status: "publish"',
+        "",
+        "# --- Content ---",
+        "\n\n".join(blocks),
+        "",
+    ])
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile, or None for no values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+
+def read_journal(path: str) -> Dict[str, Dict[str, float]]:
+    """Timestamp of each state of each file in a run journal."""
+    files: Dict[str, Dict[str, float]] = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            record = json.loads(line)
+            if record.get("file"):
+                files.setdefault(record["file"], {}).setdefault(record["state"], record["ts"])
+    return files
+
+
+def summarize(backend: str, concurrency: int, posts: int, counts, seconds: float,
+              journal_path: str, requests: int) -> BenchmarkResult:
+    """Turn a run's counts and journal into a BenchmarkResult."""
+    succeeded, failed = counts if counts else (0, posts)
+    states = read_journal(journal_path)
+    latencies = [
+        (ts[VERIFIED] - ts[SUBMITTED]) * 1000
+        for ts in states.values() if SUBMITTED in ts and VERIFIED in ts
+    ]
+    stages = {}
+    for name, start, end in STAGES:
+        spans = [(ts[end] - ts[start]) * 1000 for ts in states.values() if start in ts and end in ts]
+        if spans:
+            stages[name] = sum(spans) / len(spans)
+    return BenchmarkResult(
+        backend=backend,
+        concurrency=concurrency,
+        posts=posts,
+        succeeded=succeeded,
+        failed=failed,
+        seconds=seconds,
+        posts_per_second=succeeded / seconds if seconds else 0.0,
+        p50_ms=percentile(latencies, 0.50),
+        p95_ms=percentile(latencies, 0.95),
+        stages_ms=stages,
+        requests=requests,
+    )
+
+
+def run_once(site: FakeWordPress, corpus: Dict[str, str], backend: str, concurrency: int,
+             args: argparse.Namespace) -> BenchmarkResult:
+    """Publish the corpus once with one backend and concurrency level."""
+    workdir = tempfile.mkdtemp(prefix=f"wp-bench-{backend}-")
+    try:
+        config = WordPressConfig(
+            url=site.url,
+            username=site.username,
+            password=site.password,
+            input_dir=os.path.join(workdir, "topost"),
+            processed_dir=os.path.join(workdir, "processed"),
+            failed_dir=os.path.join(workdir, "failed"),
+            backend=backend,
+            headless=True,
+            fast_fill=args.fast_fill,
+            batch_size=args.batch_size,
+            parse_workers=args.parse_workers,
+            # Every run starts cold: no cached login, parses or ledger entries
+            session_cache_path="",
+            parse_cache_dir="",
+            ledger_path="",
+            journal_path=os.path.join(workdir, "journal.jsonl"),
+        )
+        config.create_directories()
+        for filename, text in corpus.items():
+            with open(os.path.join(config.input_dir, filename), 'w', encoding='utf-8') as f:
+                f.write(text)
+
+        requests_before = site.stats()["requests"]
+        journal = RunJournal(config.journal_path)
+        finished = False
+        start = time.perf_counter()
+        try:
+            if concurrency > 1 and PUBLISHERS[backend].thread_safe:
+                counts = run_async(config, concurrency, journal)
+            elif concurrency > 1:
+                counts = main.process_files_parallel(config, concurrency, journal)
+            else:
+                publisher = create_publisher(config)
+                try:
+                    counts = main.process_files(
+                        publisher, config.input_dir, config.processed_dir,
+                        config.failed_dir, journal
+                    ) if publisher.setup() else None
+                finally:
+                    publisher.cleanup()
+            finished = True
+        finally:
+            seconds = time.perf_counter() - start
+            journal.close(finished)
+
+        return summarize(
+            backend, concurrency, len(corpus), counts, seconds, config.journal_path,
+            site.stats()["requests"] - requests_before
+        )
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def format_table(results: List[BenchmarkResult]) -> str:
+    def ms(value: Optional[float]) -> str:
+        return "-" if value is None else f"{value:.1f}"
+
+    header = (
+        f"{'backend':<11}{'conc':>5}{'ok':>6}{'fail':>6}{'posts/s':>9}{'p50 ms':>9}{'p95 ms':>9}"
+        f"{'reqs':>6}" + "".join(f"{name + ' ms':>12}" for name, _, _ in STAGES)
+    )
+    lines = [header, "-" * len(header)]
+    for r in results:
+        lines.append(
+            f"{r.backend:<11}{r.concurrency:>5}{r.succeeded:>6}{r.failed:>6}"
+            f"{r.posts_per_second:>9.1f}{ms(r.p50_ms):>9}{ms(r.p95_ms):>9}{r.requests:>6}"
+            + "".join(f"{ms(r.stages_ms.get(name)):>12}" for name, _, _ in STAGES)
+        )
+    return "\n".join(lines)
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark publishing against a local fake WordPress")
+    parser.add_argument("--posts", type=int, default=100, help="Posts per run (default: 100)")
+    parser.add_argument(
+        "--backends", nargs="+", choices=sorted(PUBLISHERS),
+        default=["rest", "rest-batch", "xmlrpc"],
+        help="Backends to run; selenium needs Chrome (default: rest rest-batch xmlrpc)"
+    )
+    parser.add_argument(
+        "--concurrency", nargs="+", type=int, default=[1, 4, 16],
+        help="Concurrency levels: async requests in flight for the REST backends, "
+             "parallel workers otherwise (default: 1 4 16)"
+    )
+    parser.add_argument("--batch-size", type=int, default=25)
+    parser.add_argument("--parse-workers", type=int, default=2)
+    parser.add_argument("--fast-fill", action="store_true", help="Use fast fill with selenium")
+    parser.add_argument("--latency", type=float, default=0.02,
+                        help="Seconds the fake site adds to every request (default: 0.02)")
+    parser.add_argument("--jitter", type=float, default=0.01,
+                        help="Up to this many extra seconds per request (default: 0.01)")
+    parser.add_argument("--write-latency", type=float, default=0.005,
+                        help="Seconds the fake site spends saving each post (default: 0.005)")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Fraction of POST requests that fail (default: 0)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", metavar="PATH", help="Also write the results as JSON")
+    parser.add_argument("--verbose", action="store_true", help="Show the publishers' log output")
+    return parser.parse_args(argv)
+
+
+def main_benchmark(argv=None) -> int:
+    args = parse_args(argv)
+    # Per-post lines would drown the table, and a log file would only slow the runs down
+    configure_logging(WordPressConfig(log_file="", log_level="INFO" if args.verbose else "ERROR"))
+
+    rng = random.Random(args.seed)
+    corpus = {f"post-{i:05d}.txt": make_post(i, rng) for i in range(args.posts)}
+
+    if args.parse_workers >= 2:
+        # Start the parser processes before the first measurement
+        sample_dir = tempfile.mkdtemp(prefix="wp-bench-")
+        sample = os.path.join(sample_dir, "sample.txt")
+        with open(sample, 'w', encoding='utf-8') as f:
+            f.write(next(iter(corpus.values())))
+        get_parse_pool(args.parse_workers).submit(parse_post, sample).result()
+        shutil.rmtree(sample_dir, ignore_errors=True)
+
+    results = []
+    for backend in args.backends:
+        for concurrency in args.concurrency:
+            # A fresh site per run, so no run finds terms or posts left by the one before
+            with FakeWordPress(
+                latency=args.latency, jitter=args.jitter, write_latency=args.write_latency,
+                error_rate=args.error_rate, seed=args.seed
+            ) as site:
+                result = run_once(site, corpus, backend, concurrency, args)
+            results.append(result)
+            print(
+                f"{backend} x{concurrency}: {result.posts_per_second:.1f} posts/s "
+                f"({result.succeeded}/{result.posts} in {result.seconds:.2f}s)",
+                file=sys.stderr
+            )
+
+    print(format_table(results))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({"args": vars(args), "results": [asdict(r) for r in results]}, f, indent=2)
+    # Injected errors are expected to fail posts
+    return 0 if args.error_rate or all(r.failed == 0 for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main_benchmark())
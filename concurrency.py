@@ -0,0 +1,239 @@
+"""
+Adaptive concurrency for WordPress automation.
+An AIMD limiter on post submissions: the number of requests in flight grows while
+the site answers quickly and without errors, and is cut when it slows down, fails
+or asks for a pause with Retry-After.
+"""
+import time
+import logging
+import threading
+import xmlrpc.client
+from collections import Counter, deque
+from email.utils import parsedate_to_datetime
+from typing import Callable, Deque, Optional, Tuple, TypeVar
+
+import requests
+
+from config import WordPressConfig
+from metrics import REGISTRY
+
+# Longest pause honored from a Retry-After header, in seconds
+MAX_RETRY_AFTER = 300.0
+
+# Weight of the newest latency in the smoothed latency
+LATENCY_SMOOTHING = 0.2
+
+# Results needed before the error rate is trusted
+MIN_SAMPLES = 5
+
+# Limiter decisions
+INCREASE = "increase"
+DECREASE = "decrease"
+PAUSE = "pause"
+
+DECISIONS = REGISTRY.counter(
+    "wp_concurrency_decisions", "Adaptive concurrency limit changes, by action and reason.",
+    ("action", "reason")
+)
+
+T = TypeVar("T")
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header, given as seconds or as an HTTP date."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return min(float(value), MAX_RETRY_AFTER)
+    try:
+        seconds = parsedate_to_datetime(value).timestamp() - time.time()
+    except (TypeError, ValueError):
+        return None
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+
+def retry_after_from(error: Exception) -> Optional[float]:
+    """The Retry-After of the HTTP response behind a failed request, if it sent one."""
+    headers = None
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        headers = error.response.headers
+    elif isinstance(error, xmlrpc.client.ProtocolError):
+        headers = error.headers
+    return parse_retry_after(headers.get("Retry-After")) if headers else None
+
+
+def _outcome(result) -> Tuple[bool, Optional[float]]:
+    """Success and Retry-After of a PublishResult or a list of them."""
+    results = result if isinstance(result, list) else [result]
+    retry_after = max((getattr(r, "retry_after", None) or 0.0 for r in results), default=0.0)
+    return all(results), retry_after or None
+
+
+class AdaptiveLimiter:
+    """
+    Caps post submissions in flight, adjusting the cap after every result.
+
+    The limit starts at minimum and doubles every round trip (slow start) until
+    the first sign of trouble, then grows by one per round trip. It is halved
+    when the error rate over the last window results passes error_threshold,
+    when the smoothed latency exceeds latency_tolerance times the best seen,
+    or when the site answers with Retry-After, which also pauses submissions.
+    Results of submissions sent before a cut don't count against the new limit,
+    so one burst of failures or slow answers cuts it only once.
+    Safe to share between threads.
+    """
+
+    def __init__(self, maximum: int, minimum: int = 1, latency_tolerance: float = 2.0,
+                 error_threshold: float = 0.1, window: int = 20, backoff: float = 0.5):
+        """
+        Args:
+            maximum: Most submissions ever in flight
+            minimum: Fewest submissions the limit is cut to
+            latency_tolerance: Slowdown over the best smoothed latency counted as degraded;
+                0 ignores latency
+            error_threshold: Fraction of failed results in the window counted as degraded
+            window: Number of recent results the error rate is taken over
+            backoff: Factor the limit is multiplied by when it is cut
+        """
+        if not 1 <= minimum <= maximum:
+            raise ValueError(f"Invalid concurrency range: {minimum}..{maximum}")
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_tolerance = latency_tolerance
+        self.error_threshold = error_threshold
+        self.backoff = backoff
+
+        self.limit = float(minimum)
+        self.in_flight = 0
+        self.slow_start = True
+        self.latency: Optional[float] = None
+        self.best_latency: Optional[float] = None
+        self.paused_until = 0.0
+        self.paused_seconds = 0.0
+        self.peak_limit = minimum
+        self.decisions: Counter = Counter()
+        self._results: Deque[bool] = deque(maxlen=window)
+        # Bumped by every cut; results from an earlier epoch only free their slot
+        self._epoch = 0
+        self._condition = threading.Condition()
+
+    @property
+    def current_limit(self) -> int:
+        return int(self.limit)
+
+    def acquire(self) -> int:
+        """Wait for a free slot, and for any Retry-After pause to end. Returns the slot's epoch."""
+        with self._condition:
+            while True:
+                pause = self.paused_until - time.monotonic()
+                if pause <= 0 and self.in_flight < self.current_limit:
+                    self.in_flight += 1
+                    return self._epoch
+                self._condition.wait(pause if pause > 0 else None)
+
+    def release(self, epoch: int, latency: float, ok: bool, retry_after: Optional[float] = None):
+        """Free a slot and adjust the limit by the result of its submission."""
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+            if retry_after:
+                self._pause(retry_after)
+            if epoch != self._epoch:
+                return
+            if retry_after:
+                self._decrease("retry-after")
+                return
+            self._results.append(ok)
+            if ok:
+                self.latency = latency if self.latency is None else (
+                    LATENCY_SMOOTHING * latency + (1 - LATENCY_SMOOTHING) * self.latency
+                )
+                self.best_latency = min(self.best_latency or self.latency, self.latency)
+
+            if self._error_rate() > self.error_threshold:
+                self._decrease("errors")
+            elif (self.latency_tolerance > 0 and self.latency
+                  and self.latency > self.best_latency * self.latency_tolerance):
+                self._decrease("latency")
+            elif ok:
+                self._increase()
+
+    def run(self, submit: Callable[..., T], *args) -> T:
+        """Call submit(*args) in a slot, judging it by the PublishResult(s) it returns."""
+        epoch = self.acquire()
+        start = time.monotonic()
+        ok, retry_after = False, None
+        try:
+            result = submit(*args)
+            ok, retry_after = _outcome(result)
+            return result
+        finally:
+            self.release(epoch, time.monotonic() - start, ok, retry_after)
+
+    def _error_rate(self) -> float:
+        if len(self._results) < MIN_SAMPLES:
+            return 0.0
+        return self._results.count(False) / len(self._results)
+
+    def _record(self, action: str, reason: str):
+        self.decisions[(action, reason)] += 1
+        DECISIONS.inc(action, reason)
+
+    def _pause(self, seconds: float):
+        until = time.monotonic() + seconds
+        if until > self.paused_until:
+            self.paused_seconds += until - max(self.paused_until, time.monotonic())
+            self.paused_until = until
+            self._record(PAUSE, "retry-after")
+            logging.warning("Site asked to retry after %.1fs; pausing submissions", seconds)
+
+    def _decrease(self, reason: str):
+        self.slow_start = False
+        if self.current_limit <= self.minimum:
+            return
+        previous = self.current_limit
+        self.limit = max(float(self.minimum), self.limit * self.backoff)
+        self._epoch += 1
+        self._results.clear()
+        # Re-measure latency at the new limit rather than judging it by the old one
+        self.latency = None
+        self._record(DECREASE, reason)
+        logging.info(
+            "Concurrency limit %s -> %s (%s)", previous, self.current_limit, reason
+        )
+
+    def _increase(self):
+        if self.limit >= self.maximum:
+            return
+        previous = self.current_limit
+        # Slow start adds one per result, doubling per round trip; after that one per round trip
+        self.limit = min(float(self.maximum), self.limit + (1 if self.slow_start else 1 / self.limit))
+        if self.current_limit > previous:
+            self.peak_limit = max(self.peak_limit, self.current_limit)
+            self._record(INCREASE, "slow-start" if self.slow_start else "healthy")
+            logging.debug("Concurrency limit %s -> %s", previous, self.current_limit)
+
+    def log_summary(self):
+        """Log where the limit ended up and why it moved."""
+        with self._condition:
+            decisions = sorted(self.decisions.items())
+            logging.info(
+                "Adaptive concurrency: final limit %s, peak %s of %s",
+                self.current_limit, self.peak_limit, self.maximum
+            )
+            for (action, reason), count in decisions:
+                logging.info("  %s (%s): %s", action, reason, count)
+            if self.paused_seconds:
+                logging.info("  paused %.1fs for Retry-After", self.paused_seconds)
+
+
+def create_limiter(config: WordPressConfig, maximum: int) -> Optional[AdaptiveLimiter]:
+    """A limiter allowing up to maximum submissions in flight, or None if it is turned off."""
+    if not config.adaptive_concurrency:
+        return None
+    return AdaptiveLimiter(
+        maximum,
+        latency_tolerance=config.concurrency_latency_tolerance,
+        error_threshold=config.concurrency_error_threshold,
+    )
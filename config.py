@@ -3,6 +3,7 @@ Configuration settings for WordPress automation.
 """
 import os
 from dataclasses import dataclass
+from datetime import datetime, timezone
 from typing import Optional
 
 @dataclass
@@ -14,6 +15,10 @@ class PostConfig:
     tags: Optional[str] = None
     media_index: Optional[int] = None  # Index of image in media library
     status: str = "draft"
+    featured_image: Optional[str] = None  # Media library filename, when not an index
+    slug: Optional[str] = None
+    post_id: Optional[int] = None  # Existing post to update instead of creating one
+    publish_date: Optional[datetime] = None  # Timezone-aware; None publishes immediately
     
     def __post_init__(self):
         """Validate post configuration after initialization."""
@@ -21,10 +26,30 @@ class PostConfig:
             raise ValueError("Post title is required")
         if not self.content:
             raise ValueError("Post content is required")
-        if self.status not in ["draft", "publish", "private"]:
+        if self.status not in ["draft", "publish", "private", "future"]:
             raise ValueError(f"Invalid post status: {self.status}")
+        if self.status == "future" and self.publish_date is None:
+            raise ValueError("Post status future requires a publish_date")
         if self.media_index is not None and not isinstance(self.media_index, int):
             raise ValueError("Media index must be an integer")
+    
+    def wordpress_status(self, now: Optional[datetime] = None) -> str:
+        """Status to submit: publish and future posts are future while publish_date is ahead."""
+        if self.status in ("publish", "future") and self.publish_date is not None:
+            now = now or datetime.now(timezone.utc)
+            return "future" if self.publish_date > now else "publish"
+        return self.status
+    
+    def publish_date_gmt(self) -> Optional[datetime]:
+        """publish_date as a naive UTC datetime, the form WordPress's *_gmt fields take."""
+        if self.publish_date is None:
+            return None
+        return self.publish_date.astimezone(timezone.utc).replace(tzinfo=None)
+    
+    @property
+    def image_reference(self):
+        """Featured image as a library index or filename, or None."""
+        return self.media_index if self.media_index is not None else self.featured_image
 
 @dataclass
 class WordPressConfig:
@@ -36,11 +61,88 @@ class WordPressConfig:
     processed_dir: str = "processed"
     failed_dir: str = "failed"
     
+    # Publishing backend: "selenium" drives the classic editor,
+    # "rest" talks to /wp-json/wp/v2 with an application password,
+    # "rest-batch" and "xmlrpc" send batch_size posts per request
+    backend: str = "selenium"
+    app_password: str = ""
+    
+    # Login session cache; an empty path disables it
+    session_cache_path: str = ".wp_session.json"
+    session_ttl: int = 12 * 60 * 60
+    
     # Browser settings
     headless: bool = False
-    implicit_wait: int = 10
+    implicit_wait: int = 10  # Maximum wait for elements that must exist
     page_load_timeout: int = 15
     
+    # Fill all editor fields with one script call instead of typing them
+    fast_fill: bool = False
+    
+    # Maximum waits for page events; waits end as soon as the condition holds
+    ajax_timeout: int = 10
+    publish_timeout: int = 30
+    wait_poll_interval: float = 0.1
+    
+    # HTTP settings for API backends
+    http_timeout: int = 30
+    http_pool_size: int = 10
+    batch_size: int = 25
+    
+    # Seconds before the category/tag name to ID maps are reloaded
+    taxonomy_ttl: int = 15 * 60
+    
+    # Processes parsing post files while others are published; below 2 parses inline
+    parse_workers: int = 2
+    
+    # Parsed post cache keyed by file content; an empty path disables it
+    parse_cache_dir: str = ".parse_cache"
+    parse_cache_max_bytes: int = 64 * 1024 * 1024
+    
+    # SQLite record of published posts, so reruns don't duplicate them; empty disables it
+    ledger_path: str = ".wp_ledger.sqlite3"
+    
+    # Write-ahead journal of per-file progress, used by --resume; empty disables it
+    journal_path: str = ".wp_journal.jsonl"
+    
+    # Watch mode: seconds a new file must stay unchanged, and the scan interval without inotify
+    watch_debounce: float = 1.0
+    watch_poll_interval: float = 2.0
+    
+    # Watch mode holds posts whose publish_date is further ahead than schedule_lead_time seconds
+    # in this schedule, then submits them as scheduled posts; empty keeps the schedule in memory
+    schedule_path: str = ".wp_schedule.jsonl"
+    schedule_lead_time: float = 60 * 60
+    
+    # Metrics export: a textfile collector file and/or a local /metrics port; empty/0 disables them
+    metrics_file: str = ""
+    metrics_port: int = 0
+    metrics_address: str = "127.0.0.1"
+    metrics_interval: float = 15.0
+    
+    # Parallel runs start with one submission in flight and adapt up to --workers/--concurrency:
+    # the limit is cut when latency grows past the tolerance times its best, or errors pass the threshold
+    adaptive_concurrency: bool = True
+    concurrency_latency_tolerance: float = 2.0
+    concurrency_error_threshold: float = 0.1
+    
+    # Retries of failed requests: exponential backoff between attempts, at most a budget
+    # of retry_budget_ratio retries per call, and a pause for everyone once
+    # breaker_threshold requests in a row find the site down
+    retry_attempts: int = 3
+    retry_base_delay: float = 1.0
+    retry_max_delay: float = 30.0
+    retry_budget_ratio: float = 0.2
+    breaker_threshold: int = 5
+    breaker_reset_timeout: float = 30.0
+    
+    # JSON lines log file, rotated at log_max_bytes or every log_rotate_interval seconds; empty disables it
+    log_file: str = "wordpress_automation.log"
+    log_level: str = "INFO"
+    log_max_bytes: int = 10 * 1024 * 1024
+    log_backup_count: int = 5
+    log_rotate_interval: float = 24 * 60 * 60
+    
     def get_admin_url(self) -> str:
         """Get WordPress admin URL."""
         return f"{self.url}/wp-admin"
@@ -49,6 +151,10 @@ class WordPressConfig:
         """Get URL for creating new post with classic editor."""
         return f"{self.get_admin_url()}/post-new.php?classic-editor"
     
+    def get_rest_url(self) -> str:
+        """Get WordPress REST API base URL."""
+        return f"{self.url.rstrip('/')}/wp-json"
+    
     def create_directories(self):
         """Create necessary directories if they don't exist."""
         for directory in [self.input_dir, self.processed_dir, self.failed_dir]:
@@ -64,7 +170,24 @@ def load_config() -> WordPressConfig:
         password=os.getenv('WP_PASS', 'writepasswordhere'),
         input_dir=os.getenv('WP_INPUT_DIR', 'topost'),
         processed_dir=os.getenv('WP_PROCESSED_DIR', 'processed'),
-        failed_dir=os.getenv('WP_FAILED_DIR', 'failed')
+        failed_dir=os.getenv('WP_FAILED_DIR', 'failed'),
+        backend=os.getenv('WP_BACKEND', 'selenium'),
+        app_password=os.getenv('WP_APP_PASSWORD', ''),
+        batch_size=int(os.getenv('WP_BATCH_SIZE', '25')),
+        session_cache_path=os.getenv('WP_SESSION_CACHE', '.wp_session.json'),
+        parse_cache_dir=os.getenv('WP_PARSE_CACHE', '.parse_cache'),
+        parse_workers=int(os.getenv('WP_PARSE_WORKERS', '2')),
+        ledger_path=os.getenv('WP_LEDGER', '.wp_ledger.sqlite3'),
+        journal_path=os.getenv('WP_JOURNAL', '.wp_journal.jsonl'),
+        schedule_path=os.getenv('WP_SCHEDULE', '.wp_schedule.jsonl'),
+        schedule_lead_time=float(os.getenv('WP_SCHEDULE_LEAD', str(60 * 60))),
+        metrics_file=os.getenv('WP_METRICS_FILE', ''),
+        metrics_port=int(os.getenv('WP_METRICS_PORT', '0')),
+        retry_attempts=int(os.getenv('WP_RETRY_ATTEMPTS', '3')),
+        adaptive_concurrency=os.getenv('WP_ADAPTIVE_CONCURRENCY', '1').lower() in ('1', 'true', 'yes'),
+        log_file=os.getenv('WP_LOG_FILE', 'wordpress_automation.log'),
+        log_level=os.getenv('WP_LOG_LEVEL', 'INFO').upper(),
+        fast_fill=os.getenv('WP_FAST_FILL', '').lower() in ('1', 'true', 'yes')
     )
 
 if __name__ == "__main__":
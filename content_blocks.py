@@ -1,16 +1,31 @@
 """
 Content block handlers for different types of WordPress content.
 Converts block syntax to HTML.
+
+BlockCompiler is the single engine behind both PostParser and BlockParser:
+a line tokenizer feeding a dispatch table of precompiled handlers.
 """
 import re
-from typing import Dict, List, Optional
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Precompiled once; these run for every block of every post
+LINK_PATTERN = re.compile(r'\[(.*?)\]\((.*?)\)')
+LIST_MARKER_PATTERN = re.compile(r'^[-\d\s.]+')
+BLOCK_TAG_PATTERN = re.compile(r'\[(\w+)(?:\s+([^\]]+))?\]')
+
+BlockInfo = Tuple[str, Dict[str, str]]
+# (block type, raw attributes, end of the tag) for a line opening a tagged block
+TagMatch = Tuple[str, Optional[str], int]
+# (block type, raw attributes, content) of an explicitly closed block
+TaggedBlock = Tuple[str, Optional[str], str]
 
 class BlockHandler:
     @staticmethod
     def paragraph(content: str) -> str:
         """Convert paragraph block to HTML."""
-        # Convert markdown links to HTML
-        content = re.sub(r'\[(.*?)\]\((.*?)\)', r'<a href="\2">\1</a>', content)
+        # Convert markdown links to HTML (a link always contains "](")
+        if '](' in content:
+            content = LINK_PATTERN.sub(r'<a href="\2">\1</a>', content)
         return f"<p>{content}</p>"
 
     @staticmethod
@@ -23,13 +38,13 @@ class BlockHandler:
         """Convert list block to HTML."""
         tag = "ul" if list_type == "unordered" else "ol"
         items = []
-        
+
         for line in content.split('\n'):
             if line.strip():
                 # Remove leading markers (-, 1., etc.)
-                item = re.sub(r'^[-\d\s.]+', '', line).strip()
+                item = LIST_MARKER_PATTERN.sub('', line).strip()
                 items.append(f"<li>{item}</li>")
-                
+
         return f"<{tag}>\n{''.join(items)}\n</{tag}>"
 
     @staticmethod
@@ -47,70 +62,231 @@ class BlockHandler:
         """Convert embed block to WordPress embed shortcode."""
         return f"[embed]{content}[/embed]"
 
-class BlockParser:
+# Dispatch table: block type -> handler(content, attrs)
+RENDERERS: Dict[str, Callable[[str, Dict[str, str]], str]] = {
+    'paragraph': lambda content, attrs: BlockHandler.paragraph(content),
+    'heading': lambda content, attrs: BlockHandler.heading(content, attrs.get('level', '2')),
+    'list': lambda content, attrs: BlockHandler.list(content, attrs.get('type', 'unordered')),
+    'quote': lambda content, attrs: BlockHandler.quote(content),
+    'code': lambda content, attrs: BlockHandler.code(content),
+    'embed': lambda content, attrs: BlockHandler.embed(content),
+}
+
+def parse_attrs(attrs_str: Optional[str]) -> Dict[str, str]:
+    """Parse "key=value" block attributes."""
+    attrs = {}
+    if attrs_str:
+        for attr in attrs_str.split():
+            if '=' in attr:
+                key, value = attr.split('=')
+                attrs[key] = value
+    return attrs
+
+class BlockCompiler:
+    """Tokenizes post content into blocks and compiles them to HTML in one pass."""
+
     def __init__(self):
-        self.handler = BlockHandler()
-        
-    def parse_block(self, block_text: str) -> Optional[str]:
-        """Parse a single content block and return HTML."""
+        # Block tag lines repeat constantly ("[paragraph]", "[/list]"), so parse each once
+        self._tag_cache: Dict[str, BlockInfo] = {}
+        self._match_cache: Dict[str, Optional[TagMatch]] = {}
+
+    def parse_tag(self, line: str) -> BlockInfo:
+        """Extract block type and attributes from a block start line."""
+        info = self._tag_cache.get(line)
+        if info is None:
+            match = BLOCK_TAG_PATTERN.match(line)
+            if not match:
+                info = ('paragraph', {})
+            else:
+                info = (match.group(1), parse_attrs(match.group(2)))
+            self._tag_cache[line] = info
+        return info
+
+    def tokenize(self, lines: Iterable[str]) -> Iterator[Tuple[BlockInfo, List[str]]]:
+        """
+        Group content lines into (block info, lines) tokens.
+
+        Lines are stripped; comments and blank lines are dropped. Any line
+        that starts with "[" and contains "]" opens a new block, closing
+        tags included, so text between blocks lands in an implicit
+        paragraph exactly as the original parser did.
+        """
+        current_block: List[str] = []
+        block_info: Optional[BlockInfo] = None
+        in_block = False
+
+        for line in lines:
+            line = line.strip()
+
+            # Skip comments
+            if line.startswith('#'):
+                continue
+
+            # Check for block start
+            if line.startswith('[') and ']' in line:
+                if in_block:
+                    yield block_info, current_block
+                    current_block = []
+                block_info = self.parse_tag(line)
+                in_block = True
+                continue
+
+            # Check for block end (only reached when the tag has no "]")
+            if line.startswith('[/'):
+                if in_block:
+                    yield block_info, current_block
+                    current_block = []
+                    in_block = False
+                continue
+
+            # Add content to current block
+            if in_block and line:
+                current_block.append(line)
+
+        # Process any remaining block
+        if in_block and current_block:
+            yield block_info, current_block
+
+    def render(self, block_info: BlockInfo, lines: List[str]) -> str:
+        """Convert one block to HTML; unknown block types pass their text through."""
+        block_type, attrs = block_info
+        content = '\n'.join(lines)
+        renderer = RENDERERS.get(block_type)
+        return renderer(content, attrs) if renderer else content
+
+    def iter_html(self, lines: Iterable[str]) -> Iterator[str]:
+        """Yield the HTML of each non-empty block."""
+        render = self.render
+        for block_info, block_lines in self.tokenize(lines):
+            html = render(block_info, block_lines)
+            if html:
+                yield html
+
+    def compile(self, content_text: str) -> str:
+        """Compile a content section into HTML, blocks separated by blank lines."""
+        return '\n\n'.join(self.iter_html(content_text.split('\n')))
+
+    def match_tag(self, line: str) -> Optional[TagMatch]:
+        """Match the block tag at the very start of an unstripped line."""
+        info = self._match_cache.get(line)
+        if info is None and line not in self._match_cache:
+            match = BLOCK_TAG_PATTERN.match(line)
+            info = (match.group(1), match.group(2), match.end()) if match else None
+            # Only bare tag lines repeat; lines with text after the tag would just fill the cache
+            if info is None or info[2] == len(line):
+                self._match_cache[line] = info
+        return info
+
+    @staticmethod
+    def split_tagged(block_text: str) -> Optional[TaggedBlock]:
+        """Split one "[type attrs]...[/type]" block, or None if it is blank or never closed."""
         if not block_text.strip():
             return None
-            
-        # Extract block type and attributes
-        match = re.match(r'\[(\w+)(?:\s+([^\]]+))?\](.*?)\[/\1\]', 
-                        block_text, re.DOTALL)
-        
+
+        match = BLOCK_TAG_PATTERN.match(block_text)
         if not match:
             return None
-            
-        block_type, attrs_str, content = match.groups()
-        
-        # Parse attributes
-        attrs = {}
-        if attrs_str:
-            for attr in attrs_str.split():
-                if '=' in attr:
-                    key, value = attr.split('=')
-                    attrs[key] = value
-
-        # Process block based on type
-        content = content.strip()
-        
-        if block_type == 'paragraph':
-            return self.handler.paragraph(content)
-        elif block_type == 'heading':
-            return self.handler.heading(content, attrs.get('level', '2'))
-        elif block_type == 'list':
-            return self.handler.list(content, attrs.get('type', 'unordered'))
-        elif block_type == 'quote':
-            return self.handler.quote(content)
-        elif block_type == 'code':
-            return self.handler.code(content)
-        elif block_type == 'embed':
-            return self.handler.embed(content)
-            
-        return None
+
+        block_type = match.group(1)
+        end = block_text.find(f"[/{block_type}]", match.end())
+        if end == -1:
+            return None
+        return block_type, match.group(2), block_text[match.end():end].strip()
+
+    def tokenize_tagged(self, lines: Iterable[str]) -> Iterator[TaggedBlock]:
+        """
+        Group content lines into explicitly closed blocks.
+
+        A block starts at each line whose stripped text starts with "[" but
+        not "[/", and runs to the next one. Its content is everything from the
+        end of the tag to the first "[/type]", stripped; lines after the
+        closing tag are ignored, and a block that is never closed is dropped.
+        The closing tag is looked for line by line as the lines come in.
+        """
+        match_tag = self.match_tag
+        block_type: Optional[str] = None
+        attrs_str: Optional[str] = None
+        closing_tag: Optional[str] = None
+        pieces: List[str] = []
+        # Lines of a block whose tag is not closed on its own line, matched as a whole at the end
+        spilled: Optional[List[str]] = None
+
+        for line in lines:
+            # Only leading whitespace matters for spotting a tag line
+            stripped = line.lstrip()
+            if stripped[:1] == '[' and stripped[1:2] != '/':
+                if spilled is not None:
+                    block = self.split_tagged('\n'.join(spilled))
+                    if block:
+                        yield block
+                    spilled = None
+                closing_tag = None
+
+                match = match_tag(line)
+                if match is None:
+                    # The tag pattern can only match across lines when this line has no "]"
+                    if ']' not in line:
+                        spilled = [line]
+                    continue
+                block_type, attrs_str, tag_end = match
+                closing_tag = f"[/{block_type}]"
+                pieces = []
+                line = line[tag_end:]
+            elif spilled is not None:
+                spilled.append(line)
+                continue
+            elif closing_tag is None:
+                continue
+
+            end = line.find(closing_tag)
+            if end == -1:
+                pieces.append(line)
+                continue
+            pieces.append(line[:end])
+            yield block_type, attrs_str, '\n'.join(pieces).strip()
+            closing_tag = None
+
+        if spilled is not None:
+            block = self.split_tagged('\n'.join(spilled))
+            if block:
+                yield block
+
+    @staticmethod
+    def render_tagged(block: TaggedBlock) -> Optional[str]:
+        """Convert one closed block to HTML, or None for an unknown type."""
+        block_type, attrs_str, content = block
+        attrs = parse_attrs(attrs_str)
+        renderer = RENDERERS.get(block_type)
+        if renderer is None:
+            return None
+        return renderer(content, attrs)
+
+    def compile_tagged(self, block_text: str) -> Optional[str]:
+        """
+        Compile one explicitly closed "[type attrs]...[/type]" block.
+
+        Returns None for blank text, a missing closing tag or an unknown type.
+        """
+        block = self.split_tagged(block_text)
+        return self.render_tagged(block) if block else None
+
+class BlockParser:
+    def __init__(self):
+        self.handler = BlockHandler()
+        self.compiler = BlockCompiler()
+
+    def parse_block(self, block_text: str) -> Optional[str]:
+        """Parse a single content block and return HTML."""
+        return self.compiler.compile_tagged(block_text)
 
     def parse_blocks(self, content: str) -> str:
         """Parse all content blocks in a string."""
         blocks = []
-        current_block = []
-        
-        for line in content.split('\n'):
-            if line.strip().startswith('[') and not line.strip().startswith('[/'):
-                if current_block:
-                    parsed = self.parse_block('\n'.join(current_block))
-                    if parsed:
-                        blocks.append(parsed)
-                    current_block = []
-                current_block.append(line)
-            elif current_block:
-                current_block.append(line)
-                
-        # Process last block
-        if current_block:
-            parsed = self.parse_block('\n'.join(current_block))
+        render_tagged = self.compiler.render_tagged
+
+        for block in self.compiler.tokenize_tagged(content.split('\n')):
+            parsed = render_tagged(block)
             if parsed:
                 blocks.append(parsed)
-                
+
         return '\n\n'.join(blocks)
@@ -0,0 +1,1103 @@
+"""
+Local stand-in for a WordPress site.
+Serves enough of wp-login, the classic editor, the REST API and XML-RPC for
+every publishing backend to run against it, with injectable latency and errors.
+"""
+import re
+import json
+import html
+import time
+import base64
+import random
+import secrets
+import argparse
+import itertools
+import threading
+import xmlrpc.client
+from datetime import datetime, timezone
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from string import Template
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, quote, urlsplit
+from xmlrpc.server import SimpleXMLRPCDispatcher
+
+LOGIN_COOKIE = "wordpress_logged_in_fake"
+
+# WordPress rejects /batch/v1 requests larger than this by default
+MAX_BATCH_SIZE = 25
+
+POST_ROUTE = re.compile(r"^/wp/v2/posts/(\d+)$")
+TERM_ROUTE = re.compile(r"^/wp/v2/(categories|tags)$")
+
+TAXONOMIES = {"categories": "category", "tags": "post_tag"}
+
+XMLRPC_METHODS = ("getUsersBlogs", "newPost", "editPost", "getPost", "getPosts", "getMediaLibrary")
+
+# Messages post.php shows after a redirect, by ?message= number
+EDIT_MESSAGES = {
+    "1": "Post updated.",
+    "6": "Post published.",
+    "8": "Post submitted.",
+    "9": "Post scheduled.",
+    "10": "Post draft updated.",
+}
+
+# How post dates are stored and returned: UTC, without an offset, like the *_gmt fields
+DATE_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+STATUS_LABELS = {
+    "publish": "Published",
+    "future": "Scheduled",
+    "private": "Privately Published",
+    "pending": "Pending Review",
+    "draft": "Draft",
+}
+
+# Just enough of jQuery for the editor scripts: .active and .post(...).done(...).fail(...)
+JQUERY_SHIM = """
+window.jQuery = (function () {
+    var jq = {active: 0};
+    function encode(data, prefix) {
+        var parts = [];
+        Object.keys(data).forEach(function (key) {
+            var name = prefix ? prefix + '[' + key + ']' : key;
+            var value = data[key];
+            if (value !== null && typeof value === 'object') {
+                parts.push(encode(value, name));
+            } else {
+                parts.push(encodeURIComponent(name) + '=' + encodeURIComponent(value));
+            }
+        });
+        return parts.filter(Boolean).join('&');
+    }
+    jq.post = function (url, data) {
+        var callbacks = {done: [], fail: []};
+        var request = {
+            done: function (f) { callbacks.done.push(f); return request; },
+            fail: function (f) { callbacks.fail.push(f); return request; }
+        };
+        jq.active++;
+        fetch(url, {
+            method: 'POST',
+            credentials: 'same-origin',
+            headers: {'Content-Type': 'application/x-www-form-urlencoded'},
+            body: encode(data || {})
+        }).then(function (response) {
+            if (!response.ok) throw new Error('HTTP ' + response.status);
+            return response.json();
+        }).then(function (body) {
+            jq.active--;
+            callbacks.done.forEach(function (f) { f(body); });
+        }, function (error) {
+            jq.active--;
+            callbacks.fail.forEach(function (f) { f(error); });
+        });
+        return request;
+    };
+    return jq;
+})();
+"""
+
+# Classic editor behaviour the Selenium backend relies on: editor tabs, status box, tags, featured image
+EDITOR_SCRIPT = """
+(function () {
+    function byId(id) { return document.getElementById(id); }
+
+    var wrap = byId('wp-content-wrap');
+    function switchEditor(mode) {
+        wrap.classList.remove('html-active', 'tmce-active');
+        wrap.classList.add(mode + '-active');
+    }
+    byId('content-html').addEventListener('click', function () { switchEditor('html'); });
+    byId('content-tmce').addEventListener('click', function () { switchEditor('tmce'); });
+
+    var title = byId('title');
+    title.addEventListener('input', function () {
+        byId('title-prompt-text').classList.toggle('screen-reader-text', title.value !== '');
+    });
+
+    document.querySelector('a.edit-post-status').addEventListener('click', function (e) {
+        e.preventDefault();
+        byId('post-status-select').style.display = 'block';
+    });
+    document.querySelector('a.save-post-status').addEventListener('click', function (e) {
+        e.preventDefault();
+        var select = byId('post_status');
+        byId('post-status-display').textContent = select.options[select.selectedIndex].text;
+        byId('post-status-select').style.display = 'none';
+    });
+
+    document.querySelector('a.edit-timestamp').addEventListener('click', function (e) {
+        e.preventDefault();
+        byId('timestampdiv').style.display = 'block';
+    });
+    document.querySelector('a.save-timestamp').addEventListener('click', function (e) {
+        e.preventDefault();
+        byId('timestamp').textContent = byId('aa').value + '-' + byId('mm').value + '-' +
+            byId('jj').value + ' ' + byId('hh').value + ':' + byId('mn').value;
+        byId('timestampdiv').style.display = 'none';
+    });
+
+    var tagInput = byId('new-tag-post_tag');
+    var tagField = byId('tax-input-post_tag');
+    var tagList = document.querySelector('.tagchecklist');
+    function tagNames(value) {
+        return value.split(',').map(function (name) { return name.trim(); }).filter(Boolean);
+    }
+    function renderTags() {
+        tagList.innerHTML = '';
+        tagNames(tagField.value).forEach(function (name) {
+            var item = document.createElement('span');
+            item.textContent = name;
+            tagList.appendChild(item);
+        });
+    }
+    function addTags() {
+        var names = tagNames(tagField.value).concat(tagNames(tagInput.value));
+        tagField.value = names.filter(function (name, i) { return names.indexOf(name) === i; }).join(', ');
+        tagInput.value = '';
+        renderTags();
+    }
+    tagInput.addEventListener('keydown', function (e) {
+        if (e.key === 'Enter') { e.preventDefault(); addTags(); }
+    });
+    document.querySelector('input.tagadd').addEventListener('click', addTags);
+    tagField.addEventListener('change', renderTags);
+
+    function openMediaModal() {
+        var modal = document.createElement('div');
+        modal.className = 'media-modal';
+        modal.innerHTML = '<button type="button" class="media-modal-close">Close</button>'
+            + '<div class="media-frame-menu"><a href="#" class="media-menu-item">Upload files</a>'
+            + '<a href="#" class="media-menu-item">Media Library</a></div>'
+            + '<ul class="attachments"></ul>'
+            + '<button type="button" class="media-button-select" disabled>Set featured image</button>';
+        document.body.appendChild(modal);
+        var selected = null;
+        var select = modal.querySelector('.media-button-select');
+        modal.querySelector('.media-modal-close').addEventListener('click', function () { modal.remove(); });
+        modal.querySelectorAll('.media-menu-item')[1].addEventListener('click', function (e) {
+            e.preventDefault();
+            jQuery.post(ajaxurl, {action: 'query-attachments', query: {post_mime_type: 'image'}})
+                .done(function (response) {
+                    var list = modal.querySelector('.attachments');
+                    response.data.forEach(function (item) {
+                        var entry = document.createElement('li');
+                        var preview = document.createElement('div');
+                        preview.className = 'attachment-preview';
+                        preview.textContent = item.filename;
+                        preview.addEventListener('click', function () {
+                            selected = item.id;
+                            select.disabled = false;
+                        });
+                        entry.appendChild(preview);
+                        list.appendChild(entry);
+                    });
+                });
+        });
+        select.addEventListener('click', function () {
+            byId('_thumbnail_id').value = selected;
+            var link = byId('set-post-thumbnail');
+            link.id = 'remove-post-thumbnail';
+            link.textContent = 'Remove featured image';
+            modal.remove();
+        });
+    }
+    document.addEventListener('click', function (e) {
+        if (e.target.id === 'set-post-thumbnail') { e.preventDefault(); openMediaModal(); }
+    });
+})();
+"""
+
+LOGIN_PAGE = Template("""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Log In &lsaquo; Fake WordPress</title></head>
+<body class="login">
+$error
+<form name="loginform" id="loginform" action="/wp-login.php" method="post">
+<p><label for="user_login">Username or Email Address</label>
+<input type="text" name="log" id="user_login" autocomplete="username"></p>
+<p><label for="user_pass">Password</label>
+<input type="password" name="pwd" id="user_pass" autocomplete="current-password"></p>
+<input type="hidden" name="redirect_to" value="$redirect_to">
+<p class="submit"><input type="submit" name="wp-submit" id="wp-submit" value="Log In"></p>
+</form>
+</body></html>
+""")
+
+ADMIN_PAGE = Template("""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>$title &lsaquo; Fake WordPress</title>
+<script>
+var ajaxurl = '/wp-admin/admin-ajax.php';
+var wpApiSettings = {root: '/wp-json/', nonce: '$nonce'};
+$jquery
+</script>
+</head>
+<body class="wp-admin">
+<div id="wpadminbar"><a href="/wp-admin/">Dashboard</a></div>
+<div id="wpbody-content">
+$body
+</div>
+</body></html>
+""")
+
+EDITOR_BODY = Template("""$message
+<form name="post" action="/wp-admin/post.php" method="post" id="post">
+<input type="hidden" id="post_ID" name="post_ID" value="$post_id">
+<div id="titlediv"><div id="titlewrap">
+<label id="title-prompt-text" for="title" class="$prompt_class">Add title</label>
+<input type="text" name="post_title" id="title" value="$title" autocomplete="off">
+</div></div>
+<div id="postdivrich">
+<div id="wp-content-wrap" class="wp-core-ui wp-editor-wrap html-active">
+<div id="wp-content-editor-tools">
+<button type="button" id="content-tmce" class="wp-switch-editor switch-tmce">Visual</button>
+<button type="button" id="content-html" class="wp-switch-editor switch-html">Text</button>
+</div>
+<textarea id="content" name="content" rows="20" cols="40">$content</textarea>
+</div>
+</div>
+<div id="submitdiv" class="postbox">
+<div id="misc-publishing-actions">
+Status: <span id="post-status-display">$status_label</span>
+<a href="#post_status" class="edit-post-status">Edit</a>
+<div id="post-status-select" style="display:none">
+<select name="post_status" id="post_status">$status_options</select>
+<a href="#post_status" class="save-post-status">OK</a>
+</div>
+Publish: <span id="timestamp">$timestamp</span>
+<a href="#edit_timestamp" class="edit-timestamp">Edit</a>
+<div id="timestampdiv" style="display:none">
+<select id="mm" name="mm">$month_options</select>
+<input type="text" id="jj" name="jj" value="$day" size="2" maxlength="2">,
+<input type="text" id="aa" name="aa" value="$year" size="4" maxlength="4"> at
+<input type="text" id="hh" name="hh" value="$hour" size="2" maxlength="2">:<input
+ type="text" id="mn" name="mn" value="$minute" size="2" maxlength="2">
+<a href="#edit_timestamp" class="save-timestamp">OK</a>
+</div>
+</div>
+<input type="submit" name="save" id="save-post" value="Save Draft">
+<input type="submit" name="publish" id="publish" value="$publish_label">
+</div>
+<div id="categorydiv" class="postbox">
+<button type="button" class="handlediv">Toggle panel: Categories</button>
+<div class="inside"><ul id="categorychecklist">$categories</ul></div>
+</div>
+<div id="tagsdiv-post_tag" class="postbox">
+<textarea name="tax_input[post_tag]" id="tax-input-post_tag" style="display:none">$tags</textarea>
+<input type="text" id="new-tag-post_tag" name="newtag[post_tag]" autocomplete="off">
+<input type="button" class="button tagadd" value="Add">
+<div class="tagchecklist">$tag_items</div>
+</div>
+<div id="postimagediv" class="postbox">
+<div class="inside">$thumbnail_link
+<input type="hidden" id="_thumbnail_id" name="_thumbnail_id" value="$thumbnail_id"></div>
+</div>
+</form>
+<script>$script</script>
+""")
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).strftime(DATE_FORMAT)
+
+
+def _gmt_date(value) -> Optional[str]:
+    """A *_gmt date from a REST string or an XML-RPC DateTime, in DATE_FORMAT."""
+    if value is None:
+        return None
+    if isinstance(value, xmlrpc.client.DateTime):
+        return datetime.strptime(value.value, "%Y%m%dT%H:%M:%S").strftime(DATE_FORMAT)
+    return datetime.fromisoformat(str(value)).strftime(DATE_FORMAT)
+
+
+def slugify(text: str) -> str:
+    """Lowercase ASCII words joined by hyphens, like sanitize_title."""
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
+
+
+def _paginate(items: list, params: Dict[str, str]) -> Tuple[list, int, int]:
+    """Slice a collection like WP_REST_Controller does; returns (page, total, total pages)."""
+    per_page = max(1, min(int(params.get("per_page", 10)), 100))
+    page = max(1, int(params.get("page", 1)))
+    total = len(items)
+    pages = max(1, -(-total // per_page))
+    return items[(page - 1) * per_page:page * per_page], total, pages
+
+
+class RestError(Exception):
+    """A WP_Error turned into a REST error response."""
+
+    def __init__(self, status: int, code: str, message: str, **data):
+        super().__init__(message)
+        self.status = status
+        self.body = {"code": code, "message": message, "data": {"status": status, **data}}
+
+
+class FakeWordPress:
+    """In-memory WordPress site served over HTTP on a background thread."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 username: str = "admin", password: str = "password",
+                 app_password: str = "", latency: float = 0.0, jitter: float = 0.0,
+                 write_latency: float = 0.0, error_rate: float = 0.0,
+                 error_status: int = 503, retry_after: Optional[int] = None,
+                 media_count: int = 5, seed: Optional[int] = None):
+        """
+        Args:
+            host: Interface to listen on
+            port: Port to listen on; 0 picks a free one
+            username: Account that may log in
+            password: Its login password, also accepted by the APIs
+            app_password: Application password for the APIs, spaces ignored
+            latency: Seconds added to every request
+            jitter: Up to this many extra seconds added to every request, at random
+            write_latency: Seconds spent saving each post, so batches cost more than single posts
+            error_rate: Fraction of POST requests answered with error_status instead
+            error_status: HTTP status of injected errors
+            retry_after: Retry-After header sent with injected errors, in seconds
+            media_count: Images in the media library
+            seed: Seed for the jitter and error injection
+        """
+        self.username = username
+        self.password = password
+        self.app_password = app_password.replace(" ", "")
+        self.latency = latency
+        self.jitter = jitter
+        self.write_latency = write_latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self._random = random.Random(seed)
+
+        self._lock = threading.Lock()
+        self._post_ids = itertools.count(1)
+        self._term_ids = itertools.count(2)
+        self.posts: Dict[int, dict] = {}
+        self.terms: Dict[str, List[dict]] = {
+            "category": [{"id": 1, "name": "Uncategorized", "slug": "uncategorized"}],
+            "post_tag": [],
+        }
+        self.sessions: Dict[str, str] = {}
+        self.counters: Dict[str, int] = {
+            "requests": 0, "injected_errors": 0, "posts_created": 0, "posts_updated": 0,
+        }
+
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.site = self
+        self._thread: Optional[threading.Thread] = None
+
+        # Oldest first, so the newest image has the highest ID like real uploads
+        self.media = [
+            {"id": next(self._post_ids), "filename": f"image-{i}.jpg",
+             "source_url": f"{self.url}/wp-content/uploads/image-{i}.jpg"}
+            for i in range(1, media_count + 1)
+        ]
+
+        self.xmlrpc = SimpleXMLRPCDispatcher(allow_none=True, encoding=None)
+        self.xmlrpc.register_multicall_functions()
+        api = _XmlRpcApi(self)
+        for name in XMLRPC_METHODS:
+            self.xmlrpc.register_function(getattr(api, name), f"wp.{name}")
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeWordPress":
+        """Serve requests on a background thread."""
+        self._thread = threading.Thread(
+            target=self.httpd.serve_forever, name="fake-wordpress", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self) -> "FakeWordPress":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def stats(self) -> Dict[str, int]:
+        """Request and post counters since the server started."""
+        with self._lock:
+            return dict(self.counters)
+
+    def _count(self, name: str):
+        with self._lock:
+            self.counters[name] += 1
+
+    # Fault injection
+
+    def delay(self):
+        """Sleep for the configured latency plus jitter."""
+        with self._lock:
+            extra = self._random.uniform(0, self.jitter) if self.jitter else 0.0
+        if self.latency or extra:
+            time.sleep(self.latency + extra)
+
+    def should_fail(self) -> bool:
+        with self._lock:
+            fail = self.error_rate > 0 and self._random.random() < self.error_rate
+            if fail:
+                self.counters["injected_errors"] += 1
+        return fail
+
+    # Authentication
+
+    def check_password(self, username: str, password: str) -> bool:
+        if username != self.username:
+            return False
+        password = password or ""
+        return password == self.password or (
+            bool(self.app_password) and password.replace(" ", "") == self.app_password
+        )
+
+    def login(self) -> str:
+        """Start a cookie session and return its token."""
+        token = secrets.token_hex(16)
+        with self._lock:
+            # The nonce is tied to the session, like wp_create_nonce('wp_rest')
+            self.sessions[token] = secrets.token_hex(5)
+        return token
+
+    def nonce_for(self, token: Optional[str]) -> Optional[str]:
+        with self._lock:
+            return self.sessions.get(token) if token else None
+
+    # Terms
+
+    def find_term(self, taxonomy: str, name: str) -> Optional[dict]:
+        with self._lock:
+            for term in self.terms[taxonomy]:
+                if term["name"].lower() == name.lower():
+                    return term
+        return None
+
+    def add_term(self, taxonomy: str, name: str) -> Tuple[dict, bool]:
+        """Create a term; returns (term, created), with the existing term if the name is taken."""
+        with self._lock:
+            for term in self.terms[taxonomy]:
+                if term["name"].lower() == name.lower():
+                    return term, False
+            term = {"id": next(self._term_ids), "name": name, "slug": slugify(name)}
+            self.terms[taxonomy].append(term)
+            return term, True
+
+    def post_terms(self, post: dict) -> List[dict]:
+        """A post's categories and tags as XML-RPC term structs."""
+        with self._lock:
+            return [
+                {"term_id": str(term["id"]), "name": term["name"], "taxonomy": taxonomy}
+                for taxonomy, key in (("category", "categories"), ("post_tag", "tags"))
+                for term in self.terms[taxonomy] if term["id"] in post[key]
+            ]
+
+    def term_ids(self, taxonomy: str, names: List[str]) -> List[int]:
+        """IDs for these term names, creating the missing ones like wp_set_post_terms."""
+        names = [name.strip() for name in names]
+        return [self.add_term(taxonomy, name)[0]["id"] for name in names if name]
+
+    # Posts
+
+    def _unique_slug(self, slug: str, post_id: Optional[int]) -> str:
+        taken = {p["slug"] for p in self.posts.values() if p["id"] != post_id}
+        candidate, suffix = slug, 2
+        while candidate in taken:
+            candidate = f"{slug}-{suffix}"
+            suffix += 1
+        return candidate
+
+    def save_post(self, fields: dict, post_id: Optional[int] = None) -> dict:
+        """
+        Create a post, or update post_id with the given fields.
+
+        Raises KeyError if post_id doesn't exist.
+        """
+        if self.write_latency:
+            time.sleep(self.write_latency)
+        with self._lock:
+            if post_id is not None:
+                post = self.posts[post_id]
+                self.counters["posts_updated"] += 1
+            else:
+                post = {
+                    "id": next(self._post_ids), "title": "", "content": "", "status": "draft",
+                    "slug": "", "categories": [], "tags": [], "featured_media": 0,
+                    "date": _now(),
+                }
+                self.posts[post["id"]] = post
+                self.counters["posts_created"] += 1
+
+            post.update({k: v for k, v in fields.items() if v is not None})
+            if post["status"] in ("publish", "future"):
+                # WordPress schedules posts dated ahead and publishes those that are due
+                post["status"] = "future" if post["date"] > _now() else "publish"
+            if post["status"] in ("publish", "future", "private") or fields.get("slug"):
+                post["slug"] = self._unique_slug(
+                    slugify(post["slug"] or post["title"]) or str(post["id"]), post["id"]
+                )
+            if not post["categories"]:
+                post["categories"] = [1]
+            post["modified"] = _now()
+            return dict(post)
+
+    def get_post(self, post_id: int) -> Optional[dict]:
+        with self._lock:
+            post = self.posts.get(post_id)
+            return dict(post) if post else None
+
+    def list_posts(self) -> List[dict]:
+        """Every post, newest first."""
+        with self._lock:
+            return [dict(p) for p in sorted(self.posts.values(), key=lambda p: -p["id"])]
+
+    def newest_media(self) -> List[dict]:
+        return list(reversed(self.media))
+
+    # REST API
+
+    def rest_post(self, post: dict) -> dict:
+        return {
+            "id": post["id"],
+            "date": post["date"],
+            "date_gmt": post["date"],
+            "modified": post["modified"],
+            "slug": post["slug"],
+            "status": post["status"],
+            "link": f"{self.url}/?p={post['id']}",
+            "title": {"raw": post["title"], "rendered": html.escape(post["title"])},
+            "content": {"raw": post["content"], "rendered": post["content"]},
+            "categories": post["categories"],
+            "tags": post["tags"],
+            "featured_media": post["featured_media"],
+        }
+
+    def _rest_post_fields(self, body: dict) -> dict:
+        def raw(value):
+            return value.get("raw") if isinstance(value, dict) else value
+
+        fields = {
+            "title": raw(body.get("title")),
+            "content": raw(body.get("content")),
+            "status": body.get("status"),
+            "slug": body.get("slug"),
+            "date": _gmt_date(body.get("date_gmt") or body.get("date")),
+            "featured_media": body.get("featured_media"),
+        }
+        for key, taxonomy in (("categories", "category"), ("tags", "post_tag")):
+            if key in body:
+                known = {term["id"] for term in self.terms[taxonomy]}
+                missing = [i for i in body[key] if i not in known]
+                if missing:
+                    raise RestError(400, "rest_invalid_param", f"Invalid parameter(s): {key}",
+                                    params={key: f"Invalid term ID {missing[0]}."})
+                fields[key] = list(body[key])
+        if fields["status"] and fields["status"] not in STATUS_LABELS:
+            raise RestError(400, "rest_invalid_param", "Invalid parameter(s): status")
+        return fields
+
+    def rest(self, method: str, route: str, params: Dict[str, str],
+             body: dict) -> Tuple[int, object, Dict[str, str]]:
+        """Handle one authenticated wp/v2 request; returns (status, JSON body, headers)."""
+        if route == "/wp/v2/users/me" and method == "GET":
+            return 200, {"id": 1, "name": self.username, "slug": self.username}, {}
+
+        match = TERM_ROUTE.match(route)
+        if match:
+            taxonomy = TAXONOMIES[match.group(1)]
+            if method == "GET":
+                with self._lock:
+                    terms = list(self.terms[taxonomy])
+                search = params.get("search", "").lower()
+                if search:
+                    terms = [t for t in terms if search in t["name"].lower()]
+                page, total, pages = _paginate(terms, params)
+                return 200, page, {"X-WP-Total": str(total), "X-WP-TotalPages": str(pages)}
+            name = (body.get("name") or "").strip()
+            if not name:
+                raise RestError(400, "rest_missing_callback_param", "Missing parameter(s): name")
+            term, created = self.add_term(taxonomy, name)
+            if not created:
+                raise RestError(400, "term_exists",
+                                "A term with the name provided already exists in this taxonomy.",
+                                term_id=term["id"])
+            return 201, term, {}
+
+        if route == "/wp/v2/media" and method == "GET":
+            items = [{"id": m["id"], "source_url": m["source_url"]} for m in self.newest_media()]
+            page, total, pages = _paginate(items, params)
+            return 200, page, {"X-WP-Total": str(total), "X-WP-TotalPages": str(pages)}
+
+        if route == "/wp/v2/posts":
+            if method == "GET":
+                posts = self.list_posts()
+                if params.get("slug"):
+                    slugs = params["slug"].split(",")
+                    posts = [p for p in posts if p["slug"] in slugs]
+                if params.get("include"):
+                    ids = {int(i) for i in params["include"].split(",")}
+                    posts = [p for p in posts if p["id"] in ids]
+                if params.get("status"):
+                    statuses = params["status"].split(",")
+                    if "any" not in statuses:
+                        posts = [p for p in posts if p["status"] in statuses]
+                page, total, pages = _paginate(posts, params)
+                return 200, [self.rest_post(p) for p in page], {
+                    "X-WP-Total": str(total), "X-WP-TotalPages": str(pages)
+                }
+            post = self.save_post(self._rest_post_fields(body))
+            return 201, self.rest_post(post), {}
+
+        match = POST_ROUTE.match(route)
+        if match:
+            post_id = int(match.group(1))
+            if method == "GET":
+                post = self.get_post(post_id)
+            else:
+                fields = self._rest_post_fields(body)
+                try:
+                    post = self.save_post(fields, post_id)
+                except KeyError:
+                    post = None
+            if post is None:
+                raise RestError(404, "rest_post_invalid_id", "Invalid post ID.")
+            return 200, self.rest_post(post), {}
+
+        raise RestError(404, "rest_no_route", "No route was found matching the URL and request method.")
+
+    def rest_batch(self, body: dict) -> Tuple[int, object, Dict[str, str]]:
+        """Handle /batch/v1 with validation "normal": each request succeeds or fails on its own."""
+        requests = body.get("requests") or []
+        if len(requests) > MAX_BATCH_SIZE:
+            raise RestError(400, "rest_invalid_param", "Invalid parameter(s): requests",
+                            params={"requests": f"requests must contain at most {MAX_BATCH_SIZE} items."})
+        responses = []
+        for request in requests:
+            path = urlsplit(request.get("path", ""))
+            params = {k: v[-1] for k, v in parse_qs(path.query).items()}
+            try:
+                status, payload, headers = self.rest(
+                    request.get("method", "POST").upper(), path.path, params, request.get("body") or {}
+                )
+            except RestError as e:
+                status, payload, headers = e.status, e.body, {}
+            responses.append({"status": status, "body": payload, "headers": headers})
+        return 207, {"responses": responses}, {}
+
+    # Classic editor
+
+    def editor_page(self, post: Optional[dict], message: str = "") -> str:
+        post = post or {"id": 0, "title": "", "content": "", "status": "draft", "date": _now(),
+                        "categories": [], "tags": [], "featured_media": 0}
+        with self._lock:
+            categories = list(self.terms["category"])
+            tag_names = {t["id"]: t["name"] for t in self.terms["post_tag"]}
+        tags = [tag_names[i] for i in post["tags"] if i in tag_names]
+        status = post["status"]
+
+        statuses = ["pending", "draft"]
+        if status not in statuses:
+            statuses.insert(0, status)
+        status_options = "".join(
+            f'<option value="{s}"{" selected" if s == status else ""}>{STATUS_LABELS[s]}</option>'
+            for s in statuses
+        )
+        category_items = "".join(
+            f'<li id="category-{c["id"]}"><label class="selectit">'
+            f'<input value="{c["id"]}" type="checkbox" name="post_category[]" id="in-category-{c["id"]}"'
+            f'{" checked" if c["id"] in post["categories"] else ""}> {html.escape(c["name"])}</label></li>'
+            for c in categories
+        )
+        # The editor shows dates in the site's timezone, here the host's
+        date = datetime.strptime(post["date"], DATE_FORMAT).replace(tzinfo=timezone.utc).astimezone()
+        month_options = "".join(
+            f'<option value="{m:02d}"{" selected" if m == date.month else ""}>{m:02d}</option>'
+            for m in range(1, 13)
+        )
+        if post["featured_media"]:
+            thumbnail_link = '<a href="#" id="remove-post-thumbnail">Remove featured image</a>'
+        else:
+            thumbnail_link = '<a href="#" id="set-post-thumbnail">Set featured image</a>'
+
+        body = EDITOR_BODY.substitute(
+            message=(f'<div id="message" class="updated notice"><p>{html.escape(message)}</p></div>'
+                     if message else ""),
+            post_id=post["id"],
+            prompt_class="screen-reader-text" if post["title"] else "",
+            title=html.escape(post["title"]),
+            content=html.escape(post["content"]),
+            status_label=STATUS_LABELS[status],
+            status_options=status_options,
+            timestamp=date.strftime("%Y-%m-%d %H:%M"),
+            month_options=month_options,
+            day=f"{date.day:02d}",
+            year=date.year,
+            hour=f"{date.hour:02d}",
+            minute=f"{date.minute:02d}",
+            publish_label="Update" if status == "publish" else "Publish",
+            categories=category_items,
+            tags=html.escape(", ".join(tags)),
+            tag_items="".join(f"<span>{html.escape(t)}</span>" for t in tags),
+            thumbnail_link=thumbnail_link,
+            thumbnail_id=post["featured_media"] or -1,
+            script=EDITOR_SCRIPT,
+        )
+        return body
+
+    def save_form(self, form: Dict[str, List[str]]) -> Tuple[dict, str]:
+        """Save a submitted editor form; returns the post and the message number to redirect with."""
+        def first(name: str, default: str = "") -> str:
+            return form.get(name, [default])[0]
+
+        if "publish" in form:
+            status = "publish"
+        else:
+            status = first("post_status", "draft")
+            if status not in STATUS_LABELS:
+                status = "draft"
+        thumbnail_id = int(first("_thumbnail_id", "-1") or -1)
+        fields = {
+            "title": first("post_title"),
+            "content": first("content"),
+            "status": status,
+            "categories": [int(i) for i in form.get("post_category[]", [])],
+            "tags": self.term_ids("post_tag", first("tax_input[post_tag]").split(",")),
+            "featured_media": max(thumbnail_id, 0),
+        }
+        if all(first(name) for name in ("aa", "mm", "jj", "hh", "mn")):
+            local = datetime(*(int(first(name)) for name in ("aa", "mm", "jj", "hh", "mn")))
+            fields["date"] = local.astimezone(timezone.utc).strftime(DATE_FORMAT)
+        post_id = int(first("post_ID", "0") or 0)
+        existed = self.get_post(post_id) is not None
+        post = self.save_post(fields, post_id if existed else None)
+        if post["status"] == "future":
+            return post, "9"
+        if status == "publish":
+            return post, "1" if existed and "publish" not in form else "6"
+        return post, "8" if status == "pending" else "10"
+
+
+class _XmlRpcApi:
+    """The wp.* XML-RPC methods the publishers call."""
+
+    def __init__(self, site: FakeWordPress):
+        self.site = site
+
+    def _auth(self, username: str, password: str):
+        if not self.site.check_password(username, password):
+            raise xmlrpc.client.Fault(403, "Incorrect username or password.")
+
+    def _fields(self, content: dict) -> dict:
+        fields = {
+            "title": content.get("post_title"),
+            "content": content.get("post_content"),
+            "status": content.get("post_status"),
+            "slug": content.get("post_name"),
+            "featured_media": content.get("post_thumbnail"),
+        }
+        date = content.get("post_date_gmt") or content.get("post_date")
+        if date is not None:
+            fields["date"] = _gmt_date(date)
+        if fields["status"] and fields["status"] not in STATUS_LABELS:
+            raise xmlrpc.client.Fault(401, "Invalid post status.")
+        names = content.get("terms_names") or {}
+        terms = content.get("terms") or {}
+        for taxonomy, key in (("category", "categories"), ("post_tag", "tags")):
+            if taxonomy in names or taxonomy in terms:
+                fields[key] = (
+                    [int(i) for i in terms.get(taxonomy, [])]
+                    + self.site.term_ids(taxonomy, names.get(taxonomy, []))
+                )
+        return fields
+
+    def _struct(self, post: dict) -> dict:
+        return {
+            "post_id": str(post["id"]),
+            "post_title": post["title"],
+            "post_content": post["content"],
+            "post_status": post["status"],
+            "post_name": post["slug"],
+            "post_date": post["date"],
+            "post_modified": post["modified"],
+            "terms": self.site.post_terms(post),
+            "post_thumbnail": {"attachment_id": str(post["featured_media"])}
+            if post["featured_media"] else [],
+            "link": f"{self.site.url}/?p={post['id']}",
+        }
+
+    def getUsersBlogs(self, username, password):
+        self._auth(username, password)
+        return [{
+            "isAdmin": True, "blogid": "1", "blogName": "Fake WordPress",
+            "url": f"{self.site.url}/", "xmlrpc": f"{self.site.url}/xmlrpc.php",
+        }]
+
+    def newPost(self, blog_id, username, password, content):
+        self._auth(username, password)
+        if not content.get("post_title") and not content.get("post_content"):
+            raise xmlrpc.client.Fault(500, "Content, title, and excerpt are empty.")
+        return str(self.site.save_post(self._fields(content))["id"])
+
+    def editPost(self, blog_id, username, password, post_id, content):
+        self._auth(username, password)
+        try:
+            self.site.save_post(self._fields(content), int(post_id))
+        except KeyError:
+            raise xmlrpc.client.Fault(404, "Invalid post ID.")
+        return True
+
+    def getPost(self, blog_id, username, password, post_id, fields=None):
+        self._auth(username, password)
+        post = self.site.get_post(int(post_id))
+        if post is None:
+            raise xmlrpc.client.Fault(404, "Invalid post ID.")
+        return self._struct(post)
+
+    def getPosts(self, blog_id, username, password, filter=None, fields=None):
+        self._auth(username, password)
+        filter = filter or {}
+        posts = self.site.list_posts()
+        if filter.get("post_status"):
+            posts = [p for p in posts if p["status"] == filter["post_status"]]
+        offset = int(filter.get("offset", 0))
+        number = int(filter.get("number", 10))
+        return [self._struct(p) for p in posts[offset:offset + number]]
+
+    def getMediaLibrary(self, blog_id, username, password, filter=None):
+        self._auth(username, password)
+        filter = filter or {}
+        offset = int(filter.get("offset", 0))
+        number = int(filter.get("number", 10))
+        return [
+            {"attachment_id": str(m["id"]), "link": m["source_url"], "title": m["filename"]}
+            for m in self.site.newest_media()[offset:offset + number]
+        ]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "FakeWordPress/1.0"
+
+    @property
+    def site(self) -> FakeWordPress:
+        return self.server.site
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes = b"", content_type: str = "text/html; charset=UTF-8",
+              headers: Optional[Dict[str, str]] = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _send_json(self, status: int, payload, headers: Optional[Dict[str, str]] = None):
+        self._send(status, json.dumps(payload).encode("utf-8"),
+                   "application/json; charset=UTF-8", headers)
+
+    def _redirect(self, location: str, headers: Optional[Dict[str, str]] = None):
+        self._send(302, headers={"Location": location, **(headers or {})})
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _session(self) -> Optional[str]:
+        cookie = SimpleCookie(self.headers.get("Cookie", ""))
+        token = cookie[LOGIN_COOKIE].value if LOGIN_COOKIE in cookie else None
+        return token if self.site.nonce_for(token) else None
+
+    def _basic_auth(self) -> Optional[bool]:
+        """True or False for valid or invalid Basic credentials, None if none were sent."""
+        header = self.headers.get("Authorization", "")
+        if not header.startswith("Basic "):
+            return None
+        try:
+            username, _, password = base64.b64decode(header[6:]).decode("utf-8").partition(":")
+        except ValueError:
+            return False
+        return self.site.check_password(username, password)
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def do_GET(self):
+        self._handle()
+
+    def do_POST(self):
+        self._handle()
+
+    def do_PUT(self):
+        self._handle()
+
+    def do_PATCH(self):
+        self._handle()
+
+    def _handle(self):
+        site = self.site
+        site._count("requests")
+        url = urlsplit(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        body = self._read_body()
+        site.delay()
+
+        if self.command != "GET" and site.should_fail():
+            headers = {"Retry-After": str(site.retry_after)} if site.retry_after is not None else {}
+            return self._send_json(site.error_status, {
+                "code": "fake_injected_error", "message": "Injected failure",
+                "data": {"status": site.error_status},
+            }, headers)
+
+        path = url.path.rstrip("/") or "/"
+        try:
+            if path.startswith("/wp-json"):
+                return self._rest(path[len("/wp-json"):], params, body)
+            if path == "/xmlrpc.php" and self.command == "POST":
+                return self._send(200, site.xmlrpc._marshaled_dispatch(body), "text/xml")
+            if path == "/wp-login.php":
+                return self._login(params, body)
+            if path.startswith("/wp-admin"):
+                return self._admin(path, params, body)
+            return self._send(404, b"Not Found", "text/plain")
+        except Exception as e:
+            return self._send(500, f"Internal Server Error: {e}".encode("utf-8"), "text/plain")
+
+    def _rest(self, route: str, params: Dict[str, str], body: bytes):
+        site = self.site
+        authorized = self._basic_auth()
+        if authorized is None:
+            # Cookie authentication only counts with the session's nonce, as in WordPress
+            token = self._session()
+            nonce = self.headers.get("X-WP-Nonce") or params.get("_wpnonce")
+            authorized = token is not None and nonce == site.nonce_for(token)
+        if not authorized:
+            return self._send_json(401, {
+                "code": "rest_not_logged_in", "message": "You are not currently logged in.",
+                "data": {"status": 401},
+            })
+        try:
+            payload = json.loads(body) if body else {}
+            if route == "/batch/v1" and self.command == "POST":
+                status, result, headers = site.rest_batch(payload)
+            else:
+                status, result, headers = site.rest(self.command, route, params, payload)
+        except ValueError:
+            status, result, headers = 400, {
+                "code": "rest_invalid_json", "message": "Invalid JSON body passed.",
+                "data": {"status": 400},
+            }, {}
+        except RestError as e:
+            status, result, headers = e.status, e.body, {}
+        self._send_json(status, result, headers)
+
+    def _login(self, params: Dict[str, str], body: bytes):
+        redirect_to = params.get("redirect_to", "/wp-admin/")
+        error = ""
+        if self.command == "POST":
+            form = {k: v[-1] for k, v in parse_qs(body.decode("utf-8")).items()}
+            if self.site.check_password(form.get("log", ""), form.get("pwd", "")):
+                token = self.site.login()
+                return self._redirect(form.get("redirect_to") or "/wp-admin/", {
+                    "Set-Cookie": f"{LOGIN_COOKIE}={token}; Path=/; HttpOnly"
+                })
+            redirect_to = form.get("redirect_to") or redirect_to
+            error = '<div id="login_error"><strong>Error:</strong> Incorrect username or password.</div>'
+        page = LOGIN_PAGE.substitute(error=error, redirect_to=html.escape(redirect_to))
+        self._send(200, page.encode("utf-8"))
+
+    def _admin(self, path: str, params: Dict[str, str], body: bytes):
+        site = self.site
+        token = self._session()
+        if token is None:
+            return self._redirect(f"/wp-login.php?redirect_to={quote(self.path, safe='')}")
+
+        if path == "/wp-admin/admin-ajax.php":
+            form = {k: v[-1] for k, v in parse_qs(body.decode("utf-8")).items()}
+            if form.get("action") != "query-attachments":
+                return self._send(400, b"0", "text/plain")
+            items = [
+                {"id": m["id"], "filename": m["filename"], "url": m["source_url"], "type": "image"}
+                for m in site.newest_media()
+            ]
+            return self._send_json(200, {"success": True, "data": items})
+
+        if path == "/wp-admin/post.php" and self.command == "POST":
+            post, message = site.save_form(parse_qs(body.decode("utf-8"), keep_blank_values=True))
+            return self._redirect(f"/wp-admin/post.php?post={post['id']}&action=edit&message={message}")
+
+        if path == "/wp-admin/post-new.php":
+            title, content = "Add New Post", site.editor_page(None)
+        elif path == "/wp-admin/post.php":
+            post = site.get_post(int(params.get("post", 0) or 0))
+            if post is None:
+                return self._send(404, b"Invalid post ID.", "text/plain")
+            title = "Edit Post"
+            content = site.editor_page(post, EDIT_MESSAGES.get(params.get("message", ""), ""))
+        elif path == "/wp-admin":
+            title, content = "Dashboard", "<h1>Dashboard</h1>"
+        else:
+            return self._send(404, b"Not Found", "text/plain")
+
+        page = ADMIN_PAGE.substitute(
+            title=title, nonce=site.nonce_for(token), jquery=JQUERY_SHIM, body=content
+        )
+        self._send(200, page.encode("utf-8"))
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Local stand-in WordPress site")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="password")
+    parser.add_argument("--app-password", default="")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="Seconds added to every request")
+    parser.add_argument("--jitter", type=float, default=0.0,
+                        help="Up to this many extra seconds per request, at random")
+    parser.add_argument("--write-latency", type=float, default=0.0,
+                        help="Seconds spent saving each post")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Fraction of POST requests that fail with --error-status")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--retry-after", type=int, default=None,
+                        help="Retry-After seconds sent with injected errors")
+    parser.add_argument("--seed", type=int, default=None)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    site = FakeWordPress(
+        args.host, args.port, args.username, args.password, args.app_password,
+        latency=args.latency, jitter=args.jitter, write_latency=args.write_latency,
+        error_rate=args.error_rate, error_status=args.error_status,
+        retry_after=args.retry_after, seed=args.seed
+    )
+    print(f"Fake WordPress at {site.url} (user {args.username}, password {args.password})")
+    print(f"export WP_URL={site.url} WP_USER={args.username} WP_PASS={args.password}")
+    try:
+        site.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        site.httpd.server_close()
+        print(f"Stopped: {site.stats()}")
+
+
+if __name__ == "__main__":
+    main()
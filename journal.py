@@ -0,0 +1,172 @@
+"""
+Write-ahead run journal for WordPress automation.
+Appends every per-file state change to a JSON lines file so an interrupted run can be resumed.
+"""
+import os
+import json
+import time
+import logging
+import threading
+from typing import Dict, Optional, Set
+
+from config import PostConfig
+from publishers import Publisher
+
+# Per-file states, in the order a file goes through them
+CLAIMED = "claimed"
+PARSED = "parsed"
+SUBMITTED = "submitted"
+VERIFIED = "verified"
+MOVED = "moved"
+
+RUN_START = "run_start"
+RUN_END = "run_end"
+
+
+class RunJournal:
+    """Append-only record of file state transitions, fsynced in batches."""
+
+    def __init__(self, path: str, resume: bool = False, sync_every: int = 32):
+        """
+        Args:
+            path: JSON lines journal file
+            resume: Continue the previous run instead of starting a new journal
+            sync_every: Number of records written between fsyncs
+        """
+        self.path = path
+        self.sync_every = sync_every
+        # Last record of each file in the run being resumed, removed once used
+        self.previous: Dict[str, dict] = {}
+        # Files the resumed run sent without seeing WordPress's reply
+        self._unconfirmed: Set[str] = set()
+        self._unsynced = 0
+        self._lock = threading.Lock()
+
+        interrupted = self._read_previous()
+        if resume:
+            logging.info("Resuming run journal %s (%s files recorded)", path, len(self.previous))
+        else:
+            if interrupted:
+                logging.warning(
+                    "The previous run did not finish; starting over. Use --resume to continue it"
+                )
+            self.previous = {}
+
+        self._file = open(path, 'a' if resume else 'w', encoding='utf-8')
+        self._write({"state": RUN_START})
+        self.sync()
+
+    def _read_previous(self) -> bool:
+        """Load the last record per file from the journal; returns True if its run was interrupted."""
+        finished = True
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # A torn final line from a crash mid-write
+                        continue
+                    state = record.get("state")
+                    if state == RUN_START:
+                        finished = False
+                    elif state == RUN_END:
+                        finished = True
+                    elif record.get("file"):
+                        self.previous[record["file"]] = record
+        except FileNotFoundError:
+            return False
+        return not finished
+
+    def _write(self, record: dict):
+        record["ts"] = time.time()
+        self._file.write(json.dumps(record) + "\n")
+        self._unsynced += 1
+
+    def record(self, file_path: str, state: str, **details):
+        """Append a state change for a file; fsyncs once sync_every records are pending."""
+        with self._lock:
+            self._write({"file": os.path.basename(file_path), "state": state, **details})
+            if self._unsynced >= self.sync_every:
+                self._sync()
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def sync(self):
+        """Make every record written so far durable."""
+        with self._lock:
+            if self._unsynced:
+                self._sync()
+
+    def verified_result(self, file_path: str) -> Optional[bool]:
+        """
+        Result of a file the resumed run already published but did not move.
+
+        Returns None if the file still has to be processed. The resumed run's
+        record is used up, so a later file with the same name is processed as new.
+        """
+        filename = os.path.basename(file_path)
+        with self._lock:
+            record = self.previous.pop(filename, None)
+            if record and record["state"] == SUBMITTED:
+                self._unconfirmed.add(filename)
+        if record and record["state"] == VERIFIED:
+            return bool(record.get("ok"))
+        return None
+
+    def unconfirmed(self, file_path: str) -> bool:
+        """
+        Whether the resumed run sent this file's post but stopped before the reply,
+        so the post may exist already. Call after verified_result; answers once.
+        """
+        filename = os.path.basename(file_path)
+        with self._lock:
+            if filename in self._unconfirmed:
+                self._unconfirmed.discard(filename)
+                return True
+        return False
+
+    def close(self, finished: bool = True):
+        """
+        Flush the journal.
+
+        Args:
+            finished: Mark the run as complete; an interrupted run is left open for --resume
+        """
+        with self._lock:
+            if finished:
+                self._write({"state": RUN_END})
+            self._sync()
+            self._file.close()
+
+
+def safe_to_resend(publisher: Publisher, post_config: PostConfig) -> bool:
+    """
+    Prepare a post an interrupted run may already have created for sending again.
+
+    Looks the post up by slug: if it exists, post_config is pointed at it so it
+    is updated rather than created twice. Returns False when that can't be
+    checked (no slug, or a backend that can't read posts), so the caller can
+    set the file aside for review instead.
+    """
+    if not (publisher.can_update and post_config.slug):
+        logging.error(
+            "%s may have been published by the interrupted run and can't be looked up by slug; "
+            "check the site before moving it back to the input directory", post_config.title
+        )
+        return False
+    try:
+        existing = publisher.find_post(post_config.slug)
+    except Exception as e:
+        logging.error("Could not check whether %s was already published: %s", post_config.title, e)
+        return False
+    if existing is not None:
+        logging.info(
+            "The interrupted run already created post %s for %s; updating it",
+            existing.post_id, post_config.title
+        )
+        post_config.post_id = existing.post_id
+    return True
@@ -0,0 +1,135 @@
+"""
+Publish ledger for WordPress automation.
+Records which posts were already published so reruns skip or update them instead of duplicating them.
+"""
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import Optional
+
+from config import PostConfig, WordPressConfig
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS published (
+    site TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    slug TEXT,
+    post_id INTEGER,
+    status TEXT,
+    published_at REAL NOT NULL,
+    PRIMARY KEY (site, content_hash)
+);
+CREATE INDEX IF NOT EXISTS published_slug ON published (site, slug);
+"""
+
+# Newest match first: an exact content match, otherwise the latest post with the same slug
+LOOKUP_QUERY = """
+SELECT content_hash, slug, post_id, status FROM published
+WHERE site = ? AND (content_hash = ? OR (slug IS NOT NULL AND slug = ?))
+ORDER BY content_hash = ? DESC, published_at DESC
+LIMIT 1
+"""
+
+
+def post_hash(post_config: PostConfig) -> str:
+    """SHA-256 of everything that ends up in the post, ignoring the target post ID."""
+    fields = asdict(post_config)
+    fields.pop("post_id", None)
+    if post_config.publish_date is not None:
+        fields["publish_date"] = post_config.publish_date.isoformat()
+    return hashlib.sha256(json.dumps(fields, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+@dataclass
+class LedgerEntry:
+    """A post published by an earlier run."""
+    content_hash: str
+    slug: Optional[str]
+    post_id: Optional[int]
+    status: Optional[str]
+
+
+class PublishLedger:
+    """SQLite table of published posts per site, looked up by content hash or slug."""
+
+    def __init__(self, path: str, site: str):
+        """
+        Args:
+            path: SQLite database file
+            site: Site URL, so one ledger can serve several sites
+        """
+        self.path = path
+        self.site = site.rstrip('/')
+        # Shared by parallel workers; the lock serializes use of the connection
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def find(self, content_hash: str, slug: Optional[str]) -> Optional[LedgerEntry]:
+        """Return the entry with this content hash, or else the latest one with this slug."""
+        with self._lock:
+            row = self._conn.execute(
+                LOOKUP_QUERY, (self.site, content_hash, slug, content_hash)
+            ).fetchone()
+        return LedgerEntry(*row) if row else None
+
+    def record(self, content_hash: str, slug: Optional[str],
+               post_id: Optional[int], status: Optional[str]):
+        """Remember a post that was just published or updated."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO published VALUES (?, ?, ?, ?, ?, ?)",
+                (self.site, content_hash, slug, post_id, status, time.time())
+            )
+
+    def prepare(self, post_config: PostConfig) -> bool:
+        """
+        Check a parsed post against the ledger before publishing it.
+
+        Returns True if the same content was already published, so the post
+        should be skipped. If only its slug was published before, the post
+        is pointed at that post ID so the backend updates it instead.
+        """
+        content_hash = post_hash(post_config)
+        entry = self.find(content_hash, post_config.slug)
+        if entry is None:
+            return False
+        if entry.content_hash == content_hash:
+            logging.info(
+                "Skipping %s: already published (ID %s)", post_config.title, entry.post_id
+            )
+            return True
+        if entry.post_id is not None:
+            logging.info("Updating post %s published with slug %s", entry.post_id, entry.slug)
+            post_config.post_id = entry.post_id
+        return False
+
+    def record_result(self, post_config: PostConfig, result):
+        """Record a successful PublishResult for a post."""
+        if result:
+            self.record(
+                post_hash(post_config), post_config.slug,
+                result.post_id or post_config.post_id, result.status
+            )
+
+
+@lru_cache(maxsize=None)
+def _open_ledger(path: str, site: str) -> PublishLedger:
+    return PublishLedger(path, site)
+
+
+def open_ledger(config: WordPressConfig) -> Optional[PublishLedger]:
+    """Get the configured ledger for the site, or None if it is disabled."""
+    if not config.ledger_path:
+        return None
+    try:
+        return _open_ledger(config.ledger_path, config.url.rstrip('/'))
+    except sqlite3.Error as e:
+        logging.warning("Publish ledger disabled: %s", e)
+        return None
@@ -0,0 +1,151 @@
+"""
+Logging for WordPress automation.
+Log calls only put records on a queue; a background listener writes them to the
+console and to a rotating JSON lines file, tagged with the post they concern.
+"""
+import os
+import json
+import time
+import uuid
+import queue
+import atexit
+import hashlib
+import logging
+import contextvars
+import logging.handlers
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from config import WordPressConfig
+
+CONSOLE_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Distinguishes this run's correlation IDs from earlier runs' in the same log
+RUN_ID = uuid.uuid4().hex[:8]
+
+_context: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar("log_context", default=None)
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def correlation_id(file_path: str) -> str:
+    """The ID of a post file for this run; the same wherever in the run it is computed."""
+    digest = hashlib.sha1(os.path.abspath(file_path).encode('utf-8')).hexdigest()[:8]
+    return f"{RUN_ID}-{digest}"
+
+
+@contextmanager
+def log_context(file_path: str) -> Iterator[str]:
+    """
+    Tag records logged inside the block with the post file's correlation ID.
+
+    The tag follows the current thread or asyncio task; run work handed to an
+    executor in contextvars.copy_context() to keep it.
+    """
+    cid = correlation_id(file_path)
+    token = _context.set({"correlation_id": cid, "post_file": os.path.basename(file_path)})
+    try:
+        yield cid
+    finally:
+        _context.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Copies the logging thread's post context onto each record before it is queued."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        context = _context.get()
+        record.correlation_id = context["correlation_id"] if context else None
+        record.post_file = context["post_file"] if context else None
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": record.created,
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName,
+        }
+        if getattr(record, "correlation_id", None):
+            entry["correlation_id"] = record.correlation_id
+            entry["post_file"] = record.post_file
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class RotatingJsonFileHandler(logging.handlers.RotatingFileHandler):
+    """Rotates when the file reaches max_bytes or every rotate_interval seconds, whichever is first."""
+
+    def __init__(self, filename: str, max_bytes: int, backup_count: int, rotate_interval: float):
+        super().__init__(
+            filename, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8', delay=True
+        )
+        self.rotate_interval = rotate_interval
+        self.rollover_at = self._next_rollover()
+        self.setFormatter(JsonFormatter())
+
+    def _next_rollover(self) -> float:
+        return time.time() + self.rotate_interval if self.rotate_interval > 0 else float("inf")
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if time.time() >= self.rollover_at:
+            if os.path.exists(self.baseFilename) and os.path.getsize(self.baseFilename) > 0:
+                return True
+            # Nothing to rotate away yet
+            self.rollover_at = self._next_rollover()
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        super().doRollover()
+        self.rollover_at = self._next_rollover()
+
+
+def configure_logging(config: WordPressConfig) -> None:
+    """
+    Route all logging through a queue to the console and the configured log file.
+
+    Called once at startup; later calls are ignored, so the first configuration wins.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    console = logging.StreamHandler()
+    console.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+    handlers = [console]
+    if config.log_file:
+        handlers.append(RotatingJsonFileHandler(
+            config.log_file, config.log_max_bytes, config.log_backup_count,
+            config.log_rotate_interval
+        ))
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(config.log_level.upper())
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Write out the queued records and close the handlers."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
@@ -4,71 +4,491 @@ Main script for WordPress post automation.
 import os
 import sys
 import time
+import signal
+import argparse
 import logging
+import threading
 from typing import Optional
-from selenium.common.exceptions import WebDriverException
 
 from config import WordPressConfig, PostConfig, load_config
 from parser import PostParser
-from wordpress_actions import WordPressAutomator
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('wordpress_automation.log'),
-        logging.StreamHandler()
+from parse_cache import open_parse_cache
+from pipeline import parse_files
+from ledger import open_ledger
+from journal import RunJournal, CLAIMED, PARSED, SUBMITTED, VERIFIED, MOVED, safe_to_resend
+from publishers import Publisher, PUBLISHERS, create_publisher
+from worker_pool import WorkerPool, merge_stats
+from async_pipeline import run_async
+from updater import run_update
+from watcher import DirectoryWatcher
+from scheduler import Scheduler
+from metrics import count_post, stage, start_metrics
+from logging_setup import configure_logging, log_context
+from concurrency import create_limiter
+import resilience
+
+def _route_file(file_path: str, success: bool,
+                processed_dir: str, failed_dir: str):
+    """Move a source file to the processed or failed directory."""
+    filename = os.path.basename(file_path)
+    target_dir = processed_dir if success else failed_dir
+    with stage("move"):
+        os.rename(file_path, os.path.join(target_dir, filename))
+
+def _record(journal: Optional[RunJournal], file_path: str, state: str, **details):
+    """Append a state change to the run journal, if there is one."""
+    if journal:
+        journal.record(file_path, state, **details)
+
+def _publish_pending(publisher: Publisher, pending: list,
+                     processed_dir: str, failed_dir: str,
+                     journal: Optional[RunJournal] = None) -> tuple[int, int]:
+    """Publish a group of parsed posts and route each source file by its own result."""
+    success_count = 0
+    failure_count = 0
+    
+    if journal:
+        for file_path, _ in pending:
+            journal.record(file_path, SUBMITTED)
+        # Durable before the request goes out, so a resume knows it may have been sent
+        journal.sync()
+    
+    try:
+        post_configs = [post_config for _, post_config in pending]
+        if publisher.limiter:
+            results = publisher.limiter.run(publisher.publish_batch, post_configs)
+        else:
+            results = publisher.publish_batch(post_configs)
+    except Exception as e:
+        logging.error("Error publishing batch: %s", e)
+        results = [False] * len(pending)
+    
+    for (file_path, _), result in zip(pending, results):
+        _record(journal, file_path, VERIFIED, ok=bool(result),
+                post_id=getattr(result, "post_id", None))
+    
+    # Record before moving files, so a failed move can't lead to a duplicate post
+    ledger = open_ledger(publisher.config)
+    if ledger:
+        for (file_path, post_config), result in zip(pending, results):
+            with log_context(file_path):
+                try:
+                    ledger.record_result(post_config, result)
+                except Exception as e:
+                    logging.error("Error recording %s in the ledger: %s", post_config.title, e)
+    
+    for (file_path, _), result in zip(pending, results):
+        with log_context(file_path):
+            filename = os.path.basename(file_path)
+            try:
+                _route_file(file_path, bool(result), processed_dir, failed_dir)
+                _record(journal, file_path, MOVED, ok=bool(result))
+            except Exception as e:
+                logging.error("Error moving %s: %s", filename, e)
+            if result:
+                success_count += 1
+                count_post("published")
+                logging.info("Successfully processed %s", filename)
+            else:
+                failure_count += 1
+                count_post("failed")
+                logging.error("Failed to create post from %s", filename)
+    
+    return success_count, failure_count
+
+def _skip_published(publisher: Publisher, file_path: str, post_config: PostConfig,
+                    processed_dir: str, failed_dir: str,
+                    journal: Optional[RunJournal] = None) -> bool:
+    """Route a file to processed without publishing if the ledger shows it was published."""
+    ledger = open_ledger(publisher.config)
+    if not ledger or not ledger.prepare(post_config):
+        return False
+    _record(journal, file_path, VERIFIED, ok=True, skipped=True)
+    count_post("skipped")
+    try:
+        _route_file(file_path, True, processed_dir, failed_dir)
+        _record(journal, file_path, MOVED, ok=True)
+    except Exception as e:
+        logging.error("Error moving %s: %s", os.path.basename(file_path), e)
+    return True
+
+def _hold_unconfirmed(publisher: Publisher, file_path: str, post_config: PostConfig,
+                      processed_dir: str, failed_dir: str,
+                      journal: Optional[RunJournal] = None) -> bool:
+    """
+    Route a file to failed if the interrupted run may have published it and that can't be ruled out.
+    
+    Returns True if the file was set aside.
+    """
+    if not journal or not journal.unconfirmed(file_path):
+        return False
+    if safe_to_resend(publisher, post_config):
+        return False
+    count_post("failed")
+    try:
+        _route_file(file_path, False, processed_dir, failed_dir)
+        _record(journal, file_path, MOVED, ok=False)
+    except Exception as e:
+        logging.error("Error moving %s: %s", os.path.basename(file_path), e)
+    return True
+
+def _resume_file(journal: Optional[RunJournal], file_path: str,
+                 processed_dir: str, failed_dir: str) -> Optional[bool]:
+    """
+    Finish a file the interrupted run already published but did not move.
+    
+    Returns its recorded result, or None if the file still has to be processed.
+    """
+    if journal is None:
+        return None
+    result = journal.verified_result(file_path)
+    if result is None:
+        return None
+    
+    filename = os.path.basename(file_path)
+    logging.info("Resuming %s: already %s", filename, 'published' if result else 'failed')
+    try:
+        _route_file(file_path, result, processed_dir, failed_dir)
+        journal.record(file_path, MOVED, ok=result)
+    except Exception as e:
+        logging.error("Error moving %s: %s", filename, e)
+    return result
+
+def process_file(publisher: Publisher, file_path: str,
+                 processed_dir: str = 'processed',
+                 failed_dir: str = 'failed',
+                 journal: Optional[RunJournal] = None) -> bool:
+    """Parse and publish a single file, then route it by the result."""
+    with log_context(file_path):
+        filename = os.path.basename(file_path)
+        logging.info("Processing %s", filename)
+    
+        resumed = _resume_file(journal, file_path, processed_dir, failed_dir)
+        if resumed is not None:
+            return resumed
+        _record(journal, file_path, CLAIMED)
+    
+        try:
+            parser = PostParser(file_path, cache=open_parse_cache(publisher.config))
+            post_config = parser.parse_file()
+        except Exception as e:
+            logging.error("Error processing %s: %s", filename, e)
+            count_post("failed")
+            try:
+                _route_file(file_path, False, processed_dir, failed_dir)
+                _record(journal, file_path, MOVED, ok=False)
+            except Exception as e:
+                logging.error("Error moving %s: %s", filename, e)
+            return False
+        _record(journal, file_path, PARSED)
+    
+        if _skip_published(publisher, file_path, post_config, processed_dir, failed_dir, journal):
+            return True
+        if _hold_unconfirmed(publisher, file_path, post_config, processed_dir, failed_dir, journal):
+            return False
+    
+        succeeded, _ = _publish_pending(
+            publisher, [(file_path, post_config)], processed_dir, failed_dir, journal
+        )
+        return succeeded == 1
+
+def list_input_files(input_dir: str) -> list[str]:
+    """List the .txt files waiting in the input directory."""
+    return [
+        os.path.join(input_dir, f) for f in os.listdir(input_dir) if f.endswith('.txt')
     ]
-)
 
-def process_files(automator: WordPressAutomator, input_dir: str) -> tuple[int, int]:
+def process_files_parallel(config: WordPressConfig, workers: int,
+                           journal: Optional[RunJournal] = None) -> tuple[int, int]:
+    """Process the input directory with a pool of publishers."""
+    files = list_input_files(config.input_dir)
+    if not files:
+        logging.info("No .txt files found to process")
+        return 0, 0
+    
+    logging.info("Found %s files to process with %s workers", len(files), workers)
+    
+    def handler(publisher: Publisher, file_paths: list[str]) -> tuple[int, int]:
+        if len(file_paths) == 1:
+            succeeded = process_file(
+                publisher, file_paths[0], config.processed_dir, config.failed_dir, journal
+            )
+            return (1, 0) if succeeded else (0, 1)
+        # Batch backends get batch_size files, sent together as one request
+        return process_paths(
+            publisher, file_paths, config.processed_dir, config.failed_dir, journal
+        )
+    
+    limiter = create_limiter(config, workers)
+    stats = WorkerPool(config, workers, handler, limiter).run(files)
+    for s in stats:
+        logging.info(
+            "Worker %s: %s successful, %s failed%s", s.worker_id, s.success_count,
+            s.failure_count, "" if s.logged_in else " (login failed)"
+        )
+    if limiter:
+        limiter.log_summary()
+    return merge_stats(stats)
+
+def process_files(publisher: Publisher, input_dir: str,
+                  processed_dir: str = 'processed',
+                  failed_dir: str = 'failed',
+                  journal: Optional[RunJournal] = None) -> tuple[int, int]:
     """Process all .txt files in the input directory."""
+    try:
+        files = list_input_files(input_dir)
+    except Exception as e:
+        logging.error("Error during batch processing: %s", e)
+        return 0, 0
+    
+    if not files:
+        logging.info("No .txt files found to process")
+        return 0, 0
+        
+    logging.info("Found %s files to process", len(files))
+    publisher.prepare_terms(files)
+    return process_paths(publisher, files, processed_dir, failed_dir, journal)
+
+def process_paths(publisher: Publisher, files: list[str],
+                  processed_dir: str = 'processed',
+                  failed_dir: str = 'failed',
+                  journal: Optional[RunJournal] = None) -> tuple[int, int]:
+    """
+    Parse the given files and publish them in groups of publisher.batch_size.
+    
+    Files are parsed by a process pool (see pipeline.parse_files) while earlier
+    batches are being published.
+    """
     success_count = 0
     failure_count = 0
     
     try:
-        files = [f for f in os.listdir(input_dir) if f.endswith('.txt')]
+        to_parse = []
+        for file_path in files:
+            with log_context(file_path):
+                resumed = _resume_file(journal, file_path, processed_dir, failed_dir)
+            if resumed is None:
+                _record(journal, file_path, CLAIMED)
+                to_parse.append(file_path)
+            elif resumed:
+                success_count += 1
+            else:
+                failure_count += 1
         
-        if not files:
-            logging.info("No .txt files found to process")
-            return success_count, failure_count
-            
-        logging.info(f"Found {len(files)} files to process")
+        # Parsed posts waiting to be sent in the next batch
+        pending = []
+        parsed_files = parse_files(
+            to_parse, publisher.config.parse_workers, open_parse_cache(publisher.config)
+        )
         
-        for filename in files:
-            file_path = os.path.join(input_dir, filename)
-            logging.info(f"Processing {filename}")
+        for parsed in parsed_files:
+            if parsed is None:
+                # The parser is busy with slow files; don't hold back a partial batch
+                if pending:
+                    succeeded, failed = _publish_pending(
+                        publisher, pending, processed_dir, failed_dir, journal
+                    )
+                    success_count += succeeded
+                    failure_count += failed
+                    pending = []
+                continue
             
-            try:
-                # Parse the file
-                parser = PostParser(file_path)
-                post_config = parser.parse_file()
-                
-                # Create the post
-                if automator.create_post(post_config):
+            file_path, post_config, error = parsed
+            with log_context(file_path):
+                filename = os.path.basename(file_path)
+                logging.info("Processing %s", filename)
+            
+                if error is not None:
+                    logging.error("Error processing %s: %s", filename, error)
+                    count_post("failed")
+                    try:
+                        _route_file(file_path, False, processed_dir, failed_dir)
+                        _record(journal, file_path, MOVED, ok=False)
+                    except Exception as e:
+                        logging.error("Error moving %s: %s", filename, e)
+                    failure_count += 1
+                    continue
+                _record(journal, file_path, PARSED)
+            
+                if _skip_published(publisher, file_path, post_config,
+                                   processed_dir, failed_dir, journal):
                     success_count += 1
-                    processed_path = os.path.join('processed', filename)
-                    os.rename(file_path, processed_path)
-                    logging.info(f"Successfully processed {filename}")
-                else:
+                    continue
+                if _hold_unconfirmed(publisher, file_path, post_config,
+                                     processed_dir, failed_dir, journal):
                     failure_count += 1
-                    failed_path = os.path.join('failed', filename)
-                    os.rename(file_path, failed_path)
-                    logging.error(f"Failed to create post from {filename}")
-                
-            except Exception as e:
-                logging.error(f"Error processing {filename}: {str(e)}")
-                failed_path = os.path.join('failed', filename)
-                os.rename(file_path, failed_path)
-                failure_count += 1
+                    continue
+                pending.append((file_path, post_config))
+            
+            # Create the posts once a full batch is ready
+            if len(pending) >= publisher.batch_size:
+                succeeded, failed = _publish_pending(
+                    publisher, pending, processed_dir, failed_dir, journal
+                )
+                success_count += succeeded
+                failure_count += failed
+                pending = []
+        
+        if pending:
+            succeeded, failed = _publish_pending(
+                publisher, pending, processed_dir, failed_dir, journal
+            )
+            success_count += succeeded
+            failure_count += failed
                 
     except Exception as e:
-        logging.error(f"Error during batch processing: {str(e)}")
+        logging.error("Error during batch processing: %s", e)
         
     return success_count, failure_count
 
-def main():
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="WordPress post automation")
+    parser.add_argument(
+        "--backend", choices=sorted(PUBLISHERS),
+        help="Publishing backend (defaults to WP_BACKEND or selenium)"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="Number of parallel publishers, each with its own login (default: 1)"
+    )
+    parser.add_argument(
+        "--concurrency", type=int,
+        help="Publish with the asyncio pipeline, keeping N requests in flight (API backends only)"
+    )
+    parser.add_argument(
+        "--watch", action="store_true",
+        help="Keep running and publish new files as they appear in the input directory"
+    )
+    parser.add_argument(
+        "--update", action="store_true",
+        help="Update the existing posts of the input files, matched by ledger or slug, "
+             "sending only the fields that changed (API backends only)"
+    )
+    parser.add_argument(
+        "--resume", action="store_true",
+        help="Continue an interrupted run from its journal instead of starting a new one"
+    )
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.concurrency is not None and args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    if args.update and (args.watch or args.concurrency or args.workers > 1):
+        parser.error(
+            "--update runs a single publisher and can't be combined with --watch, --workers or --concurrency"
+        )
+    if args.watch and (args.concurrency or args.workers > 1):
+        parser.error(
+            "--watch runs a single publisher and can't be combined with --workers or --concurrency"
+        )
+    return args
+
+def log_summary(success_count: int, failure_count: int):
+    """Log the final processing summary."""
+    total = success_count + failure_count
+    logging.info("\nProcessing Summary:")
+    logging.info("Total files processed: %s", total)
+    logging.info("Successful: %s", success_count)
+    logging.info("Failed: %s", failure_count)
+    resilience.log_summary()
+    
+    if failure_count > 0:
+        logging.warning(
+            "Some files failed processing. "
+            "Check the 'failed' directory and logs for details."
+        )
+
+def run_single(config: WordPressConfig,
+               journal: Optional[RunJournal] = None) -> Optional[tuple[int, int]]:
+    """Process the input directory with one publisher. Returns None if login fails."""
+    publisher = create_publisher(config)
+    
+    try:
+        # Connect and login
+        if not publisher.setup():
+            logging.error("Failed to login to WordPress")
+            return None
+            
+        # Process files
+        logging.info("Starting file processing with %s backend...", publisher.name)
+        success_count, failure_count = process_files(
+            publisher, config.input_dir, config.processed_dir, config.failed_dir, journal
+        )
+        log_summary(success_count, failure_count)
+        return success_count, failure_count
+        
+    finally:
+        # Keep browser open for debugging, unless nobody is there to look at it
+        if config.backend == "selenium" and not config.headless and sys.stdin.isatty():
+            input("Press Enter to close the browser...")
+        publisher.cleanup()
+
+def run_watch(config: WordPressConfig,
+              journal: Optional[RunJournal] = None) -> Optional[tuple[int, int]]:
+    """
+    Keep one publisher logged in and publish files as they land in the input directory.
+    
+    Runs until SIGTERM or SIGINT, then finishes the files already picked up.
+    Returns None if login fails.
+    """
+    stop = threading.Event()
+    
+    def request_stop(signum, frame):
+        logging.info("Received signal %s, finishing current files before exiting", signum)
+        stop.set()
+    
+    previous_handlers = {
+        signum: signal.signal(signum, request_stop) for signum in (signal.SIGTERM, signal.SIGINT)
+    }
+    publisher = create_publisher(config)
+    watcher = DirectoryWatcher(
+        config.input_dir, debounce=config.watch_debounce, poll_interval=config.watch_poll_interval
+    )
+    schedule = Scheduler(config.schedule_path)
+    success_count = 0
+    failure_count = 0
+    
+    try:
+        if not publisher.setup():
+            logging.error("Failed to login to WordPress")
+            return None
+        
+        logging.info("Watching %s for new posts (%s)", config.input_dir, watcher.mode)
+        while not stop.is_set():
+            timeout = 60.0
+            next_release = schedule.next_release()
+            if next_release is not None:
+                timeout = min(timeout, max(next_release - time.time(), 0.0))
+            files = watcher.wait(timeout=timeout, stop=stop)
+            files = schedule.hold_future(files, config.schedule_lead_time, time.time())
+            files += schedule.pop_due(time.time())
+            if not files:
+                continue
+            
+            logging.info("Found %s new files to process", len(files))
+            publisher.prepare_terms(files)
+            succeeded, failed = process_paths(
+                publisher, files, config.processed_dir, config.failed_dir, journal
+            )
+            success_count += succeeded
+            failure_count += failed
+            if journal:
+                # Idle periods can be long; don't leave this batch's records unsynced
+                journal.sync()
+        
+        log_summary(success_count, failure_count)
+        return success_count, failure_count
+    
+    finally:
+        watcher.close()
+        schedule.close()
+        publisher.cleanup()
+        for signum, handler in previous_handlers.items():
+            signal.signal(signum, handler)
+
+def main(argv=None):
+    args = parse_args(argv)
     try:
         # Print GitHub username and repo URL
         print("Developed by: Neeraj Sihag")
@@ -76,57 +496,68 @@ def main():
         
         # Load configuration
         config = load_config()
+        if args.backend:
+            config.backend = args.backend
+        configure_logging(config)
+        logging.info("Starting WordPress automation")
         
         # Create necessary directories
         config.create_directories()
         
-        # Initialize automator
-        automator = WordPressAutomator(config)
+        journal = None
+        if config.journal_path:
+            journal = RunJournal(config.journal_path, resume=args.resume)
+        elif args.resume:
+            logging.warning("--resume has no effect because the run journal is disabled")
+        metrics_exporter = start_metrics(config)
+        finished = False
         
         try:
-            # Setup browser and login
-            logging.info("Setting up browser...")
-            automator.setup_browser()
-            
-            logging.info("Logging into WordPress...")
-            if not automator.login():
-                logging.error("Failed to login to WordPress")
-                return 1
-                
-            # Process files
-            logging.info("Starting file processing...")
-            success_count, failure_count = process_files(automator, config.input_dir)
-            
-            # Log summary
-            total = success_count + failure_count
-            logging.info("\nProcessing Summary:")
-            logging.info(f"Total files processed: {total}")
-            logging.info(f"Successful: {success_count}")
-            logging.info(f"Failed: {failure_count}")
-            
-            if failure_count > 0:
-                logging.warning(
-                    "Some files failed processing. "
-                    "Check the 'failed' directory and logs for details."
+            if args.update:
+                counts = run_update(config)
+                if counts is None:
+                    return 1
+                success_count, failure_count = counts
+                log_summary(success_count, failure_count)
+            elif args.watch:
+                counts = run_watch(config, journal)
+                if counts is None:
+                    return 1
+                success_count, failure_count = counts
+            elif args.concurrency:
+                counts = run_async(config, args.concurrency, journal)
+                if counts is None:
+                    return 1
+                success_count, failure_count = counts
+                log_summary(success_count, failure_count)
+            elif args.workers > 1:
+                success_count, failure_count = process_files_parallel(
+                    config, args.workers, journal
                 )
-                
-            return 0 if failure_count == 0 else 1
-            
+                log_summary(success_count, failure_count)
+            else:
+                counts = run_single(config, journal)
+                if counts is None:
+                    return 1
+                success_count, failure_count = counts
+            finished = True
         finally:
-            # Keep browser open for debugging
-            input("Press Enter to close the browser...")
-            automator.cleanup()
+            if journal:
+                journal.close(finished)
+            if metrics_exporter:
+                metrics_exporter.close()
+        
+        return 0 if failure_count == 0 else 1
             
     except KeyboardInterrupt:
         logging.info("\nOperation cancelled by user")
         return 1
     except Exception as e:
-        logging.error(f"Unexpected error: {str(e)}")
+        logging.error("Unexpected error: %s", e)
         return 1
 
 if __name__ == "__main__":
     try:
-        logging.info("Starting WordPress automation")
         exit_code = main()
         
         if exit_code == 0:
@@ -137,5 +568,5 @@ if __name__ == "__main__":
         sys.exit(exit_code)
         
     except Exception as e:
-        logging.critical(f"Critical error: {str(e)}")
+        logging.critical("Critical error: %s", e)
         sys.exit(1)
@@ -0,0 +1,70 @@
+"""
+Media library index for WordPress automation.
+Maps featured_image references (library position or filename) to attachment IDs.
+"""
+import os
+import time
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Union
+from urllib.parse import urlparse
+
+
+def media_key(filename: str) -> str:
+    """Normalize a filename or URL for lookups: basename, lower case, no extension."""
+    name = os.path.basename(urlparse(filename).path or filename)
+    return os.path.splitext(name)[0].lower()
+
+
+class MediaIndex:
+    """Attachment IDs by library position and filename, built once and reloaded after ttl."""
+
+    def __init__(self, loader: Callable[[], List[dict]], ttl: float):
+        """
+        Args:
+            loader: Returns the library newest first as [{"id": ..., "filename": ...}],
+                which is the order the media modal shows
+            ttl: Seconds before the index is loaded again
+        """
+        self.loader = loader
+        self.ttl = ttl
+        self._ids: List[int] = []
+        self._by_name: Dict[str, int] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _ensure_loaded(self):
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl:
+            return
+        items = self.loader()
+        self._ids = [item["id"] for item in items]
+        self._by_name = {}
+        for item in items:
+            if item.get("filename"):
+                # Keep the newest attachment when several share a name
+                self._by_name.setdefault(media_key(item["filename"]), item["id"])
+        self._loaded_at = time.monotonic()
+        logging.info("Indexed %s media library items", len(self._ids))
+
+    def resolve(self, reference: Union[int, str, None]) -> Optional[int]:
+        """
+        Look up an attachment ID.
+
+        Args:
+            reference: 1-based library position (newest first), or a filename with or
+                without extension
+        """
+        if reference is None or reference == "":
+            return None
+        with self._lock:
+            self._ensure_loaded()
+            if isinstance(reference, int) or str(reference).isdigit():
+                position = int(reference)
+                if 1 <= position <= len(self._ids):
+                    return self._ids[position - 1]
+            else:
+                attachment_id = self._by_name.get(media_key(str(reference)))
+                if attachment_id is not None:
+                    return attachment_id
+        logging.warning("Image %s not found in media library", reference)
+        return None
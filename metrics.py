@@ -0,0 +1,314 @@
+"""
+Metrics for WordPress automation.
+Counters and histograms of every publishing stage, exported in the Prometheus
+text format to a textfile collector file or a local /metrics endpoint.
+"""
+import os
+import time
+import logging
+import functools
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from config import WordPressConfig
+
+# Seconds; from a fast API call up to a slow browser publish
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+LabelValues = Tuple[str, ...]
+
+# Stage outcomes
+SUCCESS = "success"
+FAILURE = "failure"
+ERROR = "error"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._lock = threading.Lock()
+
+    def _key(self, values: Tuple[str, ...]) -> LabelValues:
+        if len(values) != len(self.labels):
+            raise ValueError(f"{self.name} takes labels {self.labels}, got {values}")
+        return tuple(str(v) for v in values)
+
+    def samples(self) -> Iterator[Tuple[str, Tuple[str, ...], Tuple[str, ...], float]]:
+        """Yield (sample name, label names, label values, value)."""
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonic count per label set."""
+    type_name = "counter"
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1):
+        key = self._key(label_values)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, *label_values: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(label_values), 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for values, count in items:
+            yield f"{self.name}_total", self.labels, values, count
+
+
+class Histogram(_Metric):
+    """Cumulative bucket counts, sum and count per label set."""
+    type_name = "histogram"
+
+    def __init__(self, *args, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(*args)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # Per label set: [count per bucket (not cumulative), sum]
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *label_values: str):
+        key = self._key(label_values)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * len(self.buckets), [0.0]))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            total[0] += value
+
+    def count(self, *label_values: str) -> int:
+        with self._lock:
+            entry = self._values.get(self._key(label_values))
+            return sum(entry[0]) if entry else 0
+
+    def samples(self):
+        with self._lock:
+            items = sorted((k, (list(c), t[0])) for k, (c, t) in self._values.items())
+        names = self.labels + ("le",)
+        for values, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                yield f"{self.name}_bucket", names, values + (_format_value(bound),), cumulative
+            yield f"{self.name}_count", self.labels, values, cumulative
+            yield f"{self.name}_sum", self.labels, values, total
+
+
+class MetricsRegistry:
+    """The process's metrics, with labels added to every sample (such as the backend)."""
+
+    def __init__(self):
+        self.const_labels: Dict[str, str] = {}
+        self._metrics: List[_Metric] = []
+
+    def counter(self, name: str, documentation: str, labels: Tuple[str, ...] = ()) -> Counter:
+        metric = Counter(name, documentation, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labels: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, documentation, labels, buckets=buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self, openmetrics: bool = False) -> str:
+        """All metrics in the Prometheus text format, or OpenMetrics when asked for."""
+        const_names = tuple(self.const_labels)
+        const_values = tuple(self.const_labels.values())
+        lines = []
+        for metric in self._metrics:
+            # OpenMetrics names a counter family without its _total suffix
+            family = metric.name if openmetrics or metric.type_name != "counter" else f"{metric.name}_total"
+            lines.append(f"# HELP {family} {metric.documentation}")
+            lines.append(f"# TYPE {family} {metric.type_name}")
+            for sample, names, values, value in metric.samples():
+                labels = _format_labels(const_names + names, const_values + values)
+                lines.append(f"{sample}{labels} {_format_value(value)}")
+        if openmetrics:
+            lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "wp_stage_duration_seconds", "Time spent in each publishing stage.", ("stage", "outcome")
+)
+POSTS = REGISTRY.counter(
+    "wp_posts", "Post files processed, by outcome (published, failed, skipped, updated, unchanged or created).",
+    ("outcome",)
+)
+
+
+class StageTimer:
+    """Outcome of a timed stage; set outcome to FAILURE when the stage returns without success."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.outcome = SUCCESS
+        self.seconds = 0.0
+
+
+@contextmanager
+def stage(name: str) -> Iterator[StageTimer]:
+    """Time the block as a stage; it counts as an error if it raises."""
+    timer = StageTimer(name)
+    start = time.perf_counter()
+    try:
+        yield timer
+    except BaseException:
+        timer.outcome = ERROR
+        raise
+    finally:
+        timer.seconds = time.perf_counter() - start
+        STAGE_SECONDS.observe(timer.seconds, name, timer.outcome)
+
+
+def timed_stage(name: str) -> Callable:
+    """
+    Decorator timing every call as a stage.
+
+    A call that raises is an error; one that returns a falsy value other
+    than None (False, a failed PublishResult) is a failure.
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name) as timer:
+                result = func(*args, **kwargs)
+                if result is not None and not result:
+                    timer.outcome = FAILURE
+                return result
+        return wrapper
+    return decorator
+
+
+def count_post(outcome: str):
+    """Count a post file that was published, failed or skipped (or updated, unchanged or created)."""
+    POSTS.inc(outcome)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        openmetrics = "application/openmetrics-text" in self.headers.get("Accept", "")
+        body = self.server.registry.render(openmetrics).encode("utf-8")
+        self.send_response(200)
+        self.send_header(
+            "Content-Type", OPENMETRICS_CONTENT_TYPE if openmetrics else PROMETHEUS_CONTENT_TYPE
+        )
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class MetricsExporter:
+    """Serves /metrics and/or rewrites a textfile collector file every interval seconds."""
+
+    def __init__(self, registry: MetricsRegistry, textfile: str = "", port: int = 0,
+                 address: str = "127.0.0.1", interval: float = 15.0):
+        """
+        Args:
+            registry: Metrics to export
+            textfile: File for node_exporter's textfile collector; empty disables it
+            port: Port for the /metrics endpoint; 0 disables it
+            address: Interface the endpoint listens on
+            interval: Seconds between textfile rewrites
+        """
+        self.registry = registry
+        self.textfile = textfile
+        self.interval = interval
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._server: Optional[ThreadingHTTPServer] = None
+
+        if port:
+            self._server = ThreadingHTTPServer((address, port), _MetricsHandler)
+            self._server.daemon_threads = True
+            self._server.registry = registry
+            self._start(self._server.serve_forever, "metrics-http")
+            logging.info("Serving metrics on http://%s:%s/metrics", address, port)
+        if textfile:
+            self._start(self._write_periodically, "metrics-textfile")
+
+    def _start(self, target: Callable, name: str):
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def write_textfile(self):
+        """Replace the textfile atomically, so the collector never reads half of it."""
+        temp_path = f"{self.textfile}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(self.registry.render())
+            os.replace(temp_path, self.textfile)
+        except OSError as e:
+            logging.warning("Could not write metrics to %s: %s", self.textfile, e)
+
+    def _write_periodically(self):
+        while not self._stop.wait(self.interval):
+            self.write_textfile()
+
+    def close(self):
+        """Stop exporting, writing the textfile one last time."""
+        self._stop.set()
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+        for thread in self._threads:
+            thread.join()
+        if self.textfile:
+            self.write_textfile()
+
+
+def start_metrics(config: WordPressConfig) -> Optional[MetricsExporter]:
+    """Label metrics with the configured backend and start the configured exporters."""
+    REGISTRY.const_labels["backend"] = config.backend
+    if not config.metrics_file and not config.metrics_port:
+        return None
+    try:
+        return MetricsExporter(
+            REGISTRY, config.metrics_file, config.metrics_port,
+            config.metrics_address, config.metrics_interval
+        )
+    except OSError as e:
+        logging.warning("Metrics export disabled: %s", e)
+        return None
@@ -0,0 +1,165 @@
+"""
+On-disk cache of parsed post files.
+Skips parsing and rendering when a file's content has not changed since it was last parsed.
+"""
+import os
+import json
+import hashlib
+import logging
+import threading
+from dataclasses import asdict
+from datetime import datetime
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+from config import PostConfig, WordPressConfig
+
+# Eviction frees space down to this fraction of max_bytes, so a full cache isn't rescanned on every put
+EVICT_TARGET = 0.9
+
+# Shared by every ParseCache so threads writing the cache don't evict entries under each other.
+# Parser processes only read the cache; the process that consumes their results writes it.
+_cache_lock = threading.Lock()
+
+
+def content_hash(file_path: str) -> str:
+    """SHA-256 of a file's bytes, read in chunks so large files aren't loaded at once."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ParseCache:
+    """Parsed PostConfigs keyed by content hash and parser version, evicted least recently used."""
+
+    def __init__(self, directory: str, max_bytes: int):
+        """
+        Args:
+            directory: Directory holding one JSON file per cached post
+            max_bytes: Total size the cache may use before old entries are evicted
+        """
+        # Absolute, so parser processes with another working directory use the same cache
+        self.directory = os.path.abspath(directory)
+        self.max_bytes = max_bytes
+        # Bytes in the cache: counted by one scan, then kept up to date by put().
+        # Writes from other processes are picked up by the scan before each eviction.
+        self._total_bytes: Optional[int] = None
+        os.makedirs(directory, exist_ok=True)
+
+    def __reduce__(self):
+        # A copy sent to a parser process reopens that process's shared instance, so the
+        # size count carries over from one put to the next instead of being rescanned
+        return (get_parse_cache, (self.directory, self.max_bytes))
+
+    @staticmethod
+    def key(file_path: str, version: str) -> str:
+        """
+        Cache key for the current content of a file.
+
+        Args:
+            file_path: Post file to hash
+            version: Parser version, so output from older parsers is never reused
+        """
+        return f"{version}-{content_hash(file_path)}"
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[PostConfig]:
+        """Return the cached PostConfig for a key, or None on a miss."""
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path, 'r', encoding='utf-8') as f:
+                fields = json.load(f)
+            if fields.get("publish_date"):
+                fields["publish_date"] = datetime.fromisoformat(fields["publish_date"])
+            post_config = PostConfig(**fields)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, TypeError) as e:
+            logging.warning("Ignoring unreadable parse cache entry %s: %s", entry_path, e)
+            return None
+
+        # Mark the entry as recently used
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+        return post_config
+
+    def put(self, key: str, post_config: PostConfig):
+        """Store a parsed post and evict the oldest entries if the cache is over size."""
+        entry_path = self._entry_path(key)
+        # Write to a temp file and swap it in, so readers never see half an entry
+        tmp_path = f"{entry_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                fields = asdict(post_config)
+                if post_config.publish_date is not None:
+                    fields["publish_date"] = post_config.publish_date.isoformat()
+                json.dump(fields, f)
+                size = f.tell()
+            os.replace(tmp_path, entry_path)
+        except OSError as e:
+            logging.warning("Could not write parse cache entry %s: %s", entry_path, e)
+            return
+
+        with _cache_lock:
+            if self._total_bytes is None:
+                self._total_bytes = self._scan()[1]
+            else:
+                self._total_bytes += size
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _scan(self) -> Tuple[List[Tuple[float, int, str]], int]:
+        """Every entry as (mtime, size, path), and their total size."""
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.name.endswith('.json'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        return entries, total
+
+    def _evict(self):
+        """Remove the least recently used entries until the cache is back under EVICT_TARGET."""
+        entries, total = self._scan()
+        if total <= self.max_bytes:
+            self._total_bytes = total
+            return
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes * EVICT_TARGET:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        self._total_bytes = total
+
+
+@lru_cache(maxsize=None)
+def get_parse_cache(directory: str, max_bytes: int) -> ParseCache:
+    """This process's ParseCache for a directory, created on first use."""
+    return ParseCache(directory, max_bytes)
+
+
+def open_parse_cache(config: WordPressConfig) -> Optional[ParseCache]:
+    """Get the configured parse cache, or None if it is disabled."""
+    if not config.parse_cache_dir:
+        return None
+    try:
+        return get_parse_cache(config.parse_cache_dir, config.parse_cache_max_bytes)
+    except OSError as e:
+        logging.warning("Parse cache disabled: %s", e)
+        return None
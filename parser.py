@@ -2,47 +2,192 @@
 Parser for WordPress post files.
 Handles metadata extraction and content block parsing.
 """
-import re
-from typing import Optional, Dict, List, Tuple
+import io
+import os
+import mmap
+from datetime import datetime
+from typing import Optional, Dict, Iterable, Iterator, Tuple
 from config import PostConfig
+from content_blocks import BlockCompiler
+from parse_cache import ParseCache
+
+# Bump whenever rendered HTML or PostConfig fields change, so cached parses are not reused
+PARSER_VERSION = "3"
+
+CONTENT_DELIMITER = "# --- Content ---"
+
+# Files at least this large are parsed in streaming mode
+STREAM_THRESHOLD = 1024 * 1024
 
 class PostParser:
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: str, stream_threshold: int = STREAM_THRESHOLD,
+                 cache: Optional[ParseCache] = None):
         self.file_path = file_path
+        self.stream_threshold = stream_threshold
+        self.cache = cache
+        self.compiler = BlockCompiler()
         
     def parse_file(self) -> PostConfig:
-        """Parse the post file and return PostConfig."""
+        """Parse the post file and return PostConfig, from the cache if it is unchanged."""
+        post_config, key = self.parse_without_storing()
+        if key is not None:
+            self.cache.put(key, post_config)
+        return post_config
+    
+    def parse_without_storing(self) -> Tuple[PostConfig, Optional[str]]:
+        """
+        Like parse_file, but leave writing the cache to the caller.
+        
+        Returns the PostConfig, and the cache key to store it under when it was
+        parsed rather than read from the cache (None on a hit or without a cache).
+        """
+        if self.cache is None:
+            return self._parse_file(), None
+        
+        key = self.cache.key(self.file_path, PARSER_VERSION)
+        post_config = self.cache.get(key)
+        if post_config is not None:
+            return post_config, None
+        return self._parse_file(), key
+    
+    def _parse_file(self) -> PostConfig:
+        if os.path.getsize(self.file_path) >= self.stream_threshold:
+            return self.parse_stream()
+        
         with open(self.file_path, 'r', encoding='utf-8') as f:
             content = f.read()
             
         # Split metadata and content sections
-        parts = content.split("# --- Content ---")
+        parts = content.split(CONTENT_DELIMITER)
         if len(parts) != 2:
             raise ValueError(f"Invalid file format in {self.file_path}. Missing content delimiter.")
             
         metadata = self._parse_metadata(parts[0])
         processed_content = self._parse_content(parts[1])
         
+        return self._build_config(metadata, processed_content)
+    
+    def parse_stream(self, use_mmap: bool = True) -> PostConfig:
+        """
+        Parse the post file without holding more than one copy of it in memory.
+        
+        Metadata is read line by line, content blocks are rendered one at a
+        time and written into a single buffer. The result matches parse_file.
+        
+        Args:
+            use_mmap: Read through a memory map instead of buffered file reads
+        """
+        with open(self.file_path, 'rb') as f:
+            if use_mmap and os.fstat(f.fileno()).st_size > 0:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    return self._parse_lines(_iter_mmap_lines(mapped))
+        with open(self.file_path, 'r', encoding='utf-8') as f:
+            return self._parse_lines(f)
+    
+    def _parse_lines(self, lines: Iterable[str]) -> PostConfig:
+        """Parse a post from an iterator of lines in a single pass."""
+        lines = iter(lines)
+        metadata: Dict[str, str] = {}
+        seen_text = False
+        
+        for line in lines:
+            metadata_part, found, rest = line.partition(CONTENT_DELIMITER)
+            # Match _parse_metadata, which strips the section before splitting it
+            if not seen_text:
+                if not metadata_part.strip():
+                    if found:
+                        break
+                    continue
+                metadata_part = metadata_part.lstrip()
+                seen_text = True
+            self._parse_metadata_line(metadata_part, metadata)
+            if found:
+                break
+        else:
+            raise ValueError(f"Invalid file format in {self.file_path}. Missing content delimiter.")
+        
+        buffer = io.StringIO()
+        blocks = self.compiler.iter_html(self._content_lines(rest, lines))
+        for html in blocks:
+            buffer.write(html)
+            break
+        for html in blocks:
+            buffer.write('\n\n')
+            buffer.write(html)
+        
+        return self._build_config(metadata, buffer.getvalue())
+    
+    def _content_lines(self, first_line: str, lines: Iterator[str]) -> Iterator[str]:
+        """Yield content lines, rejecting a second content delimiter."""
+        for line in _chain_first(first_line, lines):
+            if CONTENT_DELIMITER in line:
+                raise ValueError(f"Invalid file format in {self.file_path}. Missing content delimiter.")
+            yield line
+    
+    def _build_config(self, metadata: Dict[str, str], processed_content: str) -> PostConfig:
+        """Create the PostConfig from parsed metadata and rendered content."""
         return PostConfig(
             title=metadata.get('title', '').strip('"'),
             content=processed_content,
             category=metadata.get('category', '').strip('"'),
             tags=metadata.get('tags', '').strip('"'),
             media_index=self._parse_media_index(metadata.get('featured_image', '')),
-            status=metadata.get('status', 'draft').strip('"')
+            status=metadata.get('status', 'draft').strip('"'),
+            featured_image=self._parse_featured_image(metadata.get('featured_image', '')),
+            slug=metadata.get('slug', '').strip('"') or None,
+            publish_date=self._parse_publish_date(metadata.get('publish_date', ''))
         )
     
     def _parse_metadata(self, metadata_text: str) -> Dict[str, str]:
         """Parse metadata section into dictionary."""
         metadata = {}
         for line in metadata_text.strip().split('\n'):
-            if ':' in line and not line.startswith('#'):
-                key, value = line.split(':', 1)
-                # Remove comments and clean up value
-                value = value.split('#')[0].strip()
-                metadata[key.strip()] = value
+            self._parse_metadata_line(line, metadata)
+        return metadata
+    
+    def _parse_metadata_line(self, line: str, metadata: Dict[str, str]):
+        """Add one "key: value" metadata line to the dictionary."""
+        if ':' in line and not line.startswith('#'):
+            key, value = line.split(':', 1)
+            # Remove comments and clean up value
+            value = value.split('#')[0].strip()
+            metadata[key.strip()] = value
+    
+    def _read_metadata(self) -> Dict[str, str]:
+        """Read the metadata section alone, without rendering the content."""
+        metadata: Dict[str, str] = {}
+        with open(self.file_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                metadata_part, found, _ = line.partition(CONTENT_DELIMITER)
+                self._parse_metadata_line(metadata_part.strip(), metadata)
+                if found:
+                    break
         return metadata
     
+    def read_publish_date(self) -> Optional[datetime]:
+        """Read publish_date from the metadata section alone, without rendering the content."""
+        return self._parse_publish_date(self._read_metadata().get('publish_date', ''))
+    
+    def read_terms(self) -> Tuple[str, str]:
+        """Read (category, tags) from the metadata section alone, as parse_file would set them."""
+        metadata = self._read_metadata()
+        return metadata.get('category', '').strip('"'), metadata.get('tags', '').strip('"')
+    
+    def _parse_publish_date(self, value: str) -> Optional[datetime]:
+        """
+        Parse publish_date ("2024-11-17", "2024-11-17 09:30" or ISO 8601 with an offset).
+        
+        Dates without an offset are in local time. Returns a timezone-aware datetime, or None if blank.
+        """
+        value = value.strip('"').strip()
+        if not value:
+            return None
+        try:
+            publish_date = datetime.fromisoformat(value)
+        except ValueError:
+            raise ValueError(f"Invalid publish_date in {self.file_path}: {value}")
+        return publish_date if publish_date.tzinfo else publish_date.astimezone()
+    
     def _parse_media_index(self, media_value: str) -> Optional[int]:
         """Parse media index from featured_image value."""
         try:
@@ -53,108 +198,33 @@ class PostParser:
         except:
             return None
     
+    def _parse_featured_image(self, media_value: str) -> Optional[str]:
+        """Parse a featured_image filename (values that aren't a media index)."""
+        media_value = media_value.strip('"').strip()
+        if media_value and not media_value.isdigit():
+            return media_value
+        return None
+    
     def _parse_content(self, content_text: str) -> str:
         """Parse content blocks into HTML."""
-        processed_content = []
-        current_block = []
-        in_block = False
-        block_type = None
-        
-        for line in content_text.split('\n'):
-            line = line.strip()
-            
-            # Skip comments
-            if line.startswith('#'):
-                continue
-                
-            # Check for block start
-            if line.startswith('[') and ']' in line:
-                if in_block:  # Process previous block if exists
-                    processed_content.append(
-                        self._process_block(block_type, current_block)
-                    )
-                    current_block = []
-                
-                block_type = self._get_block_type(line)
-                in_block = True
-                continue
-                
-            # Check for block end
-            if line.startswith('[/'):
-                if in_block:
-                    processed_content.append(
-                        self._process_block(block_type, current_block)
-                    )
-                    current_block = []
-                    in_block = False
-                continue
-                
-            # Add content to current block
-            if in_block and line:
-                current_block.append(line)
-        
-        # Process any remaining block
-        if in_block and current_block:
-            processed_content.append(
-                self._process_block(block_type, current_block)
-            )
-        
-        # Filter out None values and join with double newlines
-        return '\n\n'.join([p for p in processed_content if p])
-    
-    def _get_block_type(self, line: str) -> tuple[str, Dict[str, str]]:
-        """Extract block type and attributes from block start line."""
-        match = re.match(r'\[(\w+)(?:\s+([^\]]+))?\]', line)
-        if not match:
-            return ('paragraph', {})
-            
-        block_type = match.group(1)
-        attrs_str = match.group(2) or ''
-        
-        # Parse attributes
-        attrs = {}
-        for attr in attrs_str.split():
-            if '=' in attr:
-                key, value = attr.split('=')
-                attrs[key] = value
-                
-        return (block_type, attrs)
-    
-    def _process_block(self, block_info: tuple[str, Dict[str, str]], lines: List[str]) -> str:
-        """Convert block content to HTML."""
-        block_type, attrs = block_info
-        content = '\n'.join(lines)
-        
-        if block_type == 'paragraph':
-            # Convert markdown links to HTML
-            content = re.sub(r'\[(.*?)\]\((.*?)\)', r'<a href="\2">\1</a>', content)
-            return f"<p>{content}</p>"
-            
-        elif block_type == 'heading':
-            level = attrs.get('level', '2')
-            return f"<h{level}>{content}</h{level}>"
-            
-        elif block_type == 'list':
-            list_type = attrs.get('type', 'unordered')
-            tag = 'ul' if list_type == 'unordered' else 'ol'
-            items = []
-            for line in content.split('\n'):
-                if line.strip():
-                    # Remove leading markers (-, 1., etc.)
-                    item = re.sub(r'^[-\d\s.]+', '', line).strip()
-                    items.append(f"<li>{item}</li>")
-            return f"<{tag}>\n{''.join(items)}\n</{tag}>"
-            
-        elif block_type == 'quote':
-            return f"<blockquote>{content}</blockquote>"
-            
-        elif block_type == 'code':
-            return f"<pre><code>{content}</code></pre>"
-            
-        elif block_type == 'embed':
-            return f"[embed]{content}[/embed]"
-            
-        return content
+        return self.compiler.compile(content_text)
+
+def _chain_first(first_line: str, lines: Iterator[str]) -> Iterator[str]:
+    yield first_line
+    yield from lines
+
+def _iter_mmap_lines(mapped: mmap.mmap) -> Iterator[str]:
+    """Yield decoded lines from a memory map with universal newlines, like text mode."""
+    readline = mapped.readline
+    while True:
+        raw = readline()
+        if not raw:
+            break
+        line = raw.decode('utf-8')
+        if '\r' in line:
+            yield from line.replace('\r\n', '\n').replace('\r', '\n').splitlines(True)
+        else:
+            yield line
 
 # Example usage when run directly
 if __name__ == "__main__":
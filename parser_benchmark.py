@@ -0,0 +1,316 @@
+"""
+Parser and renderer micro-benchmark for WordPress automation.
+Generates synthetic post files, measures the parse hot path's throughput and peak
+memory, and compares the results with an earlier run to catch regressions.
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import subprocess
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional
+
+from content_blocks import BlockParser
+from parser import CONTENT_DELIMITER, PARSER_VERSION, PostParser
+
+# Relative weight of each block type in a generated post
+DEFAULT_MIX = "paragraph=6,heading=2,list=2,code=1,quote=1,embed=1"
+
+WORDS = (
+    "security remote internship analyst network python cloud incident response "
+    "threat intelligence application developer tooling monitoring career skills "
+    "linux automation wordpress content publishing pipeline"
+).split()
+
+EMBED_URLS = [
+    "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+    "https://twitter.com/WordPress/status/1234567890",
+    "https://vimeo.com/76979871",
+]
+
+
+@dataclass
+class Measurement:
+    """Throughput and peak memory of one target on one corpus."""
+    corpus: str
+    target: str
+    files: int
+    bytes: int
+    seconds: float
+    files_per_second: float
+    mb_per_second: float
+    # Largest tracemalloc peak while processing a single file
+    peak_kb: float
+
+
+def parse_mix(mix: str) -> Dict[str, int]:
+    """Parse "paragraph=6,list=2" into block weights."""
+    weights = {}
+    for part in mix.split(','):
+        name, _, weight = part.partition('=')
+        weights[name.strip()] = int(weight or 1)
+    return weights
+
+
+class CorpusGenerator:
+    """Builds post files in the topost/demo.txt syntax from a seeded random source."""
+
+    def __init__(self, mix: Dict[str, int], seed: int = 1):
+        self.mix = mix
+        self.rng = random.Random(seed)
+
+    def sentence(self, words: int) -> str:
+        return " ".join(self.rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+    def link(self) -> str:
+        word = self.rng.choice(WORDS)
+        return f"[{word} guide](https://example.com/{word}/{self.rng.randint(1, 9999)})"
+
+    def block(self, block_type: str) -> str:
+        rng = self.rng
+        if block_type == "paragraph":
+            parts = [self.sentence(rng.randint(8, 20)) for _ in range(rng.randint(2, 5))]
+            for _ in range(rng.randint(0, 2)):
+                parts.insert(rng.randrange(len(parts) + 1), f"See the {self.link()}.")
+            return "[paragraph]\n" + " ".join(parts) + "\n[/paragraph]"
+        if block_type == "heading":
+            return f"[heading level={rng.choice('234')}]\n{self.sentence(5)[:-1]}\n[/heading]"
+        if block_type == "list":
+            ordered = rng.random() < 0.5
+            lines = []
+            for i in range(rng.randint(3, 7)):
+                lines.append(f"{i + 1}. {self.sentence(6)}" if ordered else f"- {self.sentence(6)}")
+                # Indented sub-items; the list renderer flattens them into the same list
+                for _ in range(rng.randint(0, 2)):
+                    lines.append(f"    - {self.sentence(4)}")
+            list_type = "ordered" if ordered else "unordered"
+            return f"[list type={list_type}]\n" + "\n".join(lines) + "\n[/list]"
+        if block_type == "code":
+            lines = [f"def {rng.choice(WORDS)}_{i}(value):" + f"\n    return value * {i}"
+                     for i in range(rng.randint(2, 6))]
+            return "[code]\n" + "\n\n".join(lines) + "\n[/code]"
+        if block_type == "quote":
+            return f'[quote]\n"{self.sentence(15)}"\n[/quote]'
+        if block_type == "embed":
+            return f"[embed]\n{rng.choice(EMBED_URLS)}\n[/embed]"
+        raise ValueError(f"Unknown block type: {block_type}")
+
+    def post(self, index: int, size: int) -> str:
+        """A post of roughly size bytes."""
+        header = "\n".join([
+            "# --- Metadata ---",
+            f'title: "Synthetic post {index}"',
+            f'slug: "synthetic-post-{index}"',
+            'featured_image: "1"              # First image in media library',
+            f'category: "{self.rng.choice(WORDS).title()}"',
+            f'tags: "{", ".join(self.rng.sample(WORDS, 3))}"',
+            'status: "publish"',
+            "",
+            CONTENT_DELIMITER,
+            "",
+        ])
+        types = list(self.mix)
+        weights = [self.mix[t] for t in types]
+        blocks = []
+        length = len(header)
+        while length < size:
+            block = self.block(self.rng.choices(types, weights)[0])
+            blocks.append(block)
+            length += len(block) + 2
+        return header + "\n\n".join(blocks) + "\n"
+
+    def write(self, directory: str, files: int, size: int) -> List[str]:
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        for i in range(files):
+            path = os.path.join(directory, f"post-{i:05d}.txt")
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(self.post(i, size))
+            paths.append(path)
+        return paths
+
+
+def measure(corpus: str, target: str, items: list, sizes: List[int],
+            run: Callable, rounds: int, min_time: float) -> Measurement:
+    """
+    Time run(item) over every item, best of rounds, then trace its peak memory once.
+
+    Each round repeats the items until it takes at least min_time, so short
+    corpora aren't dominated by timer and scheduler noise.
+    """
+    def timed(loops: int) -> float:
+        start = time.perf_counter()
+        for _ in range(loops):
+            for item in items:
+                run(item)
+        return (time.perf_counter() - start) / loops
+
+    loops = 1
+    best = timed(loops)
+    while best * loops < min_time:
+        loops *= 2
+        best = timed(loops)
+    for _ in range(rounds - 1):
+        best = min(best, timed(loops))
+
+    # A separate pass: tracing slows allocation down too much to time under it
+    peak = 0
+    tracemalloc.start()
+    try:
+        for item in items:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            run(item)
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+
+    total = sum(sizes)
+    return Measurement(
+        corpus=corpus,
+        target=target,
+        files=len(items),
+        bytes=total,
+        seconds=best,
+        files_per_second=len(items) / best if best else 0.0,
+        mb_per_second=total / (1024 * 1024) / best if best else 0.0,
+        peak_kb=peak / 1024,
+    )
+
+
+def benchmark_corpus(corpus: str, paths: List[str], rounds: int,
+                     min_time: float) -> List[Measurement]:
+    """Measure the three parse entry points on one corpus."""
+    sizes = [os.path.getsize(path) for path in paths]
+    contents = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            contents.append(f.read().split(CONTENT_DELIMITER, 1)[1])
+    content_sizes = [len(content.encode('utf-8')) for content in contents]
+    parser = PostParser(paths[0])
+    blocks = BlockParser()
+
+    return [
+        measure(corpus, "parse_file", paths, sizes,
+                lambda path: PostParser(path).parse_file(), rounds, min_time),
+        measure(corpus, "_parse_content", contents, content_sizes,
+                parser._parse_content, rounds, min_time),
+        measure(corpus, "parse_blocks", contents, content_sizes,
+                blocks.parse_blocks, rounds, min_time),
+    ]
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: List[Measurement], baseline_path: str, threshold: float) -> List[str]:
+    """Print throughput changes against a baseline run; returns the regressions."""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    previous = {(r["corpus"], r["target"]): r for r in baseline["results"]}
+    print(f"\nCompared with {baseline_path} (commit {baseline['meta'].get('commit') or 'unknown'}):")
+
+    regressions = []
+    for r in results:
+        old = previous.get((r.corpus, r.target))
+        if not old:
+            continue
+        speed = (r.mb_per_second / old["mb_per_second"] - 1) * 100 if old["mb_per_second"] else 0.0
+        memory = (r.peak_kb / old["peak_kb"] - 1) * 100 if old["peak_kb"] else 0.0
+        flag = ""
+        if speed < -threshold or memory > threshold:
+            flag = "  REGRESSION"
+            regressions.append(f"{r.corpus} {r.target}")
+        print(f"  {r.corpus:>8} {r.target:<15} throughput {speed:+6.1f}%  peak memory {memory:+6.1f}%{flag}")
+    return regressions
+
+
+def format_table(results: List[Measurement]) -> str:
+    header = f"{'corpus':>8} {'target':<15}{'files':>7}{'files/s':>11}{'MB/s':>9}{'peak KB':>10}"
+    lines = [header, "-" * len(header)]
+    for r in results:
+        lines.append(
+            f"{r.corpus:>8} {r.target:<15}{r.files:>7}{r.files_per_second:>11.1f}"
+            f"{r.mb_per_second:>9.2f}{r.peak_kb:>10.1f}"
+        )
+    return "\n".join(lines)
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the post parser on synthetic corpora")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[4, 64, 2048],
+                        help="Post sizes in KB, one corpus each (default: 4 64 2048)")
+    parser.add_argument("--budget-mb", type=float, default=16,
+                        help="Approximate size of each corpus in MB (default: 16)")
+    parser.add_argument("--max-files", type=int, default=500,
+                        help="Most files in one corpus (default: 500)")
+    parser.add_argument("--mix", default=DEFAULT_MIX,
+                        help=f"Block type weights (default: {DEFAULT_MIX})")
+    parser.add_argument("--rounds", type=int, default=5, help="Timed rounds, best counts (default: 5)")
+    parser.add_argument("--min-time", type=float, default=0.5,
+                        help="Minimum seconds per round; short corpora are repeated (default: 0.5)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", metavar="PATH", help="Write the results as JSON")
+    parser.add_argument("--compare", metavar="PATH", help="Compare with the JSON of an earlier run")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="Percent slowdown or memory growth counted as a regression (default: 10)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    mix = parse_mix(args.mix)
+    workdir = tempfile.mkdtemp(prefix="parser-bench-")
+    results: List[Measurement] = []
+    try:
+        for size_kb in args.sizes:
+            corpus = f"{size_kb}KB"
+            files = max(1, min(args.max_files, int(args.budget_mb * 1024 / size_kb)))
+            # The same seed per corpus, so every run parses identical files
+            paths = CorpusGenerator(mix, args.seed).write(
+                os.path.join(workdir, corpus), files, size_kb * 1024
+            )
+            results.extend(benchmark_corpus(corpus, paths, args.rounds, args.min_time))
+            print(f"{corpus}: {files} files measured", file=sys.stderr)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(format_table(results))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({
+                "meta": {
+                    "commit": git_commit(),
+                    "parser_version": PARSER_VERSION,
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "timestamp": time.time(),
+                    "args": vars(args),
+                },
+                "results": [asdict(r) for r in results],
+            }, f, indent=2)
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regressions beyond {args.threshold}%", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+"""
+Parse stage of the publishing pipeline.
+Parses post files in a process pool while the caller publishes, connected by a bounded queue.
+"""
+import os
+import atexit
+import queue
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from config import PostConfig
+from parser import PostParser
+from parse_cache import ParseCache, get_parse_cache
+
+_DONE = object()
+
+_pools: Dict[int, ProcessPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+
+class ParsedFile(NamedTuple):
+    """Result of parsing one file: a PostConfig, or the error that stopped it."""
+    file_path: str
+    post_config: Optional[PostConfig]
+    error: Optional[BaseException]
+
+
+def parse_post(file_path: str, cache_dir: Optional[str] = None,
+               cache_max_bytes: int = 0) -> Tuple[PostConfig, Optional[str]]:
+    """
+    Parse one file; runs inside the pool's worker processes.
+
+    Workers only read the parse cache. A post that wasn't cached comes back with
+    the key to store it under, and the consuming process writes it, so the cache's
+    size count and eviction live in one process.
+    """
+    cache = get_parse_cache(cache_dir, cache_max_bytes) if cache_dir else None
+    return PostParser(file_path, cache=cache).parse_without_storing()
+
+
+def cache_args(cache: Optional[ParseCache]) -> tuple:
+    """The parse_post arguments that let a worker read this cache."""
+    return (cache.directory, cache.max_bytes) if cache else ()
+
+
+def get_parse_pool(workers: int) -> ProcessPoolExecutor:
+    """Shared process pool with the given number of parser workers, started on first use."""
+    with _pools_lock:
+        if workers not in _pools:
+            # forkserver children don't inherit the publisher's threads and sockets
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context(
+                "forkserver" if "forkserver" in methods else "spawn"
+            )
+            _pools[workers] = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+        return _pools[workers]
+
+
+def _discard_pool(workers: int, pool: ProcessPoolExecutor):
+    """Drop a pool whose worker died, so the next run starts a fresh one."""
+    with _pools_lock:
+        if _pools.get(workers) is pool:
+            del _pools[workers]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+@atexit.register
+def shutdown_parse_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        _pools.clear()
+
+
+def _parse_inline(file_paths: Iterable[str],
+                  cache: Optional[ParseCache]) -> Iterator[Optional[ParsedFile]]:
+    for file_path in file_paths:
+        try:
+            yield ParsedFile(file_path, PostParser(file_path, cache=cache).parse_file(), None)
+        except Exception as e:
+            yield ParsedFile(file_path, None, e)
+
+
+def parse_files(file_paths: List[str], workers: int,
+                cache: Optional[ParseCache] = None,
+                queue_size: int = 32,
+                idle_timeout: float = 0.5) -> Iterator[Optional[ParsedFile]]:
+    """
+    Parse files in a process pool and yield them in the order they finish.
+
+    A slow or huge file only delays itself: the others are yielded as soon as
+    they are parsed. At most 2 * workers files are parsed at once, and at most
+    queue_size parsed posts wait for the consumer, so a slow publisher holds
+    the parser back instead of letting parsed posts pile up in memory.
+
+    Yields None whenever nothing was ready for idle_timeout seconds, so the
+    consumer can publish a partial batch instead of waiting for it to fill.
+
+    Args:
+        file_paths: Files to parse
+        workers: Parser processes; below 2 (or for a single file) files are parsed inline
+        cache: Parse cache the workers read; new entries are written from this process
+        queue_size: Maximum parsed posts waiting for the consumer
+        idle_timeout: Seconds without a parsed post before yielding None
+    """
+    if workers < 2 or len(file_paths) < 2:
+        yield from _parse_inline(file_paths, cache)
+        return
+
+    pool = get_parse_pool(workers)
+    parsed: "queue.Queue" = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        # Blocks while the consumer is behind, but gives up once it has gone away
+        while not stop.is_set():
+            try:
+                parsed.put(item, timeout=idle_timeout)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    worker_cache = cache_args(cache)
+
+    def produce():
+        remaining = iter(file_paths)
+        in_flight: Dict[Future, str] = {}
+        try:
+            while True:
+                for file_path in remaining:
+                    # Worker processes may not share our working directory
+                    future = pool.submit(parse_post, os.path.abspath(file_path), *worker_cache)
+                    in_flight[future] = file_path
+                    if len(in_flight) >= workers * 2:
+                        break
+                if not in_flight:
+                    return
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    file_path = in_flight.pop(future)
+                    error = future.exception()
+                    if isinstance(error, BrokenProcessPool):
+                        in_flight[future] = file_path
+                        raise error
+                    result = None
+                    if not error:
+                        result, key = future.result()
+                        if key is not None:
+                            cache.put(key, result)
+                    if not put(ParsedFile(file_path, result, error)):
+                        return
+        except BrokenProcessPool as e:
+            logging.error("Parser process died, parsing the remaining files inline: %s", e)
+            _discard_pool(workers, pool)
+            unparsed = list(in_flight.values()) + list(remaining)
+            in_flight.clear()
+            for item in _parse_inline(unparsed, cache):
+                if not put(item):
+                    return
+        except Exception as e:
+            logging.error("Parse stage stopped: %s", e)
+            # Report whatever was not parsed as failed rather than losing it
+            for file_path in list(in_flight.values()) + list(remaining):
+                if not put(ParsedFile(file_path, None, e)):
+                    return
+        finally:
+            for future in in_flight:
+                future.cancel()
+            put(_DONE)
+
+    producer = threading.Thread(target=produce, name="parse-stage", daemon=True)
+    producer.start()
+    try:
+        while True:
+            try:
+                item = parsed.get(timeout=idle_timeout)
+            except queue.Empty:
+                yield None
+                continue
+            if item is _DONE:
+                return
+            yield item
+    finally:
+        stop.set()
+        producer.join()
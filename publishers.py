@@ -0,0 +1,720 @@
+"""
+Publishing backends for WordPress automation.
+Each backend turns a PostConfig into a WordPress post.
+"""
+import logging
+import threading
+import xmlrpc.client
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import WordPressConfig, PostConfig
+from concurrency import AdaptiveLimiter, retry_after_from
+from resilience import site_policy
+from media_index import MediaIndex
+from metrics import timed_stage
+from taxonomy import CATEGORY, TAG, TaxonomyCache, TermMaps, collect_terms, term_key
+from utils import split_tags
+
+# WordPress rejects /batch/v1 requests larger than this by default
+REST_MAX_BATCH_SIZE = 25
+
+# Posts requested at a time when fetching existing posts for update mode
+FETCH_CHUNK_SIZE = 100
+
+# REST fields update mode compares; anything else in the payload is left as it is on the site
+REST_UPDATE_FIELDS = ("title", "content", "status", "categories", "tags", "featured_media")
+# The same for XML-RPC, where categories and tags are compared by name under terms_names
+XMLRPC_UPDATE_FIELDS = ("post_title", "post_content", "post_status", "post_thumbnail")
+# wp.getPost field groups holding those fields
+XMLRPC_FETCH_FIELDS = ["post", "terms"]
+
+
+@dataclass
+class PublishResult:
+    """Outcome of publishing a single post."""
+    success: bool
+    post_id: Optional[int] = None
+    status: Optional[str] = None
+    error: Optional[str] = None
+    # Seconds the site asked us to wait before sending more
+    retry_after: Optional[float] = None
+
+    def __bool__(self) -> bool:
+        return self.success
+
+
+@dataclass
+class ExistingPost:
+    """A post already on the site, with the fields update mode compares in request body form."""
+    post_id: int
+    slug: str
+    fields: dict
+
+
+def _past(action: str) -> str:
+    return "published" if action == "publish" else f"{action}d"
+
+
+def _same(current, desired) -> bool:
+    """Compare field values, ignoring the order of term ID lists."""
+    if isinstance(current, list) and isinstance(desired, list):
+        return sorted(current) == sorted(desired)
+    return current == desired
+
+
+class Publisher:
+    """Base class for publishing backends."""
+    name = "base"
+    batch_size = 1
+    # Whether publish() may be called from several threads at once
+    thread_safe = False
+    # Shared cap on submissions in flight, set by the parallel pipelines
+    limiter: Optional[AdaptiveLimiter] = None
+    # Whether the backend can read posts back for update mode (fetch_posts, diff_post, update_batch)
+    can_update = False
+
+    def __init__(self, config: WordPressConfig):
+        self.config = config
+
+    def setup(self) -> bool:
+        """Prepare the backend (connect, log in). Returns False on failure."""
+        return True
+
+    def publish(self, post_config: PostConfig) -> PublishResult:
+        """Create a post from the given configuration, or update post_config.post_id if set."""
+        raise NotImplementedError
+
+    def publish_batch(self, post_configs: List[PostConfig]) -> List[PublishResult]:
+        """Publish several posts, returning one result per input in the same order."""
+        return [self.publish(post_config) for post_config in post_configs]
+
+    def prepare_terms(self, file_paths: List[str]):
+        """
+        Create the missing categories and tags of all these files before any of them is published.
+
+        Does nothing by default: XML-RPC creates terms as part of each post, and
+        Selenium only picks categories that already exist.
+        """
+
+    def fetch_posts(self, post_ids: List[int], slugs: List[str]) -> List[ExistingPost]:
+        """Fetch the existing posts with any of these IDs or slugs, in as few requests as possible."""
+        raise NotImplementedError(f"The {self.name} backend can't read posts")
+
+    def find_post(self, slug: str) -> Optional[ExistingPost]:
+        """The existing post with this slug, or None."""
+        return next((post for post in self.fetch_posts([], [slug]) if post.slug == slug), None)
+
+    def diff_post(self, post_config: PostConfig, existing: ExistingPost) -> dict:
+        """The fields of post_config that differ from the existing post, as a partial request body."""
+        raise NotImplementedError(f"The {self.name} backend can't read posts")
+
+    def update_batch(self, updates: List[Tuple[PostConfig, dict]]) -> List[PublishResult]:
+        """Send each partial body to its post_config.post_id, returning one result per update."""
+        raise NotImplementedError(f"The {self.name} backend can't read posts")
+
+    def cleanup(self):
+        """Release any resources held by the backend."""
+
+
+class SeleniumPublisher(Publisher):
+    """Publishes through the classic editor using a Chrome browser."""
+    name = "selenium"
+
+    def __init__(self, config: WordPressConfig):
+        super().__init__(config)
+        # Imported here so API-only runs don't pull in the browser stack
+        from wordpress_actions import WordPressAutomator
+        self.automator = WordPressAutomator(config)
+
+    def setup(self) -> bool:
+        logging.info("Setting up browser...")
+        self.automator.setup_browser()
+
+        logging.info("Logging into WordPress...")
+        return self.automator.login()
+
+    def publish(self, post_config: PostConfig) -> PublishResult:
+        if post_config.post_id is not None:
+            error = f"post {post_config.post_id} already exists; the selenium backend can't update posts"
+            logging.error("Skipping %s: %s", post_config.title, error)
+            return PublishResult(False, error=error)
+        success = self.automator.create_post(post_config)
+        return PublishResult(success, status=post_config.wordpress_status())
+
+    def cleanup(self):
+        self.automator.cleanup()
+
+
+class RestPublisher(Publisher):
+    """Publishes through the WordPress REST API with an application password."""
+    name = "rest"
+    thread_safe = True
+    can_update = True
+
+    def __init__(self, config: WordPressConfig):
+        super().__init__(config)
+        self.base_url = config.get_rest_url()
+        self.session = requests.Session()
+        self.session.auth = (config.username, config.app_password or config.password)
+        self.session.headers.update({"Accept": "application/json"})
+
+        # One keep-alive pool shared by every request of the run
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=config.http_pool_size
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.taxonomy = TaxonomyCache(self._load_terms, config.taxonomy_ttl)
+        self.media = MediaIndex(self._load_media, config.taxonomy_ttl)
+        # Serializes lookups so concurrent posts don't create the same tag twice
+        self._lookup_lock = threading.Lock()
+        self.retry = site_policy(config)
+
+    def _send(self, method: str, route: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", self.config.http_timeout)
+        response = self.session.request(method, f"{self.base_url}{route}", **kwargs)
+        response.raise_for_status()
+        return response
+
+    def _request(self, method: str, route: str, idempotent: bool = True,
+                 **kwargs) -> requests.Response:
+        """
+        Send a request to a REST route and raise on HTTP errors, retrying failures
+        worth retrying. Pass idempotent=False when sending it twice could create two posts.
+        """
+        return self.retry.call(self._send, method, route, idempotent=idempotent, **kwargs)
+
+    @timed_stage("login")
+    def setup(self) -> bool:
+        """Verify the credentials with a single authenticated request."""
+        try:
+            user = self._request("GET", "/wp/v2/users/me", params={"context": "edit"}).json()
+            logging.info("Authenticated to REST API as %s", user.get('slug', self.config.username))
+            return True
+        except Exception as e:
+            logging.error("REST API authentication failed: %s", e)
+            return False
+
+    def _fetch_all(self, route: str, params: dict) -> List[dict]:
+        """Fetch every page of a collection route."""
+        items = []
+        page = 1
+        while True:
+            response = self._request(
+                "GET", route, params={**params, "per_page": 100, "page": page}
+            )
+            items.extend(response.json())
+            if page >= int(response.headers.get("X-WP-TotalPages", 1)):
+                return items
+            page += 1
+
+    def _load_terms(self) -> TermMaps:
+        """Load every category and tag as {name: id} maps."""
+        fields = {"_fields": "id,name"}
+        categories = self._fetch_all("/wp/v2/categories", fields)
+        tags = self._fetch_all("/wp/v2/tags", fields)
+        return (
+            {term["name"]: term["id"] for term in categories},
+            {term["name"]: term["id"] for term in tags},
+        )
+
+    def _create_terms(self, taxonomy: str, names: List[str]):
+        """Create missing terms through the batch endpoint and record their IDs."""
+        route = "/wp/v2/categories" if taxonomy == CATEGORY else "/wp/v2/tags"
+        for start in range(0, len(names), REST_MAX_BATCH_SIZE):
+            chunk = names[start:start + REST_MAX_BATCH_SIZE]
+            responses = self._request("POST", "/batch/v1", json={
+                "validation": "normal",
+                "requests": [
+                    {"method": "POST", "path": route, "body": {"name": name}} for name in chunk
+                ]
+            }).json()["responses"]
+
+            for name, response in zip(chunk, responses):
+                body = response.get("body") or {}
+                if 200 <= response.get("status", 0) < 300:
+                    self.taxonomy.add(taxonomy, name, body["id"])
+                elif body.get("code") == "term_exists":
+                    # Created by someone else since the cache was loaded
+                    self.taxonomy.add(taxonomy, name, body["data"]["term_id"])
+                else:
+                    logging.warning("Could not create %s %s: %s", taxonomy, name, body.get('message'))
+
+    @timed_stage("terms")
+    def _create_missing(self, categories: List[str], tags: List[str]):
+        """Create the categories and tags in these lists that don't exist yet."""
+        with self._lookup_lock:
+            categories = self.taxonomy.missing(CATEGORY, categories)
+            tags = self.taxonomy.missing(TAG, tags)
+            if categories:
+                logging.info("Creating missing categories: %s", ', '.join(categories))
+                self._create_terms(CATEGORY, categories)
+            if tags:
+                logging.info("Creating missing tags: %s", ', '.join(tags))
+                self._create_terms(TAG, tags)
+
+    def prepare_terms(self, file_paths: List[str]):
+        try:
+            self._create_missing(*collect_terms(file_paths))
+        except Exception as e:
+            # ensure_terms tries again for each post that still needs a term
+            logging.error("Failed to create missing terms: %s", e)
+
+    def ensure_terms(self, post_configs: List[PostConfig]):
+        """
+        Create every category and tag these posts need that doesn't exist yet.
+
+        After prepare_terms this normally only checks the cache; it still sends
+        requests if a file changed since the run started or creating failed then.
+        """
+        self._create_missing(
+            [p.category for p in post_configs if p.category],
+            [tag for p in post_configs if p.tags for tag in split_tags(p.tags)]
+        )
+
+    def _load_media(self) -> List[dict]:
+        """Load the image library, newest first, for the media index."""
+        items = self._fetch_all(
+            "/wp/v2/media",
+            {"media_type": "image", "orderby": "date", "order": "desc", "_fields": "id,source_url"}
+        )
+        return [{"id": item["id"], "filename": item.get("source_url", "")} for item in items]
+
+    def build_payload(self, post_config: PostConfig) -> dict:
+        """Translate a PostConfig into a wp/v2/posts request body."""
+        payload = {
+            "title": post_config.title,
+            "content": post_config.content,
+            "status": post_config.wordpress_status(),
+        }
+        if post_config.slug:
+            payload["slug"] = post_config.slug
+        if post_config.publish_date is not None:
+            payload["date_gmt"] = post_config.publish_date_gmt().strftime("%Y-%m-%dT%H:%M:%S")
+
+        if post_config.category:
+            category_id = self.taxonomy.category_id(post_config.category)
+            if category_id is not None:
+                payload["categories"] = [category_id]
+            else:
+                logging.warning("Category not found: %s", post_config.category)
+
+        if post_config.tags:
+            tag_ids = [self.taxonomy.tag_id(tag) for tag in split_tags(post_config.tags)]
+            payload["tags"] = [tag_id for tag_id in tag_ids if tag_id is not None]
+
+        if post_config.image_reference is not None:
+            media_id = self.media.resolve(post_config.image_reference)
+            if media_id is not None:
+                payload["featured_media"] = media_id
+
+        return payload
+
+    def fetch_posts(self, post_ids: List[int], slugs: List[str]) -> List[ExistingPost]:
+        params = {
+            "status": "any", "context": "edit",
+            "_fields": ",".join(("id", "slug") + REST_UPDATE_FIELDS),
+        }
+        posts: Dict[int, dict] = {}
+        for key, values in (("include", [str(i) for i in post_ids]), ("slug", slugs)):
+            for start in range(0, len(values), FETCH_CHUNK_SIZE):
+                chunk = ",".join(values[start:start + FETCH_CHUNK_SIZE])
+                for post in self._fetch_all("/wp/v2/posts", {**params, key: chunk}):
+                    posts[post["id"]] = post
+        return [
+            ExistingPost(post["id"], post["slug"], {
+                **{key: post.get(key) for key in REST_UPDATE_FIELDS},
+                "title": post["title"]["raw"],
+                "content": post["content"]["raw"],
+            })
+            for post in posts.values()
+        ]
+
+    def diff_post(self, post_config: PostConfig, existing: ExistingPost) -> dict:
+        self.ensure_terms([post_config])
+        payload = self.build_payload(post_config)
+        return {
+            key: payload[key] for key in REST_UPDATE_FIELDS
+            if key in payload and not _same(existing.fields.get(key), payload[key])
+        }
+
+    def update_post(self, post_config: PostConfig, changes: dict) -> PublishResult:
+        """Send a partial update of post_config.post_id."""
+        try:
+            post = self._request(
+                "POST", self.post_route(post_config), json=changes
+            ).json()
+            logging.info(
+                "Updated %s of post: %s (ID %s)", ", ".join(changes), post_config.title, post["id"]
+            )
+            return PublishResult(True, post_id=post["id"], status=post.get("status"))
+        except Exception as e:
+            logging.error("Failed to update post %s: %s", post_config.title, e)
+            return PublishResult(False, error=str(e), retry_after=retry_after_from(e))
+
+    @timed_stage("publish")
+    def update_batch(self, updates: List[Tuple[PostConfig, dict]]) -> List[PublishResult]:
+        return [self.update_post(post_config, changes) for post_config, changes in updates]
+
+    @staticmethod
+    def post_route(post_config: PostConfig) -> str:
+        """Route that creates the post, or updates it when it already exists."""
+        if post_config.post_id is not None:
+            return f"/wp/v2/posts/{post_config.post_id}"
+        return "/wp/v2/posts"
+
+    @timed_stage("publish")
+    def publish(self, post_config: PostConfig) -> PublishResult:
+        action = "update" if post_config.post_id is not None else "create"
+        try:
+            self.ensure_terms([post_config])
+            payload = self.build_payload(post_config)
+            post = self._request(
+                "POST", self.post_route(post_config), json=payload,
+                idempotent=post_config.post_id is not None
+            ).json()
+            logging.info("Successfully %sd post: %s (ID %s)", action, post_config.title, post['id'])
+            return PublishResult(True, post_id=post["id"], status=post.get("status"))
+        except Exception as e:
+            logging.error("Failed to %s post: %s", action, e)
+            return PublishResult(False, error=str(e), retry_after=retry_after_from(e))
+
+    def cleanup(self):
+        self.session.close()
+
+
+class RestBatchPublisher(RestPublisher):
+    """Publishes groups of posts through the REST /batch/v1 endpoint."""
+    name = "rest-batch"
+
+    def __init__(self, config: WordPressConfig):
+        super().__init__(config)
+        self.batch_size = min(config.batch_size, REST_MAX_BATCH_SIZE)
+        if config.batch_size > REST_MAX_BATCH_SIZE:
+            logging.warning(
+                "REST batch size capped at %s (requested %s)", REST_MAX_BATCH_SIZE, config.batch_size
+            )
+
+    @timed_stage("publish")
+    def publish_batch(self, post_configs: List[PostConfig]) -> List[PublishResult]:
+        results: List[Optional[PublishResult]] = [None] * len(post_configs)
+        try:
+            self.ensure_terms(post_configs)
+        except Exception as e:
+            # Posts still go out; any term that couldn't be created is skipped
+            logging.error("Failed to create missing terms: %s", e)
+
+        requests_body = []
+        positions = []
+
+        for i, post_config in enumerate(post_configs):
+            try:
+                payload = self.build_payload(post_config)
+            except Exception as e:
+                logging.error("Failed to prepare post %s: %s", post_config.title, e)
+                results[i] = PublishResult(False, error=str(e))
+                continue
+            requests_body.append(
+                {"method": "POST", "path": self.post_route(post_config), "body": payload}
+            )
+            positions.append(i)
+
+        if requests_body:
+            self._send_batch(
+                post_configs, requests_body, positions, results,
+                idempotent=all(post_config.post_id is not None for post_config in post_configs)
+            )
+        return results
+
+    @timed_stage("publish")
+    def update_batch(self, updates: List[Tuple[PostConfig, dict]]) -> List[PublishResult]:
+        results: List[Optional[PublishResult]] = [None] * len(updates)
+        self._send_batch(
+            [post_config for post_config, _ in updates],
+            [
+                {"method": "POST", "path": self.post_route(post_config), "body": changes}
+                for post_config, changes in updates
+            ],
+            list(range(len(updates))), results, idempotent=True, action="update"
+        )
+        return results
+
+    def _send_batch(self, post_configs: List[PostConfig], requests_body: List[dict],
+                    positions: List[int], results: List[Optional[PublishResult]],
+                    idempotent: bool, action: str = "publish"):
+        """Send one /batch/v1 request and fill in the result of each post at its position."""
+        retry_after = None
+        try:
+            responses = self._request(
+                "POST", "/batch/v1",
+                json={"validation": "normal", "requests": requests_body},
+                idempotent=idempotent
+            ).json()["responses"]
+        except Exception as e:
+            logging.error("Batch request failed: %s", e)
+            responses = [{"status": 0, "body": {"message": str(e)}}] * len(positions)
+            retry_after = retry_after_from(e)
+
+        for i, response in zip(positions, responses):
+            body = response.get("body") or {}
+            if 200 <= response.get("status", 0) < 300:
+                logging.info(
+                    "Successfully %s post: %s (ID %s)", _past(action), post_configs[i].title, body['id']
+                )
+                results[i] = PublishResult(True, post_id=body["id"], status=body.get("status"))
+            else:
+                error = body.get("message", f"HTTP {response.get('status')}")
+                logging.error("Failed to %s post %s: %s", action, post_configs[i].title, error)
+                results[i] = PublishResult(False, error=error, retry_after=retry_after)
+
+
+class _TimeoutTransport(xmlrpc.client.SafeTransport):
+    """XML-RPC transport with a socket timeout; keeps its connection alive between calls."""
+
+    def __init__(self, timeout: int, use_https: bool):
+        super().__init__()
+        self.timeout = timeout
+        self.use_https = use_https
+
+    def make_connection(self, host):
+        if self.use_https:
+            connection = super().make_connection(host)
+        else:
+            connection = xmlrpc.client.Transport.make_connection(self, host)
+        connection.timeout = self.timeout
+        return connection
+
+
+class XmlRpcBatchPublisher(Publisher):
+    """Publishes groups of posts as wp.newPost (or wp.editPost) calls inside one system.multicall."""
+    name = "xmlrpc"
+    can_update = True
+
+    def __init__(self, config: WordPressConfig):
+        super().__init__(config)
+        self.batch_size = config.batch_size
+        self.password = config.app_password or config.password
+        transport = _TimeoutTransport(
+            config.http_timeout, use_https=config.url.startswith("https")
+        )
+        self.server = xmlrpc.client.ServerProxy(
+            f"{config.url.rstrip('/')}/xmlrpc.php", transport=transport, allow_none=True
+        )
+        self.media = MediaIndex(self._load_media, config.taxonomy_ttl)
+        self.retry = site_policy(config)
+
+    @timed_stage("login")
+    def setup(self) -> bool:
+        """Verify the credentials with a single wp.getUsersBlogs call."""
+        try:
+            self.retry.call(self.server.wp.getUsersBlogs, self.config.username, self.password)
+            logging.info("Authenticated to XML-RPC as %s", self.config.username)
+            return True
+        except Exception as e:
+            logging.error("XML-RPC authentication failed: %s", e)
+            return False
+
+    def _load_media(self) -> List[dict]:
+        """Load the image library, newest first, for the media index."""
+        items = []
+        page_size = 100
+        while True:
+            page = self.retry.call(
+                self.server.wp.getMediaLibrary, 0, self.config.username, self.password,
+                {"number": page_size, "offset": len(items), "mime_type": "image"}
+            )
+            items.extend(
+                {"id": int(item["attachment_id"]), "filename": item.get("link", "")}
+                for item in page
+            )
+            if len(page) < page_size:
+                return items
+
+    def build_content(self, post_config: PostConfig) -> dict:
+        """Translate a PostConfig into a wp.newPost content struct."""
+        content = {
+            "post_type": "post",
+            "post_title": post_config.title,
+            "post_content": post_config.content,
+            "post_status": post_config.wordpress_status(),
+        }
+        if post_config.slug:
+            content["post_name"] = post_config.slug
+        if post_config.publish_date is not None:
+            content["post_date_gmt"] = xmlrpc.client.DateTime(post_config.publish_date_gmt())
+
+        terms_names = {}
+        if post_config.category:
+            terms_names["category"] = [post_config.category]
+        if post_config.tags:
+            terms_names["post_tag"] = split_tags(post_config.tags)
+        if terms_names:
+            content["terms_names"] = terms_names
+
+        if post_config.image_reference is not None:
+            media_id = self.media.resolve(post_config.image_reference)
+            if media_id is not None:
+                content["post_thumbnail"] = media_id
+
+        return content
+
+    def publish(self, post_config: PostConfig) -> PublishResult:
+        return self.publish_batch([post_config])[0]
+
+    @timed_stage("publish")
+    def publish_batch(self, post_configs: List[PostConfig]) -> List[PublishResult]:
+        results: List[Optional[PublishResult]] = [None] * len(post_configs)
+        multicall = xmlrpc.client.MultiCall(self.server)
+        positions = []
+
+        for i, post_config in enumerate(post_configs):
+            try:
+                content = self.build_content(post_config)
+            except Exception as e:
+                logging.error("Failed to prepare post %s: %s", post_config.title, e)
+                results[i] = PublishResult(False, error=str(e))
+                continue
+            if post_config.post_id is not None:
+                multicall.wp.editPost(
+                    0, self.config.username, self.password, post_config.post_id, content
+                )
+            else:
+                multicall.wp.newPost(0, self.config.username, self.password, content)
+            positions.append(i)
+
+        if positions:
+            self._send_multicall(
+                post_configs, multicall, positions, results,
+                idempotent=all(post_config.post_id is not None for post_config in post_configs)
+            )
+        return results
+
+    def _send_multicall(self, post_configs: List[PostConfig], multicall: xmlrpc.client.MultiCall,
+                        positions: List[int], results: List[Optional[PublishResult]],
+                        idempotent: bool, action: str = "publish"):
+        """Send a multicall of post writes and fill in the result of each post at its position."""
+        retry_after = None
+        try:
+            # Raw per-call results: [value] on success, a fault struct on failure
+            responses = self.retry.call(multicall, idempotent=idempotent).results
+        except Exception as e:
+            logging.error("Multicall request failed: %s", e)
+            responses = [{"faultString": str(e)}] * len(positions)
+            retry_after = retry_after_from(e)
+
+        for i, response in zip(positions, responses):
+            if isinstance(response, list):
+                # wp.newPost returns the new ID, wp.editPost just true
+                post_id = post_configs[i].post_id or int(response[0])
+                logging.info(
+                    "Successfully %s post: %s (ID %s)", _past(action), post_configs[i].title, post_id
+                )
+                results[i] = PublishResult(True, post_id=post_id, status=post_configs[i].wordpress_status())
+            else:
+                error = response.get("faultString", "Unknown XML-RPC fault")
+                logging.error("Failed to %s post %s: %s", action, post_configs[i].title, error)
+                results[i] = PublishResult(False, error=error, retry_after=retry_after)
+
+    @staticmethod
+    def _existing_post(struct: dict) -> ExistingPost:
+        """Read a wp.getPost struct into the form build_content produces."""
+        thumbnail = struct.get("post_thumbnail") or {}
+        terms_names: Dict[str, List[str]] = {CATEGORY: [], TAG: []}
+        for term in struct.get("terms") or []:
+            if term.get("taxonomy") in terms_names:
+                terms_names[term["taxonomy"]].append(term["name"])
+        return ExistingPost(int(struct["post_id"]), struct.get("post_name", ""), {
+            "post_title": struct.get("post_title"),
+            "post_content": struct.get("post_content"),
+            "post_status": struct.get("post_status"),
+            "post_thumbnail": int(thumbnail["attachment_id"]) if thumbnail else 0,
+            "terms_names": terms_names,
+        })
+
+    def fetch_posts(self, post_ids: List[int], slugs: List[str]) -> List[ExistingPost]:
+        posts: Dict[int, ExistingPost] = {}
+        for start in range(0, len(post_ids), FETCH_CHUNK_SIZE):
+            multicall = xmlrpc.client.MultiCall(self.server)
+            for post_id in post_ids[start:start + FETCH_CHUNK_SIZE]:
+                multicall.wp.getPost(
+                    0, self.config.username, self.password, post_id, XMLRPC_FETCH_FIELDS
+                )
+            for response in self.retry.call(multicall).results:
+                # Posts deleted since they were recorded come back as faults
+                if isinstance(response, list):
+                    post = self._existing_post(response[0])
+                    posts[post.post_id] = post
+
+        # wp.getPosts can't filter by slug, so page through the site until every slug is found
+        wanted = set(slugs) - {post.slug for post in posts.values()}
+        offset = 0
+        while wanted:
+            page = self.retry.call(
+                self.server.wp.getPosts, 0, self.config.username, self.password,
+                {"number": FETCH_CHUNK_SIZE, "offset": offset}, XMLRPC_FETCH_FIELDS
+            )
+            for struct in page:
+                if struct.get("post_name") in wanted:
+                    post = self._existing_post(struct)
+                    posts[post.post_id] = post
+                    wanted.discard(post.slug)
+            if len(page) < FETCH_CHUNK_SIZE:
+                break
+            offset += len(page)
+        return list(posts.values())
+
+    def diff_post(self, post_config: PostConfig, existing: ExistingPost) -> dict:
+        content = self.build_content(post_config)
+        changes = {
+            key: content[key] for key in XMLRPC_UPDATE_FIELDS
+            if key in content and existing.fields.get(key) != content[key]
+        }
+        terms_names = {
+            taxonomy: names for taxonomy, names in content.get("terms_names", {}).items()
+            if {term_key(name) for name in names}
+            != {term_key(name) for name in existing.fields["terms_names"].get(taxonomy, [])}
+        }
+        if terms_names:
+            # wp.editPost replaces the terms of the taxonomies given and keeps the rest
+            changes["terms_names"] = terms_names
+        return changes
+
+    @timed_stage("publish")
+    def update_batch(self, updates: List[Tuple[PostConfig, dict]]) -> List[PublishResult]:
+        results: List[Optional[PublishResult]] = [None] * len(updates)
+        multicall = xmlrpc.client.MultiCall(self.server)
+        for post_config, changes in updates:
+            multicall.wp.editPost(
+                0, self.config.username, self.password, post_config.post_id, changes
+            )
+        self._send_multicall(
+            [post_config for post_config, _ in updates], multicall,
+            list(range(len(updates))), results, idempotent=True, action="update"
+        )
+        return results
+
+    def cleanup(self):
+        self.server("close")()
+
+
+PUBLISHERS = {
+    SeleniumPublisher.name: SeleniumPublisher,
+    RestPublisher.name: RestPublisher,
+    RestBatchPublisher.name: RestBatchPublisher,
+    XmlRpcBatchPublisher.name: XmlRpcBatchPublisher,
+}
+
+
+def create_publisher(config: WordPressConfig) -> Publisher:
+    """Create the publishing backend selected in the configuration."""
+    try:
+        publisher_class = PUBLISHERS[config.backend]
+    except KeyError:
+        raise ValueError(f"Unknown publishing backend: {config.backend}")
+    return publisher_class(config)
@@ -0,0 +1,321 @@
+"""
+Retries for WordPress automation.
+Exponential backoff with jitter, a per-run retry budget, classification of the
+errors worth retrying, and a circuit breaker that pauses every request to a site
+while it is down instead of letting each queued post use up its retries.
+"""
+import sys
+import time
+import random
+import logging
+import threading
+import xmlrpc.client
+from typing import Callable, Dict, Optional, TypeVar
+
+import requests
+
+from config import WordPressConfig
+from concurrency import retry_after_from
+from metrics import REGISTRY
+
+# Error kinds
+# The site did not take the request (refused connection, 429, 503): any request can be resent
+REFUSED = "refused"
+# The request failed in a way that may have been processed (other 5xx, timeouts): resend if idempotent
+TRANSIENT = "transient"
+# A flaky browser step: resend
+UI = "ui"
+# Anything else: retrying won't help
+FATAL = "fatal"
+
+REFUSED_STATUSES = {429, 503}
+TRANSIENT_STATUSES = {408, 425, 500, 502, 504}
+
+# Selenium exceptions counted as flaky browser steps
+UI_ERROR_NAMES = (
+    "TimeoutException",
+    "StaleElementReferenceException",
+    "ElementClickInterceptedException",
+    "NoSuchElementException",
+)
+
+# Circuit breaker states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+RETRIES = REGISTRY.counter("wp_retries", "Retried calls, by the kind of error retried.", ("kind",))
+BREAKER_TRIPS = REGISTRY.counter(
+    "wp_circuit_breaker_trips", "Times requests were paused because the site seemed down."
+)
+
+T = TypeVar("T")
+
+
+class RetryableError(Exception):
+    """Raised by a step that failed in a way worth trying again."""
+
+
+def _ui_errors() -> tuple:
+    """
+    The Selenium exception classes in UI_ERROR_NAMES.
+
+    Looked up only once the Selenium backend has loaded them, so API-only runs
+    never import the browser stack; before that no such error can be raised.
+    """
+    exceptions = sys.modules.get("selenium.common.exceptions")
+    if exceptions is None:
+        return ()
+    return tuple(getattr(exceptions, name) for name in UI_ERROR_NAMES)
+
+
+def _status(error: Exception) -> Optional[int]:
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return error.response.status_code
+    if isinstance(error, xmlrpc.client.ProtocolError):
+        return error.errcode
+    return None
+
+
+def classify(error: Exception) -> str:
+    """The kind of an error: REFUSED, TRANSIENT, UI or FATAL."""
+    status = _status(error)
+    if status is not None:
+        if status in REFUSED_STATUSES:
+            return REFUSED
+        return TRANSIENT if status in TRANSIENT_STATUSES else FATAL
+    if isinstance(error, (requests.ConnectTimeout, ConnectionRefusedError)):
+        return REFUSED
+    if isinstance(error, requests.ConnectionError) and "NewConnectionError" in repr(error):
+        return REFUSED
+    if isinstance(error, (requests.ConnectionError, requests.Timeout, ConnectionError, TimeoutError)):
+        return TRANSIENT
+    if isinstance(error, (RetryableError,) + _ui_errors()):
+        return UI
+    return FATAL
+
+
+def is_site_down(error: Exception) -> bool:
+    """Whether an error says the site itself is failing, rather than one request."""
+    kind = classify(error)
+    return kind == TRANSIENT or (kind == REFUSED and _status(error) != 429)
+
+
+class Backoff:
+    """Exponential delays with equal jitter: half the delay is fixed, half random."""
+
+    def __init__(self, base: float = 1.0, cap: float = 30.0, rng: Optional[random.Random] = None):
+        self.base = base
+        self.cap = cap
+        self.rng = rng or random.Random()
+
+    def delay(self, retry: int) -> float:
+        """Seconds to wait before retry number retry (0 for the first)."""
+        ceiling = min(self.cap, self.base * 2 ** retry)
+        return ceiling / 2 + self.rng.uniform(0, ceiling / 2)
+
+
+class RetryBudget:
+    """
+    Caps retries at a fraction of all calls, plus a few to start with.
+
+    When the site fails every request, retrying each one multiplies the load;
+    once the budget is spent, failures are returned right away.
+    """
+
+    def __init__(self, ratio: float = 0.2, minimum: int = 10):
+        self.ratio = ratio
+        self.minimum = minimum
+        self.calls = 0
+        self.retries = 0
+        self.denied = 0
+        self._lock = threading.Lock()
+
+    def record_call(self):
+        with self._lock:
+            self.calls += 1
+
+    def try_spend(self) -> bool:
+        """Take one retry from the budget, if any is left."""
+        with self._lock:
+            if self.retries < self.minimum + self.ratio * self.calls:
+                self.retries += 1
+                return True
+            if not self.denied:
+                logging.warning("Retry budget spent: %s retries for %s calls", self.retries, self.calls)
+            self.denied += 1
+            return False
+
+
+class CircuitBreaker:
+    """
+    Pauses every caller once failure_threshold calls in a row find the site down.
+
+    After reset_timeout seconds one caller is let through as a probe. If it
+    succeeds everyone resumes; if not, the pause starts again, twice as long,
+    up to max_reset_timeout.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 max_reset_timeout: float = 300.0):
+        self.failure_threshold = failure_threshold
+        self.base_reset_timeout = reset_timeout
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.paused_seconds = 0.0
+        self._opened_at = 0.0
+        self._probing = False
+        self._condition = threading.Condition()
+
+    def wait(self):
+        """Block while the breaker is open, or while another caller is probing the site."""
+        with self._condition:
+            while True:
+                if self.state == CLOSED:
+                    return
+                if self.state == OPEN:
+                    remaining = self._opened_at + self.reset_timeout - time.monotonic()
+                    if remaining > 0:
+                        self._condition.wait(remaining)
+                        continue
+                    self.state = HALF_OPEN
+                    self.paused_seconds += time.monotonic() - self._opened_at
+                if not self._probing:
+                    self._probing = True
+                    logging.info("Probing whether the site is back")
+                    return
+                self._condition.wait()
+
+    def record_success(self):
+        with self._condition:
+            if self.state != CLOSED:
+                logging.info("Site is responding again; resuming")
+            self.state = CLOSED
+            self.failures = 0
+            self.reset_timeout = self.base_reset_timeout
+            self._probing = False
+            self._condition.notify_all()
+
+    def record_failure(self):
+        with self._condition:
+            self.failures += 1
+            if self.state == HALF_OPEN:
+                self.reset_timeout = min(self.reset_timeout * 2, self.max_reset_timeout)
+                self._open()
+            elif self.state == CLOSED and self.failures >= self.failure_threshold:
+                self._open()
+
+    def _open(self):
+        self.state = OPEN
+        self.trips += 1
+        self._opened_at = time.monotonic()
+        self._probing = False
+        BREAKER_TRIPS.inc()
+        logging.warning(
+            "Site appears to be down after %s failures in a row; pausing all requests for %.0fs",
+            self.failures, self.reset_timeout
+        )
+        self._condition.notify_all()
+
+
+def _describe(func: Callable) -> str:
+    # XML-RPC proxies answer any attribute, so __name__ may not be a string
+    name = getattr(func, "__name__", None)
+    return name if isinstance(name, str) else type(func).__name__
+
+
+class RetryPolicy:
+    """
+    Calls a function until it succeeds, a non-retryable error occurs or attempts run out.
+
+    With a budget, every retry must be paid for from it; with a breaker, every
+    attempt waits while the site is down and reports whether the site answered.
+    """
+
+    def __init__(self, attempts: int = 3, backoff: Optional[Backoff] = None,
+                 budget: Optional[RetryBudget] = None,
+                 breaker: Optional[CircuitBreaker] = None):
+        # Every call is tried at least once
+        self.attempts = max(1, attempts)
+        self.backoff = backoff or Backoff()
+        self.budget = budget
+        self.breaker = breaker
+
+    def call(self, func: Callable[..., T], *args, idempotent: bool = True, **kwargs) -> T:
+        """
+        Call func(*args, **kwargs), retrying errors classify() says are worth it.
+
+        TRANSIENT errors are only retried when idempotent is true, since the
+        failed request may already have taken effect.
+        """
+        if self.budget:
+            self.budget.record_call()
+        for attempt in range(self.attempts):
+            if self.breaker:
+                self.breaker.wait()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                if self.breaker:
+                    if is_site_down(e):
+                        self.breaker.record_failure()
+                    else:
+                        self.breaker.record_success()
+                kind = classify(e)
+                retryable = kind in (REFUSED, UI) or (kind == TRANSIENT and idempotent)
+                if (not retryable or attempt == self.attempts - 1
+                        or (self.budget and not self.budget.try_spend())):
+                    raise
+                delay = max(self.backoff.delay(attempt), retry_after_from(e) or 0.0)
+                RETRIES.inc(kind)
+                logging.warning(
+                    "Attempt %s of %s for %s failed (%s): %s; retrying in %.1fs",
+                    attempt + 1, self.attempts, _describe(func), kind, e, delay
+                )
+                time.sleep(delay)
+            else:
+                if self.breaker:
+                    self.breaker.record_success()
+                return result
+
+    def log_summary(self, name: str):
+        """Log the retries spent and the time the breaker kept the site paused."""
+        if self.budget and (self.budget.retries or self.budget.denied):
+            logging.info(
+                "%s: %s retries over %s calls, %s refused by the retry budget",
+                name, self.budget.retries, self.budget.calls, self.budget.denied
+            )
+        if self.breaker and self.breaker.trips:
+            logging.info(
+                "%s: paused %s times for %.0fs while the site was down",
+                name, self.breaker.trips, self.breaker.paused_seconds
+            )
+
+
+# One policy per site, so every worker and thread shares its budget and breaker
+_site_policies: Dict[str, RetryPolicy] = {}
+_site_policies_lock = threading.Lock()
+
+
+def site_policy(config: WordPressConfig) -> RetryPolicy:
+    """The retry policy shared by every request to the configured site."""
+    with _site_policies_lock:
+        if config.url not in _site_policies:
+            _site_policies[config.url] = RetryPolicy(
+                config.retry_attempts,
+                Backoff(config.retry_base_delay, config.retry_max_delay),
+                RetryBudget(config.retry_budget_ratio),
+                CircuitBreaker(config.breaker_threshold, config.breaker_reset_timeout),
+            )
+        return _site_policies[config.url]
+
+
+def log_summary():
+    """Log the retry and breaker counts of every site used in this run."""
+    with _site_policies_lock:
+        policies = list(_site_policies.items())
+    for url, policy in policies:
+        policy.log_summary(url)
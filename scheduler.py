@@ -0,0 +1,181 @@
+"""
+Publish scheduler for WordPress automation.
+Holds post files whose publish_date is far ahead in a time-ordered heap, persisted
+as a JSON lines log, and releases each one shortly before it is due.
+"""
+import os
+import json
+import time
+import heapq
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from parser import PostParser
+
+# Rewrite the log once it holds this many times more records than there are live entries
+COMPACT_RATIO = 4
+COMPACT_MIN_RECORDS = 1000
+
+FileSignature = Tuple[int, int]
+
+
+def file_signature(file_path: str) -> Optional[FileSignature]:
+    """Size and modification time of a file, or None if it is gone."""
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+class Scheduler:
+    """
+    Files waiting for their release time.
+
+    Every add and release is appended to a JSON lines log, so a restarted daemon
+    knows which files it is holding without reading them again. The log is
+    compacted when superseded records pile up.
+    """
+
+    def __init__(self, path: str = ""):
+        """
+        Args:
+            path: JSON lines file the schedule is kept in; empty keeps it in memory only
+        """
+        self.path = path
+        # file path -> (release time, file signature when it was scheduled)
+        self._entries: Dict[str, Tuple[float, FileSignature]] = {}
+        # (release time, file path); entries replaced since are skipped when popped
+        self._heap: List[Tuple[float, str]] = []
+        self._records = 0
+        self._file = None
+
+        if path:
+            self._load()
+            self._file = open(path, 'a', encoding='utf-8')
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # A torn final line from a crash mid-write
+                        continue
+                    self._records += 1
+                    if record.get("release") is None:
+                        self._entries.pop(record["file"], None)
+                    else:
+                        self._entries[record["file"]] = (record["release"], tuple(record["sig"]))
+        except FileNotFoundError:
+            return
+        self._heap = [(release, path) for path, (release, _) in self._entries.items()]
+        heapq.heapify(self._heap)
+        if self._entries:
+            logging.info("Loaded %s scheduled posts from %s", len(self._entries), self.path)
+
+    def _append(self, record: dict):
+        if self._file is None:
+            return
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+        self._records += 1
+        if self._records > max(COMPACT_MIN_RECORDS, COMPACT_RATIO * len(self._entries)):
+            self._compact()
+
+    def _compact(self):
+        """Rewrite the log with one record per live entry."""
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            for path, (release, signature) in self._entries.items():
+                f.write(json.dumps({"file": path, "release": release, "sig": signature}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._file.close()
+        os.replace(temp_path, self.path)
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._records = len(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def is_scheduled(self, file_path: str) -> bool:
+        """Whether the file is held, unchanged since it was scheduled."""
+        entry = self._entries.get(file_path)
+        return entry is not None and entry[1] == file_signature(file_path)
+
+    def add(self, file_path: str, release_at: float):
+        """Hold a file until release_at (a Unix time), replacing any earlier schedule for it."""
+        signature = file_signature(file_path)
+        if signature is None:
+            return
+        self._entries[file_path] = (release_at, signature)
+        heapq.heappush(self._heap, (release_at, file_path))
+        self._append({"file": file_path, "release": release_at, "sig": signature})
+
+    def remove(self, file_path: str):
+        if self._entries.pop(file_path, None) is not None:
+            self._append({"file": file_path, "release": None})
+
+    def next_release(self) -> Optional[float]:
+        """Unix time of the earliest release, or None if nothing is scheduled."""
+        while self._heap:
+            release_at, path = self._heap[0]
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == release_at:
+                return release_at
+            heapq.heappop(self._heap)
+        return None
+
+    def pop_due(self, now: float) -> List[str]:
+        """Release every file due by now that still exists, earliest first."""
+        due = []
+        while True:
+            release_at = self.next_release()
+            if release_at is None or release_at > now:
+                break
+            _, path = heapq.heappop(self._heap)
+            self.remove(path)
+            if os.path.exists(path):
+                due.append(path)
+            else:
+                logging.info("Scheduled file %s is gone; dropping it", os.path.basename(path))
+        return due
+
+    def hold_future(self, files: List[str], lead_time: float, now: float) -> List[str]:
+        """
+        Schedule the files whose publish_date is more than lead_time seconds away.
+
+        Returns the files to publish now. A file released lead_time before its
+        date is submitted as a scheduled post, and WordPress publishes it on time.
+        """
+        ready = []
+        for path in files:
+            if self.is_scheduled(path):
+                continue
+            try:
+                publish_date = PostParser(path).read_publish_date()
+            except Exception:
+                # Let the normal parse report what is wrong with the file
+                publish_date = None
+            release_at = publish_date.timestamp() - lead_time if publish_date else now
+            if release_at > now:
+                self.add(path, release_at)
+                logging.info(
+                    "Holding %s until %s; it publishes at %s", os.path.basename(path),
+                    time.strftime("%Y-%m-%d %H:%M", time.localtime(release_at)),
+                    publish_date.strftime("%Y-%m-%d %H:%M %Z")
+                )
+            else:
+                # No longer scheduled if it was edited to publish now
+                self.remove(path)
+                ready.append(path)
+        return ready
+
+    def close(self):
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
@@ -0,0 +1,89 @@
+"""
+On-disk cache of authenticated WordPress sessions.
+Lets a run reuse the cookies of a previous login instead of submitting the login form again.
+"""
+import os
+import json
+import time
+import logging
+import threading
+from typing import List, Optional
+
+# Shared by every SessionCache so parallel workers don't interleave writes
+_cache_lock = threading.Lock()
+
+
+class SessionCache:
+    """Stores login cookies and the REST nonce per site and user, with an expiry."""
+
+    def __init__(self, path: str, ttl: int):
+        """
+        Args:
+            path: JSON file holding the cached sessions
+            ttl: Maximum age of a cached session in seconds
+        """
+        self.path = path
+        self.ttl = ttl
+
+    @staticmethod
+    def _key(url: str, username: str) -> str:
+        return f"{username}@{url.rstrip('/')}"
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logging.warning("Ignoring unreadable session cache %s: %s", self.path, e)
+            return {}
+
+    def _write(self, sessions: dict):
+        # Write to a private temp file and swap it in, so readers never see half a file
+        tmp_path = f"{self.path}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(sessions, f)
+        os.replace(tmp_path, self.path)
+
+    def load(self, url: str, username: str) -> Optional[dict]:
+        """Return the cached session for a site and user, or None if missing or expired."""
+        with _cache_lock:
+            session = self._read().get(self._key(url, username))
+        if not session or session.get("expires_at", 0) <= time.time():
+            return None
+        return session
+
+    def save(self, url: str, username: str, cookies: List[dict], nonce: Optional[str] = None):
+        """Cache the cookies of a fresh login."""
+        expires_at = time.time() + self.ttl
+        # Never outlive the login cookies themselves
+        cookie_expiries = [
+            c["expiry"] for c in cookies
+            if c.get("expiry") and c["name"].startswith("wordpress_logged_in")
+        ]
+        if cookie_expiries:
+            expires_at = min(expires_at, min(cookie_expiries))
+
+        with _cache_lock:
+            sessions = self._read()
+            sessions[self._key(url, username)] = {
+                "cookies": cookies,
+                "nonce": nonce,
+                "expires_at": expires_at,
+            }
+            try:
+                self._write(sessions)
+            except OSError as e:
+                logging.warning("Could not write session cache %s: %s", self.path, e)
+
+    def invalidate(self, url: str, username: str):
+        """Drop the cached session for a site and user."""
+        with _cache_lock:
+            sessions = self._read()
+            if sessions.pop(self._key(url, username), None) is not None:
+                try:
+                    self._write(sessions)
+                except OSError as e:
+                    logging.warning("Could not write session cache %s: %s", self.path, e)
@@ -0,0 +1,102 @@
+"""
+Taxonomy cache for WordPress automation.
+Resolves category and tag names to term IDs with one load per run.
+"""
+import html
+import time
+import logging
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from parser import PostParser
+from utils import split_tags
+
+TermMaps = Tuple[Dict[str, int], Dict[str, int]]
+
+CATEGORY = "category"
+TAG = "post_tag"
+
+
+def term_key(name: str) -> str:
+    """Normalize a term name for lookups (WordPress matches names case-insensitively)."""
+    return html.unescape(name).strip().casefold()
+
+
+def collect_terms(file_paths: Iterable[str]) -> Tuple[List[str], List[str]]:
+    """The categories and tags named by these post files, read from their metadata alone."""
+    categories: List[str] = []
+    tags: List[str] = []
+    for file_path in file_paths:
+        try:
+            category, file_tags = PostParser(file_path).read_terms()
+        except (OSError, ValueError) as e:
+            # Reported again, and the file routed to failed/, when it is parsed for publishing
+            logging.debug("Could not read the terms of %s: %s", file_path, e)
+            continue
+        if category:
+            categories.append(category)
+        if file_tags:
+            tags.extend(split_tags(file_tags))
+    return categories, tags
+
+
+class TaxonomyCache:
+    """Name to ID maps for categories and tags, reloaded once they are older than ttl."""
+
+    def __init__(self, loader: Callable[[], TermMaps], ttl: float):
+        """
+        Args:
+            loader: Returns (categories, tags) as {name: id} maps, from the REST API or editor DOM
+            ttl: Seconds before the maps are loaded again
+        """
+        self.loader = loader
+        self.ttl = ttl
+        self._terms: Dict[str, Dict[str, int]] = {CATEGORY: {}, TAG: {}}
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.RLock()
+
+    def _ensure_loaded(self):
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl:
+            return
+        categories, tags = self.loader()
+        self._terms = {
+            CATEGORY: {term_key(name): term_id for name, term_id in categories.items()},
+            TAG: {term_key(name): term_id for name, term_id in tags.items()},
+        }
+        self._loaded_at = time.monotonic()
+        logging.info(
+            "Loaded %s categories and %s tags", len(self._terms[CATEGORY]), len(self._terms[TAG])
+        )
+
+    def get(self, taxonomy: str, name: str) -> Optional[int]:
+        """Look up a term ID by name."""
+        with self._lock:
+            self._ensure_loaded()
+            return self._terms[taxonomy].get(term_key(name))
+
+    def category_id(self, name: str) -> Optional[int]:
+        return self.get(CATEGORY, name)
+
+    def tag_id(self, name: str) -> Optional[int]:
+        return self.get(TAG, name)
+
+    def add(self, taxonomy: str, name: str, term_id: int):
+        """Record a newly created term."""
+        with self._lock:
+            self._terms[taxonomy][term_key(name)] = term_id
+
+    def missing(self, taxonomy: str, names: Iterable[str]) -> List[str]:
+        """Names not yet known to the cache, without duplicates."""
+        with self._lock:
+            self._ensure_loaded()
+            missing = {}
+            for name in names:
+                key = term_key(name)
+                if key not in self._terms[taxonomy] and key not in missing:
+                    missing[key] = name
+            return list(missing.values())
+
+    def invalidate(self):
+        """Force a reload on the next lookup."""
+        with self._lock:
+            self._loaded_at = None
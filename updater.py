@@ -0,0 +1,204 @@
+"""
+Update mode for WordPress automation.
+Matches post files to the posts already on the site, by the publish ledger or by
+slug, fetches those posts in bulk and sends only the fields that changed.
+Posts that already match their file are not sent at all.
+"""
+import os
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from config import WordPressConfig, PostConfig
+from parse_cache import open_parse_cache
+from pipeline import parse_files
+from ledger import open_ledger, post_hash
+from publishers import ExistingPost, Publisher, PublishResult, create_publisher
+from metrics import count_post, stage
+from logging_setup import log_context
+from utils import move_file
+
+# Parsed files matched against the site per round of fetches
+MATCH_CHUNK_SIZE = 100
+
+ParsedPost = Tuple[str, PostConfig]
+
+
+class PostUpdater:
+    """Brings existing posts in line with their files, one chunk of files at a time."""
+
+    def __init__(self, publisher: Publisher, processed_dir: str, failed_dir: str):
+        self.publisher = publisher
+        self.processed_dir = processed_dir
+        self.failed_dir = failed_dir
+        self.ledger = open_ledger(publisher.config)
+        self.counts = {"updated": 0, "unchanged": 0, "created": 0, "failed": 0}
+
+    def _known_post_id(self, post_config: PostConfig) -> Optional[int]:
+        """The post ID the ledger recorded for this content or slug, if any."""
+        if not self.ledger:
+            return None
+        entry = self.ledger.find(post_hash(post_config), post_config.slug)
+        return entry.post_id if entry else None
+
+    def _match(self, chunk: List[ParsedPost]) -> Dict[str, ExistingPost]:
+        """Fetch the existing post of each file in the chunk, keyed by file path."""
+        known_ids = {path: self._known_post_id(post_config) for path, post_config in chunk}
+        slugs = [
+            post_config.slug for path, post_config in chunk
+            if post_config.slug and known_ids[path] is None
+        ]
+        post_ids = sorted({post_id for post_id in known_ids.values() if post_id is not None})
+        with stage("fetch"):
+            existing = self.publisher.fetch_posts(post_ids, slugs)
+        by_id = {post.post_id: post for post in existing}
+        by_slug = {post.slug: post for post in existing}
+
+        matches = {}
+        for path, post_config in chunk:
+            # A recorded post that was deleted since falls back to its slug
+            post = by_id.get(known_ids[path]) or by_slug.get(post_config.slug)
+            if post is not None:
+                matches[path] = post
+        return matches
+
+    def _route(self, file_path: str, success: bool):
+        """Move a source file to the processed or failed directory; move_file logs failures."""
+        target_dir = self.processed_dir if success else self.failed_dir
+        try:
+            with stage("move"):
+                move_file(file_path, os.path.join(target_dir, os.path.basename(file_path)))
+        except OSError:
+            pass
+
+    def _finish(self, file_path: str, post_config: PostConfig,
+                result: PublishResult, outcome: str):
+        """Record a result in the ledger, route the file and count it."""
+        with log_context(file_path):
+            if self.ledger and result:
+                try:
+                    self.ledger.record_result(post_config, result)
+                except Exception as e:
+                    logging.error("Error recording %s in the ledger: %s", post_config.title, e)
+            self._route(file_path, bool(result))
+            outcome = outcome if result else "failed"
+            self.counts[outcome] += 1
+            count_post(outcome)
+
+    def _send(self, send, items: List[Tuple[str, PostConfig, object]], outcome: str):
+        """Send items in groups of the backend's batch size and finish each file."""
+        batch_size = self.publisher.batch_size
+        for start in range(0, len(items), batch_size):
+            group = items[start:start + batch_size]
+            try:
+                results = send([item for _, _, item in group])
+            except Exception as e:
+                logging.error("Error sending batch: %s", e)
+                results = [PublishResult(False, error=str(e))] * len(group)
+            for (file_path, post_config, _), result in zip(group, results):
+                self._finish(file_path, post_config, result, outcome)
+
+    def update_chunk(self, chunk: List[ParsedPost]):
+        """Diff a chunk of parsed files against the site and send what changed."""
+        try:
+            matches = self._match(chunk)
+        except Exception as e:
+            logging.error("Error fetching existing posts: %s", e)
+            for file_path, post_config in chunk:
+                self._finish(file_path, post_config, PublishResult(False, error=str(e)), "failed")
+            return
+
+        updates = []
+        creates = []
+        for file_path, post_config in chunk:
+            with log_context(file_path):
+                existing = matches.get(file_path)
+                if existing is None:
+                    logging.info("No existing post for %s; creating it", post_config.title)
+                    creates.append((file_path, post_config, post_config))
+                    continue
+
+                post_config.post_id = existing.post_id
+                try:
+                    changes = self.publisher.diff_post(post_config, existing)
+                except Exception as e:
+                    logging.error("Error comparing %s: %s", post_config.title, e)
+                    self._finish(file_path, post_config, PublishResult(False, error=str(e)), "failed")
+                    continue
+                if not changes:
+                    logging.info("Post %s is up to date: %s", existing.post_id, post_config.title)
+                    self._finish(file_path, post_config, PublishResult(
+                        True, post_id=existing.post_id, status=post_config.wordpress_status()
+                    ), "unchanged")
+                    continue
+                logging.info(
+                    "Post %s changed in %s: %s", existing.post_id, ", ".join(changes), post_config.title
+                )
+                updates.append((file_path, post_config, (post_config, changes)))
+
+        self._send(self.publisher.update_batch, updates, "updated")
+        self._send(self.publisher.publish_batch, creates, "created")
+
+    def run(self, files: List[str]):
+        """Parse the files and update their posts, MATCH_CHUNK_SIZE files at a time."""
+        config = self.publisher.config
+        chunk: List[ParsedPost] = []
+        for parsed in parse_files(files, config.parse_workers, open_parse_cache(config)):
+            if parsed is None:
+                continue
+            file_path, post_config, error = parsed
+            if error is not None:
+                with log_context(file_path):
+                    logging.error("Error processing %s: %s", os.path.basename(file_path), error)
+                    self.counts["failed"] += 1
+                    count_post("failed")
+                    self._route(file_path, False)
+                continue
+            chunk.append((file_path, post_config))
+            if len(chunk) >= MATCH_CHUNK_SIZE:
+                self.update_chunk(chunk)
+                chunk = []
+        if chunk:
+            self.update_chunk(chunk)
+
+    def log_summary(self):
+        logging.info(
+            "Update: %s updated, %s unchanged, %s created, %s failed",
+            self.counts["updated"], self.counts["unchanged"],
+            self.counts["created"], self.counts["failed"]
+        )
+
+
+def run_update(config: WordPressConfig) -> Optional[Tuple[int, int]]:
+    """
+    Update the posts of every file in the input directory.
+
+    Returns (successful, failed) file counts, or None if login fails.
+    """
+    publisher = create_publisher(config)
+    if not publisher.can_update:
+        logging.error("Update mode needs an API backend (rest, rest-batch or xmlrpc)")
+        return None
+
+    try:
+        if not publisher.setup():
+            logging.error("Failed to login to WordPress")
+            return None
+
+        files = [
+            os.path.join(config.input_dir, f)
+            for f in os.listdir(config.input_dir) if f.endswith('.txt')
+        ]
+        if not files:
+            logging.info("No .txt files found to process")
+            return 0, 0
+
+        logging.info("Found %s files to update with %s backend", len(files), publisher.name)
+        publisher.prepare_terms(files)
+        updater = PostUpdater(publisher, config.processed_dir, config.failed_dir)
+        updater.run(files)
+        updater.log_summary()
+        failed = updater.counts["failed"]
+        return len(files) - failed, failed
+
+    finally:
+        publisher.cleanup()
@@ -1,65 +1,36 @@
 """
 Utility functions for WordPress automation.
-Includes decorators, logging, and error handling.
+Includes decorators and error handling.
 """
 import os
 import time
 import logging
 import functools
 from typing import Callable, Any
-from selenium.common.exceptions import (
-    TimeoutException,
-    StaleElementReferenceException,
-    ElementClickInterceptedException,
-    NoSuchElementException
-)
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('wordpress_automation.log'),
-        logging.StreamHandler()
-    ]
-)
+from resilience import Backoff, RetryPolicy
 
 def retry_on_failure(max_attempts: int = 3, delay: float = 1.0):
     """
     Decorator to retry a function on failure.
     
+    Retries the errors resilience.classify() counts as retryable, waiting
+    exponentially longer (with jitter) before each new attempt.
+    
     Args:
-        max_attempts: Maximum number of retry attempts
-        delay: Delay between retries in seconds
+        max_attempts: Maximum number of attempts
+        delay: Base delay before the first retry in seconds
     """
+    policy = RetryPolicy(max_attempts, Backoff(base=delay))
+    
     def decorator(func: Callable) -> Callable:
         @functools.wraps(func)
         def wrapper(*args, **kwargs) -> Any:
-            last_exception = None
-            
-            for attempt in range(max_attempts):
-                try:
-                    return func(*args, **kwargs)
-                except (TimeoutException, 
-                       StaleElementReferenceException,
-                       ElementClickInterceptedException,
-                       NoSuchElementException) as e:
-                    last_exception = e
-                    if attempt < max_attempts - 1:
-                        logging.warning(
-                            f"Attempt {attempt + 1} failed for {func.__name__}: {str(e)}"
-                            f"\nRetrying in {delay} seconds..."
-                        )
-                        time.sleep(delay)
-                    continue
-                except Exception as e:
-                    logging.error(f"Unexpected error in {func.__name__}: {str(e)}")
-                    raise e
-                    
-            logging.error(
-                f"All {max_attempts} attempts failed for {func.__name__}: {str(last_exception)}"
-            )
-            raise last_exception
+            try:
+                return policy.call(func, *args, **kwargs)
+            except Exception as e:
+                logging.error("%s failed: %s", func.__name__, e)
+                raise
             
         return wrapper
     return decorator
@@ -75,21 +46,20 @@ def log_action(action_description: str):
         @functools.wraps(func)
         def wrapper(*args, **kwargs) -> Any:
             start_time = time.time()
-            logging.info(f"Starting: {action_description}")
+            logging.info("Starting: %s", action_description)
             
             try:
                 result = func(*args, **kwargs)
                 duration = time.time() - start_time
                 logging.info(
-                    f"Completed: {action_description} "
-                    f"(Duration: {duration:.2f} seconds)"
+                    "Completed: %s (Duration: %.2f seconds)", action_description, duration
                 )
                 return result
             except Exception as e:
                 duration = time.time() - start_time
                 logging.error(
-                    f"Failed: {action_description} "
-                    f"(Duration: {duration:.2f} seconds) - Error: {str(e)}"
+                    "Failed: %s (Duration: %.2f seconds) - Error: %s",
+                    action_description, duration, e
                 )
                 raise
                 
@@ -109,6 +79,7 @@ def wait_for_element(driver, by, value, timeout=10, condition="presence"):
     """
     from selenium.webdriver.support.ui import WebDriverWait
     from selenium.webdriver.support import expected_conditions as EC
+    from selenium.common.exceptions import TimeoutException
     
     conditions = {
         "presence": EC.presence_of_element_located,
@@ -124,8 +95,7 @@ def wait_for_element(driver, by, value, timeout=10, condition="presence"):
         return element
     except TimeoutException:
         logging.error(
-            f"Timeout waiting for element: {value} "
-            f"(condition: {condition})"
+            "Timeout waiting for element: %s (condition: %s)", value, condition
         )
         raise
 
@@ -138,16 +108,20 @@ def safe_click(driver, element, timeout=3):
         element: Element to click
         timeout: Maximum time to wait between attempts
     """
+    from selenium.common.exceptions import (
+        StaleElementReferenceException,
+        ElementClickInterceptedException
+    )
+    
     max_attempts = 3
     
     for attempt in range(max_attempts):
         try:
             # Scroll element into view
             driver.execute_script(
-                "arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});",
+                "arguments[0].scrollIntoView({behavior: 'instant', block: 'center'});",
                 element
             )
-            time.sleep(0.5)
             
             # Try to click
             element.click()
@@ -155,9 +129,9 @@ def safe_click(driver, element, timeout=3):
             
         except (ElementClickInterceptedException, StaleElementReferenceException) as e:
             if attempt == max_attempts - 1:
-                logging.error(f"Failed to click element after {max_attempts} attempts")
+                logging.error("Failed to click element after %s attempts", max_attempts)
                 raise
-            logging.warning(f"Click attempt {attempt + 1} failed, retrying...")
+            logging.warning("Click attempt %s failed, retrying...", attempt + 1)
             time.sleep(timeout / max_attempts)
 
 def ensure_dir_exists(directory):
@@ -169,7 +143,7 @@ def ensure_dir_exists(directory):
     """
     if not os.path.exists(directory):
         os.makedirs(directory)
-        logging.info(f"Created directory: {directory}")
+        logging.info("Created directory: %s", directory)
 
 def move_file(source, destination):
     """
@@ -182,9 +156,9 @@ def move_file(source, destination):
     try:
         ensure_dir_exists(os.path.dirname(destination))
         os.rename(source, destination)
-        logging.info(f"Moved file: {source} -> {destination}")
+        logging.info("Moved file: %s -> %s", source, destination)
     except Exception as e:
-        logging.error(f"Failed to move file {source}: {str(e)}")
+        logging.error("Failed to move file %s: %s", source, e)
         raise
 
 def clean_text(text):
@@ -208,6 +182,16 @@ def clean_text(text):
     
     return text
 
+def split_tags(tags):
+    """
+    Split a tags value into individual tag names.
+    
+    Args:
+        tags: Comma separated tags, or space separated when no comma is present
+    """
+    separator = ',' if ',' in tags else None
+    return [tag.strip() for tag in tags.split(separator) if tag.strip()]
+
 def is_valid_url(url):
     """
     Basic URL validation.
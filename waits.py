@@ -0,0 +1,189 @@
+"""
+Event-driven wait engine for WordPress automation.
+Waits on concrete DOM and network conditions instead of fixed sleeps,
+and records how long each wait actually took.
+"""
+import time
+import logging
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+# Scroll instantly so elements are in place as soon as the call returns
+SCROLL_SCRIPT = "arguments[0].scrollIntoView({behavior: 'instant', block: arguments[1]});"
+
+# jQuery drives the classic editor's AJAX (autosave, tags, media queries)
+AJAX_IDLE_SCRIPT = "return !window.jQuery || window.jQuery.active === 0;"
+
+EDITOR_READY_SCRIPT = """
+if (document.readyState !== 'complete') return false;
+if (!document.getElementById('title') || !document.getElementById('content')) return false;
+var wrap = document.getElementById('wp-content-wrap');
+if (wrap && wrap.classList.contains('tmce-active')) {
+    var editor = window.tinymce && window.tinymce.get('content');
+    return !!(editor && editor.initialized);
+}
+return true;
+"""
+
+
+class WaitEngine:
+    """Central place for every wait in the Selenium backend."""
+
+    def __init__(self, driver, default_timeout: float, ajax_timeout: float,
+                 publish_timeout: float, poll_interval: float = 0.1,
+                 required_timeout: Optional[float] = None):
+        """
+        The driver's implicit wait must be 0, otherwise every lookup of an
+        absent element blocks for the full implicit wait.
+
+        Args:
+            driver: Selenium WebDriver instance
+            default_timeout: Maximum wait for page and element conditions
+            ajax_timeout: Maximum wait for pending AJAX requests to finish
+            publish_timeout: Maximum wait for a publish or save round trip
+            poll_interval: How often conditions are re-checked
+            required_timeout: Maximum wait for elements that must exist, defaults to default_timeout
+        """
+        self.driver = driver
+        self.default_timeout = default_timeout
+        self.ajax_timeout = ajax_timeout
+        self.publish_timeout = publish_timeout
+        self.poll_interval = poll_interval
+        self.required_timeout = default_timeout if required_timeout is None else required_timeout
+        self.timings: Dict[str, List[float]] = defaultdict(list)
+
+    def until(self, name: str, condition: Callable, timeout: Optional[float] = None):
+        """
+        Wait until condition(driver) is truthy and return its value.
+
+        Args:
+            name: Label under which the wait duration is recorded
+            condition: Callable taking the driver, as for WebDriverWait
+            timeout: Maximum wait, defaults to default_timeout
+        """
+        timeout = self.default_timeout if timeout is None else timeout
+        start_time = time.monotonic()
+        try:
+            return WebDriverWait(self.driver, timeout, self.poll_interval).until(condition)
+        except TimeoutException:
+            logging.warning("Timed out after %ss waiting for %s", timeout, name)
+            raise
+        finally:
+            self.timings[name].append(time.monotonic() - start_time)
+
+    def element(self, locator: tuple, condition: str = "presence",
+                name: Optional[str] = None, timeout: Optional[float] = None):
+        """Wait for an element to be present, visible or clickable and return it."""
+        conditions = {
+            "presence": EC.presence_of_element_located,
+            "clickable": EC.element_to_be_clickable,
+            "visible": EC.visibility_of_element_located
+        }
+        wait_condition = conditions.get(condition, EC.presence_of_element_located)
+        return self.until(name or f"{condition}:{locator[1]}", wait_condition(locator), timeout)
+
+    def required(self, locator: tuple, condition: str = "presence",
+                 name: Optional[str] = None, parent=None):
+        """
+        Look up an element that must exist, waiting up to required_timeout for it.
+
+        Args:
+            locator: (By, value) tuple
+            condition: "presence", "clickable" or "visible"
+            name: Label under which the wait duration is recorded
+            parent: Element to search within instead of the whole page
+        """
+        if parent is not None:
+            return self.until(
+                name or f"required:{locator[1]}",
+                lambda d: parent.find_element(*locator),
+                self.required_timeout
+            )
+        return self.element(locator, condition, name or f"required:{locator[1]}",
+                            self.required_timeout)
+
+    def optional(self, locator: tuple, parent=None):
+        """Return the first matching element, or None immediately if there is none."""
+        elements = self.optional_all(locator, parent)
+        return elements[0] if elements else None
+
+    def optional_all(self, locator: tuple, parent=None) -> list:
+        """Return all matching elements without waiting; an absent element costs one round trip."""
+        return (parent or self.driver).find_elements(*locator)
+
+    def document_ready(self, timeout: Optional[float] = None):
+        """Wait for the current page to finish loading."""
+        self.until(
+            "document_ready",
+            lambda d: d.execute_script("return document.readyState") == "complete",
+            timeout
+        )
+
+    def ajax_idle(self, timeout: Optional[float] = None):
+        """Wait until no jQuery AJAX requests are pending."""
+        self.until(
+            "ajax_idle",
+            lambda d: d.execute_script(AJAX_IDLE_SCRIPT),
+            self.ajax_timeout if timeout is None else timeout
+        )
+
+    def editor_ready(self, timeout: Optional[float] = None):
+        """Wait for the classic editor, including TinyMCE when the visual tab is active."""
+        self.until("editor_ready", lambda d: d.execute_script(EDITOR_READY_SCRIPT), timeout)
+
+    def editor_mode(self, mode: str, timeout: Optional[float] = None):
+        """Wait for the editor to switch to "html" (text) or "tmce" (visual) mode."""
+        self.until(
+            f"editor_mode:{mode}",
+            lambda d: f"{mode}-active" in (
+                d.find_element(By.ID, "wp-content-wrap").get_attribute("class") or ""
+            ),
+            timeout
+        )
+
+    def page_reloaded(self, old_element, timeout: Optional[float] = None):
+        """Wait for a form submission to replace the page, then for the new page to load."""
+        timeout = self.publish_timeout if timeout is None else timeout
+        self.until("page_unload", EC.staleness_of(old_element), timeout)
+        self.document_ready(timeout)
+
+    def selected(self, element, timeout: Optional[float] = None):
+        """Wait for a checkbox to become selected."""
+        self.until("checkbox_selected", lambda d: element.is_selected(), timeout)
+
+    def invisible(self, locator: tuple, name: Optional[str] = None,
+                  timeout: Optional[float] = None):
+        """Wait for an element to be hidden or removed."""
+        self.until(
+            name or f"invisible:{locator[1]}",
+            EC.invisibility_of_element_located(locator),
+            timeout
+        )
+
+    def scroll_into_view(self, element, position: str = "center"):
+        """Scroll an element into view; instant scrolling needs no settle time."""
+        self.driver.execute_script(SCROLL_SCRIPT, element, position)
+
+    def summary(self) -> Dict[str, dict]:
+        """Per-wait count, total and maximum duration in seconds."""
+        return {
+            name: {
+                "count": len(durations),
+                "total": sum(durations),
+                "max": max(durations),
+            }
+            for name, durations in self.timings.items()
+        }
+
+    def log_summary(self):
+        """Log how long the waits actually took."""
+        for name, stats in sorted(self.summary().items()):
+            logging.info(
+                "Wait %s: %s waits, %.2fs total, %.2fs max",
+                name, stats['count'], stats['total'], stats['max']
+            )
@@ -0,0 +1,209 @@
+"""
+Input directory watcher for WordPress automation.
+Reports new post files once they have finished being written, using inotify
+on Linux and periodic directory scans everywhere else.
+"""
+import os
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import logging
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+# From <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = getattr(os, "O_CLOEXEC", 0)
+
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+EVENT_HEADER = struct.Struct("iIII")
+
+# Longest single sleep, so a stop request is noticed quickly
+MAX_SLEEP = 0.5
+
+FileSignature = Tuple[int, int]
+
+
+class _Inotify:
+    """Minimal inotify binding for one directory."""
+
+    def __init__(self, directory: str):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK) < 0:
+            error = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(error, f"inotify_add_watch failed for {directory}")
+
+    def read(self, timeout: float) -> Optional[Set[str]]:
+        """
+        Wait up to timeout for events and return the names they concern.
+
+        Returns None if the kernel queue overflowed and events were lost.
+        """
+        names: Set[str] = set()
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return names
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return names
+
+        offset = 0
+        while offset < len(data):
+            _, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            if mask & IN_Q_OVERFLOW:
+                return None
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if name:
+                names.add(os.fsdecode(name))
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+
+class DirectoryWatcher:
+    """Yields files in a directory once their size and mtime have stopped changing."""
+
+    def __init__(self, directory: str, suffix: str = ".txt", debounce: float = 1.0,
+                 poll_interval: float = 2.0, use_inotify: bool = True):
+        """
+        Args:
+            directory: Directory to watch
+            suffix: Only files with this extension are reported
+            debounce: Seconds a file must stay unchanged before it counts as fully written
+            poll_interval: Seconds between directory scans when inotify isn't available
+            use_inotify: Try inotify before falling back to scanning
+        """
+        self.directory = directory
+        self.suffix = suffix
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        # Files seen changing: path -> (signature, time it was last seen changing)
+        self._candidates: Dict[str, Tuple[FileSignature, float]] = {}
+        # Files already reported, by the signature they had then
+        self._reported: Dict[str, FileSignature] = {}
+        self._next_scan = 0.0
+
+        self._inotify: Optional[_Inotify] = None
+        if use_inotify:
+            try:
+                self._inotify = _Inotify(directory)
+            except (OSError, AttributeError) as e:
+                logging.info("inotify unavailable, scanning every %ss: %s", poll_interval, e)
+
+    @property
+    def mode(self) -> str:
+        return "inotify" if self._inotify else "polling"
+
+    def _signature(self, path: str) -> Optional[FileSignature]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (stat.st_size, stat.st_mtime_ns)
+
+    def _check(self, name: str, now: float):
+        """Start tracking a file, or restart its debounce if it changed."""
+        if not name.endswith(self.suffix):
+            return
+        path = os.path.join(self.directory, name)
+        signature = self._signature(path)
+        if signature is None or self._reported.get(path) == signature:
+            return
+        previous = self._candidates.get(path)
+        if previous is None or previous[0] != signature:
+            self._candidates[path] = (signature, now)
+
+    def _scan(self, now: float):
+        try:
+            with os.scandir(self.directory) as entries:
+                names = [entry.name for entry in entries if entry.is_file()]
+        except OSError as e:
+            logging.error("Could not scan %s: %s", self.directory, e)
+            return
+        for name in names:
+            self._check(name, now)
+
+    def _forget_moved(self):
+        # Reported files are normally moved away; forget them so a new file with the same name counts
+        for path in list(self._reported):
+            if not os.path.exists(path):
+                del self._reported[path]
+
+    def _collect_ready(self, now: float) -> List[str]:
+        ready = []
+        for path, (signature, since) in list(self._candidates.items()):
+            current = self._signature(path)
+            if current is None:
+                del self._candidates[path]
+            elif current != signature:
+                self._candidates[path] = (current, now)
+            elif now - since >= self.debounce:
+                del self._candidates[path]
+                self._reported[path] = current
+                ready.append(path)
+        return sorted(ready)
+
+    def wait(self, timeout: float, stop: Optional[threading.Event] = None) -> List[str]:
+        """
+        Return the files that became ready, waiting up to timeout for at least one.
+
+        Args:
+            timeout: Maximum wait in seconds
+            stop: Event that ends the wait early when set
+        """
+        deadline = time.monotonic() + timeout
+        self._forget_moved()
+        while True:
+            now = time.monotonic()
+            if now >= self._next_scan:
+                # inotify only needs the first scan, to pick up files that were already there
+                self._scan(now)
+                self._next_scan = float("inf") if self._inotify else now + self.poll_interval
+
+            ready = self._collect_ready(now)
+            if ready or now >= deadline or (stop is not None and stop.is_set()):
+                return ready
+
+            wake = min(deadline, self._next_scan, now + MAX_SLEEP)
+            for _, since in self._candidates.values():
+                wake = min(wake, since + self.debounce)
+            sleep = max(0.0, wake - now)
+
+            if self._inotify:
+                try:
+                    names = self._inotify.read(sleep)
+                except OSError as e:
+                    if e.errno != errno.EINTR:
+                        raise
+                    names = set()
+                if names is None:
+                    logging.warning("inotify queue overflowed, rescanning the input directory")
+                    self._next_scan = 0.0
+                else:
+                    now = time.monotonic()
+                    for name in names:
+                        self._check(name, now)
+            elif stop is not None:
+                stop.wait(sleep)
+            else:
+                time.sleep(sleep)
+
+    def close(self):
+        if self._inotify:
+            self._inotify.close()
+            self._inotify = None
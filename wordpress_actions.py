@@ -3,230 +3,504 @@ WordPress automation actions using Selenium.
 Handles login, post creation, and all WordPress interactions.
 """
 import time
+import json
 import logging
+import threading
+from datetime import datetime
 from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support.ui import Select
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
+from selenium.common.exceptions import TimeoutException
 from webdriver_manager.chrome import ChromeDriverManager
 from config import WordPressConfig, PostConfig
+from session_cache import SessionCache
+from waits import WaitEngine
+from media_index import MediaIndex
+from taxonomy import TaxonomyCache, TermMaps
+from metrics import FAILURE, stage, timed_stage
+from utils import split_tags
+from resilience import RetryableError, site_policy
+
+# Sets every editor field in one round trip and fires the events WordPress listens for
+FAST_FILL_SCRIPT = """
+var data = arguments[0];
+var found = {category: false};
+function fire(el) {
+    ['input', 'change'].forEach(function (type) {
+        el.dispatchEvent(new Event(type, {bubbles: true}));
+    });
+}
+
+var title = document.getElementById('title');
+title.value = data.title;
+fire(title);
+var prompt = document.getElementById('title-prompt-text');
+if (prompt) prompt.classList.add('screen-reader-text');
+
+var textarea = document.getElementById('content');
+textarea.value = data.content;
+fire(textarea);
+var editor = window.tinymce && window.tinymce.get('content');
+if (editor && !editor.isHidden()) {
+    editor.setContent(data.content);
+    editor.save();
+    editor.fire('change');
+}
+
+var checkbox = data.category_id && document.getElementById('in-category-' + data.category_id);
+if (!checkbox && data.category) {
+    var labels = document.querySelectorAll('#categorychecklist label');
+    var match = null;
+    for (var i = 0; i < labels.length; i++) {
+        var text = labels[i].textContent.trim().toLowerCase();
+        if (text === data.category) { match = labels[i]; break; }
+        if (!match && text.indexOf(data.category) !== -1) match = labels[i];
+    }
+    checkbox = match && match.querySelector('input[type=checkbox]');
+}
+if (checkbox) {
+    checkbox.checked = true;
+    fire(checkbox);
+    found.category = true;
+}
+
+var tags = document.getElementById('tax-input-post_tag');
+if (tags) {
+    tags.value = data.tags;
+    fire(tags);
+}
+
+var status = document.getElementById('post_status');
+if (status && status.querySelector('option[value="' + data.status + '"]')) {
+    status.value = data.status;
+    fire(status);
+}
+return found;
+"""
+
+# Every category is rendered in the editor's checklist with its term ID as the value
+CATEGORY_TERMS_SCRIPT = """
+var terms = {};
+document.querySelectorAll('#categorychecklist input[type=checkbox]').forEach(function (box) {
+    terms[box.parentElement.textContent.trim()] = parseInt(box.value, 10);
+});
+return terms;
+"""
+
+# Same query the featured image modal runs, returning the whole image library at once
+MEDIA_LIBRARY_SCRIPT = """
+var done = arguments[arguments.length - 1];
+jQuery.post(ajaxurl, {
+    action: 'query-attachments',
+    query: {orderby: 'date', order: 'DESC', posts_per_page: -1, post_mime_type: 'image'}
+}).done(function (response) {
+    done(response && response.success ? response.data.map(function (item) {
+        return {id: item.id, filename: item.filename};
+    }) : null);
+}).fail(function () { done(null); });
+"""
+
+# The classic editor saves the featured image from this hidden field on submit
+SET_THUMBNAIL_SCRIPT = """
+var field = document.getElementById('_thumbnail_id');
+if (!field) return false;
+field.value = arguments[0];
+return true;
+"""
+
+READ_BACK_SCRIPT = """
+var tags = document.getElementById('tax-input-post_tag');
+return {
+    title: document.getElementById('title').value,
+    content: document.getElementById('content').value,
+    tags: tags ? tags.value : ''
+};
+"""
+
+_driver_lock = threading.Lock()
+_driver_path = None
+
+def get_driver_path() -> str:
+    """Install ChromeDriver once per process, even when several workers start together."""
+    global _driver_path
+    with _driver_lock:
+        if _driver_path is None:
+            _driver_path = ChromeDriverManager().install()
+        return _driver_path
 
 class WordPressAutomator:
     def __init__(self, config: WordPressConfig):
         self.config = config
         self.driver = None
-        self.wait = None
+        self.waits = None
+        self.rest_nonce = None
+        self.taxonomy = TaxonomyCache(self._load_dom_terms, config.taxonomy_ttl)
+        self.media = MediaIndex(self._load_media, config.taxonomy_ttl)
+        self.retry = site_policy(config)
+        self.session_cache = (
+            SessionCache(config.session_cache_path, config.session_ttl)
+            if config.session_cache_path else None
+        )
 
     def setup_browser(self):
         """Initialize and configure the browser."""
         try:
-            service = Service(ChromeDriverManager().install())
+            service = Service(get_driver_path())
             options = Options()
             if self.config.headless:
                 options.add_argument('--headless')
             options.add_argument('--start-maximized')
             
             self.driver = webdriver.Chrome(service=service, options=options)
-            self.driver.implicitly_wait(self.config.implicit_wait)
-            self.wait = WebDriverWait(self.driver, self.config.page_load_timeout)
+            # Lookups never wait implicitly; required elements wait explicitly
+            # through the wait engine, optional probes return at once
+            self.driver.implicitly_wait(0)
+            self.waits = WaitEngine(
+                self.driver,
+                default_timeout=self.config.page_load_timeout,
+                ajax_timeout=self.config.ajax_timeout,
+                publish_timeout=self.config.publish_timeout,
+                poll_interval=self.config.wait_poll_interval,
+                required_timeout=self.config.implicit_wait
+            )
             logging.info("Browser setup successful")
             
         except Exception as e:
-            logging.error(f"Failed to setup browser: {str(e)}")
+            logging.error("Failed to setup browser: %s", e)
             raise
 
+    def _restore_session(self) -> bool:
+        """Reuse cached login cookies if one cheap request confirms they still work."""
+        if not self.session_cache:
+            return False
+        session = self.session_cache.load(self.config.url, self.config.username)
+        if not session:
+            return False
+
+        try:
+            # Chrome DevTools lets us set cookies without loading a page on the site first
+            for cookie in session["cookies"]:
+                params = {
+                    "name": cookie["name"],
+                    "value": cookie["value"],
+                    "domain": cookie.get("domain"),
+                    "path": cookie.get("path", "/"),
+                    "secure": cookie.get("secure", False),
+                    "httpOnly": cookie.get("httpOnly", False),
+                }
+                if cookie.get("expiry"):
+                    params["expires"] = cookie["expiry"]
+                self.driver.execute_cdp_cmd("Network.setCookie", params)
+
+            if session.get("nonce"):
+                # An authenticated REST call returns the current user as JSON
+                self.driver.get(
+                    f"{self.config.get_rest_url()}/wp/v2/users/me?_wpnonce={session['nonce']}"
+                )
+                body = self.waits.required((By.TAG_NAME, "body")).text
+                valid = "id" in json.loads(body)
+            else:
+                # wp-admin redirects to the login form when the cookies are no longer valid
+                self.driver.get(self.config.get_admin_url())
+                valid = "wp-login.php" not in self.driver.current_url
+
+        except Exception as e:
+            logging.warning("Could not restore cached session: %s", e)
+            valid = False
+
+        if valid:
+            self.rest_nonce = session.get("nonce")
+            logging.info("Reused cached WordPress session")
+        else:
+            logging.info("Cached WordPress session expired, logging in again")
+            self.session_cache.invalidate(self.config.url, self.config.username)
+            self.driver.delete_all_cookies()
+        return valid
+
+    def _save_session(self):
+        """Cache the cookies and REST nonce of the current login."""
+        if not self.session_cache:
+            return
+        try:
+            self.rest_nonce = self.driver.execute_script(
+                "return (window.wpApiSettings && wpApiSettings.nonce)"
+                " || (window.wp && wp.apiFetch && wp.apiFetch.nonceMiddleware"
+                " && wp.apiFetch.nonceMiddleware.nonce) || null;"
+            )
+            self.session_cache.save(
+                self.config.url, self.config.username,
+                self.driver.get_cookies(), self.rest_nonce
+            )
+        except Exception as e:
+            logging.warning("Could not cache WordPress session: %s", e)
+
+    @timed_stage("login")
     def login(self) -> bool:
-        """Log into WordPress admin panel."""
+        """Log into WordPress admin panel, reusing a cached session when possible."""
+        if self._restore_session():
+            return True
+
         try:
             self.driver.get(self.config.get_admin_url())
             
-            username_field = self.wait.until(
-                EC.presence_of_element_located((By.ID, "user_login"))
-            )
+            username_field = self.waits.element((By.ID, "user_login"))
             username_field.clear()
             username_field.send_keys(self.config.username)
             
-            password_field = self.driver.find_element(By.ID, "user_pass")
+            password_field = self.waits.required((By.ID, "user_pass"))
             password_field.clear()
             password_field.send_keys(self.config.password)
             
-            login_button = self.driver.find_element(By.ID, "wp-submit")
+            login_button = self.waits.required((By.ID, "wp-submit"))
             login_button.click()
             
             # Wait for admin bar to confirm login
-            self.wait.until(EC.presence_of_element_located((By.ID, "wpadminbar")))
+            self.waits.element((By.ID, "wpadminbar"), name="login")
             logging.info("Successfully logged into WordPress")
+            self._save_session()
             return True
             
         except Exception as e:
-            logging.error(f"Login failed: {str(e)}")
+            logging.error("Login failed: %s", e)
             return False
 
     def create_post(self, post_config: PostConfig) -> bool:
         """Create a new post with the given configuration."""
         try:
             # Navigate to new post page
-            self.driver.get(self.config.get_new_post_url())
-            time.sleep(2)
+            with stage("navigate"):
+                self.driver.get(self.config.get_new_post_url())
+                self.waits.editor_ready()
+
+            if self.config.fast_fill and self._fast_fill(post_config):
+                # Set featured image if provided; everything else is already filled
+                if post_config.image_reference is not None:
+                    self.set_featured_image(post_config.image_reference)
+            else:
+                self._fill_fields(post_config)
+
+            if post_config.publish_date is not None:
+                self.set_publish_date(post_config.publish_date)
 
+            # Publish or save as draft
+            self.publish_post(post_config.status)
+            
+            # Final verification
+            if post_config.status in ("publish", "future"):
+                with stage("verify") as verify:
+                    if not self._is_post_published():
+                        verify.outcome = FAILURE
+                        logging.error("Failed to verify post publication")
+                        return False
+                
+            logging.info("Successfully created post: %s", post_config.title)
+            return True
+
+        except Exception as e:
+            logging.error("Failed to create post: %s", e)
+            return False
+
+    def _load_dom_terms(self) -> TermMaps:
+        """
+        Load category IDs from the editor's category checklist.
+        
+        Tags are submitted by name in the classic editor, so no tag map is needed.
+        """
+        self.waits.element((By.ID, "categorychecklist"), name="category_checklist")
+        return self.driver.execute_script(CATEGORY_TERMS_SCRIPT), {}
+
+    def _fill_fields(self, post_config: PostConfig):
+        """Fill the editor one field at a time through the UI."""
+        with stage("fill"):
             # Set title
-            title_field = self.wait.until(
-                EC.presence_of_element_located((By.ID, "title"))
-            )
+            title_field = self.waits.element((By.ID, "title"))
             title_field.clear()
             title_field.send_keys(post_config.title)
 
             # Switch to text mode and set content
             self._switch_to_text_mode()
-            content_field = self.wait.until(
-                EC.presence_of_element_located((By.ID, "content"))
-            )
+            content_field = self.waits.element((By.ID, "content"))
             content_field.clear()
             content_field.send_keys(post_config.content)
 
             # Switch back to visual mode for better preview
             self._switch_to_visual_mode()
 
-            # Set featured image if provided
-            if post_config.media_index is not None:
-                self.set_featured_image(post_config.media_index)
+        # Set featured image if provided
+        if post_config.image_reference is not None:
+            self.set_featured_image(post_config.image_reference)
 
-            # Set category if provided
-            if post_config.category:
-                self.set_category(post_config.category)
+        # Set category if provided
+        if post_config.category:
+            self.set_category(post_config.category)
 
-            # Set tags if provided
-            if post_config.tags:
-                self.set_tags(post_config.tags)
+        # Set tags if provided
+        if post_config.tags:
+            self.set_tags(post_config.tags)
 
-            # Publish or save as draft
-            self.publish_post(post_config.status)
-            
-            # Final verification
-            if post_config.status == "publish" and not self._is_post_published():
-                logging.error("Failed to verify post publication")
+    @timed_stage("fill")
+    def _fast_fill(self, post_config: PostConfig) -> bool:
+        """
+        Fill title, content, category, tags and status in one script call.
+        
+        Returns False if the read-back doesn't match, so the caller can fall
+        back to filling the fields through the UI.
+        """
+        try:
+            found = self.driver.execute_script(FAST_FILL_SCRIPT, {
+                "title": post_config.title,
+                "content": post_config.content,
+                "category": (post_config.category or "").lower(),
+                "category_id": (
+                    self.taxonomy.category_id(post_config.category)
+                    if post_config.category else None
+                ),
+                "tags": ", ".join(split_tags(post_config.tags or "")),
+                "status": post_config.status,
+            })
+            if post_config.category and not found.get("category"):
+                logging.warning("Failed to set category: %s not found", post_config.category)
+
+            state = self.driver.execute_script(READ_BACK_SCRIPT)
+            expected_tags = ", ".join(split_tags(post_config.tags or ""))
+            if (state["title"] != post_config.title
+                    or not state["content"].strip()
+                    or state["tags"] != expected_tags):
+                logging.warning("Fast fill read-back did not match, filling fields one by one")
                 return False
-                
-            logging.info(f"Successfully created post: {post_config.title}")
+
+            logging.info("Fast-filled post fields for: %s", post_config.title)
             return True
 
         except Exception as e:
-            logging.error(f"Failed to create post: {str(e)}")
+            logging.warning("Fast fill failed, filling fields one by one: %s", e)
             return False
 
     def _switch_to_text_mode(self):
         """Switch to text editor mode."""
         try:
-            text_tab = self.wait.until(
-                EC.element_to_be_clickable((By.ID, "content-html"))
-            )
+            text_tab = self.waits.element((By.ID, "content-html"), "clickable")
             text_tab.click()
-            time.sleep(1)
+            self.waits.editor_mode("html")
         except Exception as e:
-            logging.warning(f"Could not switch to text mode: {str(e)}")
+            logging.warning("Could not switch to text mode: %s", e)
 
     def _switch_to_visual_mode(self):
         """Switch to visual editor mode."""
         try:
-            visual_tab = self.wait.until(
-                EC.element_to_be_clickable((By.ID, "content-tmce"))
-            )
+            visual_tab = self.waits.element((By.ID, "content-tmce"), "clickable")
             visual_tab.click()
-            time.sleep(1)
+            self.waits.editor_mode("tmce")
         except Exception as e:
-            logging.warning(f"Could not switch to visual mode: {str(e)}")
+            logging.warning("Could not switch to visual mode: %s", e)
 
     def _close_all_modals(self):
         """Close any open modal windows."""
         try:
-            close_buttons = self.driver.find_elements(
-                By.CSS_SELECTOR, '.media-modal-close'
+            close_buttons = self.waits.optional_all(
+                (By.CSS_SELECTOR, '.media-modal-close')
             )
             for button in close_buttons:
                 try:
                     button.click()
-                    time.sleep(0.5)
                 except:
                     continue
+            if close_buttons:
+                self.waits.invisible((By.CSS_SELECTOR, '.media-modal'), name="modal_closed")
         except:
             pass
-    def set_featured_image(self, media_index: int):
-        """Set featured image from media library."""
+
+    def _load_media(self) -> list:
+        """Load the image library, newest first (the media modal's order), over admin-ajax."""
+        items = self.driver.execute_async_script(MEDIA_LIBRARY_SCRIPT)
+        if items is None:
+            raise Exception("query-attachments request failed")
+        return items
+
+    @timed_stage("featured_image")
+    def set_featured_image(self, reference):
+        """
+        Set featured image by library index or filename.
+        
+        Uses the media index to write the attachment ID straight into the
+        _thumbnail_id field, falling back to picking it in the media modal.
+        """
+        try:
+            attachment_id = self.media.resolve(reference)
+            if attachment_id is not None and self.driver.execute_script(
+                SET_THUMBNAIL_SCRIPT, attachment_id
+            ):
+                logging.info("Featured image set to attachment %s", attachment_id)
+                return
+        except Exception as e:
+            logging.warning("Media index lookup failed: %s", e)
+
+        if isinstance(reference, int):
+            self._set_featured_image_via_modal(reference)
+
+    def _set_featured_image_via_modal(self, media_index: int):
+        """Set featured image by clicking through the media library modal."""
         try:
             # Click Set Featured Image button
-            set_featured = self.wait.until(
-                EC.element_to_be_clickable((By.ID, "set-post-thumbnail"))
-            )
-            
-            # Scroll to button
-            self.driver.execute_script(
-                "arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});",
-                set_featured
-            )
-            time.sleep(1)
-            
+            set_featured = self.waits.element((By.ID, "set-post-thumbnail"), "clickable")
+            self.waits.scroll_into_view(set_featured)
             set_featured.click()
-            time.sleep(2)
 
             # Wait for media modal
-            self.wait.until(EC.presence_of_element_located((By.CLASS_NAME, "media-modal")))
+            self.waits.element((By.CLASS_NAME, "media-modal"), "visible", name="media_modal")
             
             # Click Media Library tab if needed
-            media_library_tab = self.driver.find_element(
-                By.CSS_SELECTOR, '.media-menu-item:nth-child(2)'
+            media_library_tab = self.waits.required(
+                (By.CSS_SELECTOR, '.media-menu-item:nth-child(2)'), "clickable"
             )
             media_library_tab.click()
-            time.sleep(2)
 
-            # Select image by index
-            images = self.wait.until(
+            # Select image by index once the library query has returned
+            self.waits.ajax_idle()
+            images = self.waits.until(
+                "media_library",
                 EC.presence_of_all_elements_located((By.CSS_SELECTOR, '.attachment-preview'))
             )
             
             if len(images) >= media_index:
                 images[media_index - 1].click()
-                time.sleep(1)
 
-                # Set featured image
-                set_button = self.wait.until(
-                    EC.element_to_be_clickable((By.CSS_SELECTOR, '.media-button-select'))
+                # Set featured image (the button is enabled once a selection exists)
+                set_button = self.waits.element(
+                    (By.CSS_SELECTOR, '.media-button-select'), "clickable"
                 )
                 set_button.click()
-                time.sleep(2)
+
+                # The thumbnail is rendered into the meta box over AJAX
+                self.waits.invisible((By.CSS_SELECTOR, '.media-modal'), name="modal_closed")
+                self.waits.element((By.ID, "remove-post-thumbnail"), name="thumbnail_set")
             else:
-                logging.warning(f"Image index {media_index} not found in media library")
+                logging.warning("Image index %s not found in media library", media_index)
 
         except Exception as e:
-            logging.warning(f"Failed to set featured image: {str(e)}")
+            logging.warning("Failed to set featured image: %s", e)
         finally:
             self._close_all_modals()
 
+    @timed_stage("category")
     def set_category(self, category: str):
         """Set post category."""
         try:
             # Find and scroll to categories box
-            category_area = self.wait.until(
-                EC.presence_of_element_located((By.ID, "categorydiv"))
-            )
-            
-            # Scroll to categories box
-            self.driver.execute_script(
-                "arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});",
-                category_area
-            )
-            time.sleep(1)
+            category_area = self.waits.element((By.ID, "categorydiv"))
+            self.waits.scroll_into_view(category_area)
 
             # Make sure categories section is expanded
             try:
                 # Check if it's collapsed
                 if 'closed' in category_area.get_attribute('class'):
                     # Find and click the toggle
-                    toggle = category_area.find_element(By.CLASS_NAME, "handlediv")
+                    toggle = self.waits.required((By.CLASS_NAME, "handlediv"), parent=category_area)
                     toggle.click()
-                    time.sleep(1)
                     
                     # Verify it's expanded
                     if 'closed' in category_area.get_attribute('class'):
@@ -235,27 +509,22 @@ class WordPressAutomator:
                             "arguments[0].classList.remove('closed');", 
                             category_area
                         )
-                        time.sleep(1)
             except:
                 logging.warning("Could not verify category section state")
 
             # Wait for category list to be visible
-            category_list = self.wait.until(
-                EC.presence_of_element_located((By.ID, "categorychecklist"))
-            )
-            
-            # Scroll to category list
-            self.driver.execute_script(
-                "arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});",
-                category_list
-            )
-            time.sleep(1)
+            category_list = self.waits.element((By.ID, "categorychecklist"), "visible")
+            self.waits.scroll_into_view(category_list)
             
-            # Find and click category
-            xpath = f"//label[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), '{category.lower()}')]/input[@type='checkbox']"
-            checkbox = self.wait.until(
-                EC.presence_of_element_located((By.XPATH, xpath))
-            )
+            # Find and click category, by ID when the cache knows it
+            category_id = self.taxonomy.category_id(category)
+            if category_id is not None:
+                checkbox = self.waits.required(
+                    (By.ID, f"in-category-{category_id}"), name="category_checkbox"
+                )
+            else:
+                xpath = f"//label[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), '{category.lower()}')]/input[@type='checkbox']"
+                checkbox = self.waits.element((By.XPATH, xpath), name="category_checkbox")
             
             if not checkbox.is_selected():
                 # Try regular click first
@@ -264,20 +533,22 @@ class WordPressAutomator:
                 except:
                     # Try JavaScript click if regular fails
                     self.driver.execute_script("arguments[0].click();", checkbox)
-                time.sleep(0.5)
                 
                 # Verify selection
-                if not checkbox.is_selected():
+                try:
+                    self.waits.selected(checkbox, timeout=2)
+                except TimeoutException:
                     raise Exception("Failed to select category checkbox")
 
         except Exception as e:
-            logging.warning(f"Failed to set category: {str(e)}")
+            logging.warning("Failed to set category: %s", e)
 
+    @timed_stage("tags")
     def set_tags(self, tags: str):
         """Set post tags quickly."""
         try:
             # Find tags field directly
-            tags_field = self.driver.find_element(By.ID, "new-tag-post_tag")
+            tags_field = self.waits.required((By.ID, "new-tag-post_tag"))
             
             # Process all tags at once
             tags_field.clear()
@@ -288,100 +559,110 @@ class WordPressAutomator:
             
             # Quick verify - just check if tag area contains new content
             try:
-                self.wait.until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, ".tagchecklist > span"))
-                )
+                self.waits.element((By.CSS_SELECTOR, ".tagchecklist > span"), name="tags_added")
             except:
                 # One retry with Add button if Enter key didn't work
-                add_button = self.driver.find_element(By.CSS_SELECTOR, "input.tagadd")
-                add_button.click()
+                add_button = self.waits.optional((By.CSS_SELECTOR, "input.tagadd"))
+                if add_button:
+                    add_button.click()
             
-            logging.info(f"Tags added: {tags}")
+            logging.info("Tags added: %s", tags)
 
         except Exception as e:
-            logging.error(f"Failed to set tags: {str(e)}")
+            logging.error("Failed to set tags: %s", e)
+
+    def set_publish_date(self, publish_date: datetime):
+        """
+        Set the post's date in the publish box; a future date makes Publish schedule the post.
+        
+        The editor takes the date in the site's timezone, assumed to match this host's.
+        """
+        try:
+            local = publish_date.astimezone()
+            self.waits.required((By.CSS_SELECTOR, "a.edit-timestamp"), "clickable").click()
+            self.waits.element((By.ID, "timestampdiv"), "visible")
+
+            Select(self.waits.required((By.ID, "mm"))).select_by_value(f"{local.month:02d}")
+            for field_id, value in (("jj", local.day), ("aa", local.year),
+                                    ("hh", local.hour), ("mn", local.minute)):
+                field = self.waits.required((By.ID, field_id))
+                field.clear()
+                field.send_keys(f"{value:02d}")
+
+            self.waits.required((By.CSS_SELECTOR, "a.save-timestamp"), "clickable").click()
+            self.waits.invisible((By.ID, "timestampdiv"))
+            logging.info("Publish date set: %s", local.strftime("%Y-%m-%d %H:%M"))
+
+        except Exception as e:
+            logging.error("Failed to set publish date: %s", e)
+            raise
 
     def _is_post_published(self) -> bool:
-        """Check if post is currently published."""
+        """Check if post is currently published or scheduled."""
         try:
             # Check for success message
-            try:
-                success_message = self.driver.find_element(By.CSS_SELECTOR, "#message.updated")
-                if "Post published" in success_message.text:
-                    return True
-            except:
-                pass
+            success_message = self.waits.optional((By.CSS_SELECTOR, "#message.updated"))
+            if success_message and any(
+                text in success_message.text for text in ("Post published", "Post scheduled")
+            ):
+                return True
 
             # Check post status
-            status_span = self.wait.until(
-                EC.presence_of_element_located((By.ID, "post-status-display"))
-            )
-            return "Published" in status_span.text
+            status_span = self.waits.element((By.ID, "post-status-display"))
+            return any(text in status_span.text for text in ("Published", "Scheduled"))
         except:
             return False
 
     def _prepare_publish_status(self):
         """Prepare post for publishing by setting correct status."""
         try:
-            status_span = self.wait.until(
-                EC.presence_of_element_located((By.ID, "post-status-display"))
-            )
+            status_span = self.waits.element((By.ID, "post-status-display"))
             if "Draft" in status_span.text:
                 # Click edit status
-                edit_status = self.driver.find_element(
-                    By.CSS_SELECTOR, "a.edit-post-status"
+                edit_status = self.waits.required(
+                    (By.CSS_SELECTOR, "a.edit-post-status"), "clickable"
                 )
                 edit_status.click()
-                time.sleep(0.5)
                 
                 # Select publish
-                status_select = self.driver.find_element(By.ID, "post_status")
+                status_select = self.waits.element((By.ID, "post_status"), "visible")
                 for option in status_select.find_elements(By.TAG_NAME, "option"):
                     if option.text == "Published":
                         option.click()
                         break
-                time.sleep(0.5)
                 
                 # Click OK
-                ok_button = self.driver.find_element(
-                    By.CSS_SELECTOR, "a.save-post-status"
+                ok_button = self.waits.required(
+                    (By.CSS_SELECTOR, "a.save-post-status"), "clickable"
                 )
                 ok_button.click()
-                time.sleep(0.5)
+                self.waits.invisible((By.ID, "post-status-select"))
         except:
             logging.warning("Could not modify post status directly")
 
     def _save_draft(self):
         """Save post as draft."""
         try:
-            save_button = self.wait.until(
-                EC.element_to_be_clickable((By.ID, "save-post"))
-            )
-            self.driver.execute_script(
-                "arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});",
-                save_button
-            )
-            time.sleep(1)
+            save_button = self.waits.element((By.ID, "save-post"), "clickable")
+            self.waits.scroll_into_view(save_button)
             
             try:
                 save_button.click()
             except:
                 self.driver.execute_script("arguments[0].click();", save_button)
             
-            time.sleep(2)
-            
             # Verify save was successful
             try:
-                self.wait.until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, "#message.updated"))
-                )
+                self.waits.page_reloaded(save_button)
+                self.waits.element((By.CSS_SELECTOR, "#message.updated"), name="save_message")
             except:
                 logging.warning("Could not verify draft was saved")
                 
         except Exception as e:
-            logging.error(f"Failed to save draft: {str(e)}")
+            logging.error("Failed to save draft: %s", e)
             raise
 
+    @timed_stage("publish")
     def publish_post(self, status: str):
         """Publish or save the post."""
         try:
@@ -389,17 +670,11 @@ class WordPressAutomator:
             self._close_all_modals()
 
             # Scroll to publish box
-            publish_box = self.wait.until(
-                EC.presence_of_element_located((By.ID, "submitdiv"))
-            )
-            self.driver.execute_script(
-                "arguments[0].scrollIntoView({behavior: 'smooth', block: 'start'});",
-                publish_box
-            )
-            time.sleep(1)
+            publish_box = self.waits.element((By.ID, "submitdiv"))
+            self.waits.scroll_into_view(publish_box, "start")
 
-            if status == "publish":
-                # Set up publish status if needed
+            if status in ("publish", "future"):
+                # Set up publish status if needed; a future date turns Publish into Schedule
                 self._prepare_publish_status()
 
                 # Check if already published
@@ -407,57 +682,48 @@ class WordPressAutomator:
                     logging.info("Post is already published")
                     return
 
-                publish_attempts = 3
-                for attempt in range(publish_attempts):
-                    try:
-                        # Find and click publish button
-                        publish_button = self.wait.until(
-                            EC.element_to_be_clickable((By.ID, "publish"))
-                        )
-                        self.driver.execute_script(
-                            "arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});",
-                            publish_button
-                        )
-                        time.sleep(1)
-
-                        # Try different click methods
-                        try:
-                            publish_button.click()
-                        except:
-                            self.driver.execute_script("arguments[0].click();", publish_button)
-                        
-                        # Wait for publish to complete
-                        time.sleep(3)
-                        
-                        # Verify publish was successful
-                        if self._is_post_published():
-                            logging.info("Post published successfully")
-                            return
-                        
-                        if attempt < publish_attempts - 1:
-                            logging.warning(f"Publish attempt {attempt + 1} unsuccessful, retrying...")
-                            time.sleep(2)  # Wait before next attempt
-                        
-                    except Exception as e:
-                        if attempt == publish_attempts - 1:
-                            raise Exception(f"Failed to publish after {publish_attempts} attempts: {str(e)}")
-                        logging.warning(f"Publish attempt {attempt + 1} failed: {str(e)}")
-                        time.sleep(2)  # Wait before retry
+                self.retry.call(self._submit_publish)
             else:
                 self._save_draft()
 
         except Exception as e:
-            logging.error(f"Failed to {status} post: {str(e)}")
+            logging.error("Failed to %s post: %s", status, e)
             raise
 
+    def _submit_publish(self):
+        """Click Publish once and confirm the post went live."""
+        # Let autosave and other AJAX settle so the submit isn't blocked
+        self.waits.document_ready()
+        self.waits.ajax_idle()
+
+        # Find and click publish button
+        publish_button = self.waits.element((By.ID, "publish"), "clickable")
+        self.waits.scroll_into_view(publish_button)
+
+        # Try different click methods
+        try:
+            publish_button.click()
+        except:
+            self.driver.execute_script("arguments[0].click();", publish_button)
+
+        # Wait for the form submission to come back
+        self.waits.page_reloaded(publish_button)
+
+        # Verify publish was successful
+        if not self._is_post_published():
+            raise RetryableError("Post is not shown as published after submitting")
+        logging.info("Post published successfully")
+
     def cleanup(self):
         """Clean up resources."""
+        if self.waits:
+            self.waits.log_summary()
         if self.driver:
             try:
                 self.driver.quit()
                 logging.info("Browser closed")
             except Exception as e:
-                logging.warning(f"Error closing browser: {str(e)}")
+                logging.warning("Error closing browser: %s", e)
 
     def wait_for_element(self, by, value, timeout=10, condition="presence"):
         """
@@ -469,20 +735,10 @@ class WordPressAutomator:
             timeout: Maximum wait time
             condition: Type of wait condition ("presence", "clickable", "visible")
         """
-        conditions = {
-            "presence": EC.presence_of_element_located,
-            "clickable": EC.element_to_be_clickable,
-            "visible": EC.visibility_of_element_located
-        }
-        
-        wait_condition = conditions.get(condition, EC.presence_of_element_located)
         try:
-            element = WebDriverWait(self.driver, timeout).until(
-                wait_condition((by, value))
-            )
-            return element
+            return self.waits.element((by, value), condition, timeout=timeout)
         except Exception as e:
-            logging.error(f"Timeout waiting for element: {value} ({condition})")
+            logging.error("Timeout waiting for element: %s (%s)", value, condition)
             raise
 
     def safe_click(self, element, timeout=3, attempts=3):
@@ -497,11 +753,7 @@ class WordPressAutomator:
         for attempt in range(attempts):
             try:
                 # Scroll element into view
-                self.driver.execute_script(
-                    "arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});",
-                    element
-                )
-                time.sleep(1)
+                self.waits.scroll_into_view(element)
                 
                 # Try regular click
                 try:
@@ -514,9 +766,9 @@ class WordPressAutomator:
                     
             except Exception as e:
                 if attempt == attempts - 1:
-                    logging.error(f"Failed to click element after {attempts} attempts")
+                    logging.error("Failed to click element after %s attempts", attempts)
                     raise
-                logging.warning(f"Click attempt {attempt + 1} failed, retrying...")
+                logging.warning("Click attempt %s failed, retrying...", attempt + 1)
                 time.sleep(timeout / attempts)
         
         return False
@@ -530,10 +782,6 @@ class WordPressAutomator:
             position: Scroll position ("start", "center", "end")
         """
         try:
-            self.driver.execute_script(
-                f"arguments[0].scrollIntoView({{behavior: 'smooth', block: '{position}'}});",
-                element
-            )
-            time.sleep(1)
+            self.waits.scroll_into_view(element, position)
         except Exception as e:
-            logging.warning(f"Failed to scroll to element: {str(e)}")
\ No newline at end of file
+            logging.warning("Failed to scroll to element: %s", e)
\ No newline at end of file
@@ -0,0 +1,129 @@
+"""
+Parallel worker pool for WordPress automation.
+Runs several publishers side by side, each pulling files from a shared queue.
+"""
+import queue
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+from config import WordPressConfig
+from publishers import Publisher, create_publisher
+from concurrency import AdaptiveLimiter
+
+
+@dataclass
+class WorkerStats:
+    """Per-worker processing counts."""
+    worker_id: int
+    success_count: int = 0
+    failure_count: int = 0
+    logged_in: bool = False
+
+
+class WorkerPool:
+    """Starts N publishers and hands out files from a shared queue, batch_size at a time."""
+
+    def __init__(self, config: WordPressConfig, workers: int,
+                 handler: Callable[[Publisher, List[str]], Tuple[int, int]],
+                 limiter: Optional[AdaptiveLimiter] = None):
+        """
+        Args:
+            config: Site configuration used to create each worker's publisher
+            workers: Number of publishers to run in parallel
+            handler: Processes a group of files with a publisher, returns (successful, failed);
+                batch backends get up to their batch_size files per call
+            limiter: Shared cap on the workers' submissions in flight
+        """
+        if workers < 1:
+            raise ValueError("Worker count must be at least 1")
+        self.config = config
+        self.workers = workers
+        self.handler = handler
+        self.limiter = limiter
+        self.files: "queue.Queue[str]" = queue.Queue()
+        self.file_paths: List[str] = []
+        self._first_login_done = threading.Event()
+
+    def _take(self, count: int) -> List[str]:
+        """Take up to count files from the queue."""
+        file_paths = []
+        while len(file_paths) < count:
+            try:
+                file_paths.append(self.files.get_nowait())
+            except queue.Empty:
+                break
+        return file_paths
+
+    def _worker(self, stats: WorkerStats):
+        """Log in and process files until the queue is empty."""
+        publisher = None
+        try:
+            publisher = create_publisher(self.config)
+            publisher.limiter = self.limiter
+            stats.logged_in = publisher.setup()
+            if stats.logged_in and not self._first_login_done.is_set():
+                # Create the run's missing terms once, before the other workers start publishing
+                publisher.prepare_terms(self.file_paths)
+            self._first_login_done.set()
+            if not stats.logged_in:
+                logging.error("Worker %s: failed to login to WordPress", stats.worker_id)
+                return
+
+            while True:
+                file_paths = self._take(publisher.batch_size)
+                if not file_paths:
+                    break
+
+                try:
+                    succeeded, failed = self.handler(publisher, file_paths)
+                    stats.success_count += succeeded
+                    stats.failure_count += failed
+                finally:
+                    for _ in file_paths:
+                        self.files.task_done()
+
+        except Exception as e:
+            logging.error("Worker %s stopped: %s", stats.worker_id, e)
+        finally:
+            self._first_login_done.set()
+            if publisher:
+                publisher.cleanup()
+
+    def run(self, file_paths: List[str]) -> List[WorkerStats]:
+        """Process the given files and return the stats of every worker."""
+        self.file_paths = file_paths
+        for file_path in file_paths:
+            self.files.put(file_path)
+
+        # No point starting more browsers than there are files
+        stats = [WorkerStats(i + 1) for i in range(min(self.workers, len(file_paths)))]
+        threads = [
+            threading.Thread(target=self._worker, args=(s,), name=f"worker-{s.worker_id}")
+            for s in stats
+        ]
+        if not threads:
+            return stats
+
+        # Let the first worker log in alone so the others can reuse its cached session
+        threads[0].start()
+        self._first_login_done.wait()
+        for thread in threads[1:]:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if not self.files.empty():
+            logging.warning(
+                "%s files were left unprocessed because no worker could log in", self.files.qsize()
+            )
+        return stats
+
+
+def merge_stats(stats: List[WorkerStats]) -> tuple[int, int]:
+    """Combine per-worker counts into the (success, failure) totals."""
+    return (
+        sum(s.success_count for s in stats),
+        sum(s.failure_count for s in stats),
+    )